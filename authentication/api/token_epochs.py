@@ -0,0 +1,103 @@
+"""
+Revocation of JWTs through per-user token epochs.
+
+Every token carries the user's epoch at the time it was issued (the
+"epoch" claim). Logging out, resetting the password or deactivating the
+account increments the epoch stored in Redis, which invalidates every
+token issued before, on all devices, without a blacklist table. Checking
+a token costs one lookup in a short-lived in-process cache, or one Redis
+GET when that has expired.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.api.caching import LocalTTLCache
+
+from .user_cache import LOCAL_SIZE
+
+logger = logging.getLogger(__name__)
+
+EPOCH_CLAIM = "epoch"
+EPOCH_LOCAL_TTL = float(getattr(settings, "TOKEN_EPOCH_LOCAL_TTL", 5))
+
+_local = LocalTTLCache(maxsize=LOCAL_SIZE, ttl=EPOCH_LOCAL_TTL)
+
+
+def _epoch_key(user_id) -> str:
+    """
+    Return the cache key of a user's token epoch.
+    """
+    return f"auth:epoch:{user_id}"
+
+
+def current_epoch(user_id) -> int:
+    """
+    Return a user's current token epoch (0 if it was never raised).
+
+    Args:
+        user_id (int | str): Id of the user.
+
+    Returns:
+        int: The epoch tokens must carry to be accepted.
+    """
+    key = _epoch_key(user_id)
+    epoch = _local.get(key)
+    if epoch is None:
+        epoch = int(cache.get(key) or 0)
+        _local.set(key, epoch)
+    return epoch
+
+
+def revoke_tokens(user_id) -> int:
+    """
+    Increment a user's epoch, invalidating all tokens issued so far.
+
+    Other processes notice within TOKEN_EPOCH_LOCAL_TTL seconds.
+
+    Args:
+        user_id (int | str): Id of the user.
+
+    Returns:
+        int: The new epoch.
+    """
+    key = _epoch_key(user_id)
+    cache.add(key, 0, timeout=None)
+    epoch = cache.incr(key)
+    _local.delete(key)
+    return epoch
+
+
+def issue_tokens(user) -> RefreshToken:
+    """
+    Create a refresh token (and thereby its access tokens) stamped with the user's epoch.
+
+    Args:
+        user (User): The authenticated user.
+
+    Returns:
+        RefreshToken: Token whose access_token inherits the epoch claim.
+    """
+    _local.delete(_epoch_key(user.pk))
+    refresh = RefreshToken.for_user(user)
+    refresh[EPOCH_CLAIM] = current_epoch(user.pk)
+    return refresh
+
+
+def token_is_current(token) -> bool:
+    """
+    Check that a token was issued in the user's current epoch.
+
+    Args:
+        token (Token): Decoded access or refresh token.
+
+    Returns:
+        bool: False if the token was revoked (or carries no user).
+    """
+    user_id = token.get("user_id")
+    if user_id is None:
+        return False
+    return int(token.get(EPOCH_CLAIM, 0)) >= current_epoch(user_id)
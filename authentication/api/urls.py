@@ -10,6 +10,7 @@ from .views import (
     TokenRefreshView,
     PasswordResetRequestView,
     PasswordConfirmView,
+    UserCacheStatsView,
     activate_view,
 )
 
@@ -21,4 +22,5 @@ urlpatterns = [
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("password_reset/", PasswordResetRequestView.as_view(), name="password_reset"),
     path("password_confirm/<uidb64>/<token>/", PasswordConfirmView.as_view(), name="password_confirm"),
+    path("user_cache/", UserCacheStatsView.as_view(), name="user_cache_stats"),
 ]
@@ -0,0 +1,119 @@
+"""
+Two-level cache of the users resolved from JWT cookies.
+
+Lookups go to a bounded in-process LRU first, then to the shared Redis
+cache, and only then to the database. Saving or deleting a user removes
+its entries (see authentication.signals); other processes drop their
+local copy after USER_CACHE_LOCAL_TTL seconds at the latest, which
+bounds how long a deactivated account keeps working.
+
+Only the fields authentication and permission checks need are cached (no
+password hash); the returned users load every other field on access and
+save() writes back only the cached fields.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from core.api.caching import LocalTTLCache
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+CACHE_TTL = int(getattr(settings, "USER_CACHE_TTL", 300))
+LOCAL_TTL = float(getattr(settings, "USER_CACHE_LOCAL_TTL", 15))
+LOCAL_SIZE = int(getattr(settings, "USER_CACHE_LOCAL_SIZE", 4096))
+
+# Fields kept in the cache; all others are deferred on the returned users.
+AUTH_FIELDS = ("id", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser")
+
+_local = LocalTTLCache(maxsize=LOCAL_SIZE, ttl=LOCAL_TTL)
+_shared_counters = {"hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+def _cache_key(user_id) -> str:
+    """
+    Return the shared cache key of a user.
+    """
+    return f"auth:user:{user_id}"
+
+
+def _user_from_values(values: dict):
+    """
+    Build a User instance from cached AUTH_FIELDS values, like a query with
+    .only(*AUTH_FIELDS) would.
+    """
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db("default", names, [values[name] for name in names])
+
+
+def get_active_user(user_id):
+    """
+    Return the active user with the given id, using the cache levels.
+
+    Args:
+        user_id (int | str): Id from the token's "user_id" claim.
+
+    Returns:
+        User | None: The user, or None if it does not exist or is inactive.
+    """
+    if user_id is None:
+        return None
+    key = _cache_key(user_id)
+
+    user = _local.get(key)
+    if user is None:
+        try:
+            values = cache.get(key)
+        except Exception as exc:
+            logger.warning("User cache unavailable: %s", exc)
+            values = None
+        with _counters_lock:
+            _shared_counters["hits" if values is not None else "misses"] += 1
+
+        if values is None:
+            values = User.objects.filter(pk=user_id).values(*AUTH_FIELDS).first()
+            if values is None:
+                return None
+            try:
+                cache.set(key, values, CACHE_TTL)
+            except Exception as exc:
+                logger.warning("User cache unavailable: %s", exc)
+        user = _user_from_values(values)
+        _local.set(key, user)
+
+    return user if user.is_active else None
+
+
+def invalidate_user(user_id) -> None:
+    """
+    Drop a user from the shared cache and this process's local cache.
+
+    Args:
+        user_id (int): Id of the changed or deleted user.
+    """
+    key = _cache_key(user_id)
+    _local.delete(key)
+    try:
+        cache.delete(key)
+    except Exception as exc:
+        logger.warning("Could not invalidate cached user %s: %s", user_id, exc)
+
+
+def user_cache_stats() -> dict:
+    """
+    Return the hit and miss counters of this process.
+
+    Returns:
+        dict: {"local": LocalTTLCache.stats(), "shared": {"hits", "misses"}};
+            shared misses are the lookups that reached the database.
+    """
+    with _counters_lock:
+        shared = dict(_shared_counters)
+    return {"local": _local.stats(), "shared": shared}
@@ -2,15 +2,18 @@
 Views for user authentication, JWT handling, and password management.
 """
 
+import logging
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .serializers import (
@@ -19,8 +22,13 @@ from .serializers import (
     PasswordResetSerializer,
     PasswordConfirmSerializer,
 )
+from core.api.tasks import send_activation_email_async, send_password_reset_email_async
+
 from ..tokens import activation_token_generator, password_reset_token_generator
-from .utils import send_activation_email, send_password_reset_email
+from .token_epochs import issue_tokens, revoke_tokens, token_is_current
+from .user_cache import user_cache_stats
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -90,7 +98,7 @@ class RegisterView(APIView):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        send_activation_email(user)
+        send_activation_email_async.delay(user.id)
 
         from .utils import build_activation_link
 
@@ -146,7 +154,7 @@ class LoginView(APIView):
         serializer = LoginSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
+        refresh = issue_tokens(user)
 
         response = Response(
             {"detail": "Login successful", "user": {"id": user.id, "username": user.email}},
@@ -158,31 +166,49 @@ class LoginView(APIView):
 
 class LogoutView(APIView):
     """
-    Log out a user by blacklisting the refresh token and clearing cookies.
+    Log out a user by revoking their tokens and clearing cookies.
     """
 
     permission_classes = [AllowAny]
 
     def post(self, request):
         """
-        Blacklist the refresh token from cookies and clear authentication cookies.
+        Raise the token epoch of the refresh token's user and clear the
+        authentication cookies. Every access and refresh token issued to
+        the user before, on any device, stops working.
+
+        An invalid or expired refresh cookie has nothing left to revoke and
+        only clears the cookies. If the epoch cannot be raised (e.g. Redis
+        is down), the cookies are cleared as well but 503 is returned,
+        since the user's tokens stay valid elsewhere.
 
         Returns:
-            Response: 200 on success, 400 if refresh token cookie is missing.
+            Response: 200 on success, 400 if refresh token cookie is missing,
+                503 if the tokens could not be revoked.
         """
         refresh_cookie = request.COOKIES.get("refresh_token")
         if not refresh_cookie:
             return Response({"detail": "Refresh token is missing."}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            token = RefreshToken(refresh_cookie)
-            token.blacklist()
-        except Exception:
-            pass
 
         response = Response(
             {"detail": "Logout successful! All tokens will be deleted. Refresh token is now invalid."},
             status=status.HTTP_200_OK,
         )
+        try:
+            token = RefreshToken(refresh_cookie)
+        except TokenError:
+            token = None
+        if token is not None:
+            try:
+                if token_is_current(token):
+                    revoke_tokens(token["user_id"])
+            except Exception:
+                logger.exception("Could not revoke tokens of user %s on logout", token.get("user_id"))
+                response = Response(
+                    {"detail": "Logout failed: tokens could not be revoked. Please try again."},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+
         _clear_jwt_cookies(response)
         return response
 
@@ -198,6 +224,10 @@ class TokenRefreshView(APIView):
         """
         Refresh the access token using the refresh token cookie.
 
+        Refresh tokens issued before the user's last logout, password reset
+        or deactivation are rejected; the new access token carries the same
+        epoch as the refresh token.
+
         Returns:
             Response: 200 with new access token, 400 or 401 on error.
         """
@@ -206,6 +236,8 @@ class TokenRefreshView(APIView):
             return Response({"detail": "Refresh token is missing."}, status=status.HTTP_400_BAD_REQUEST)
         try:
             refresh = RefreshToken(refresh_cookie)
+            if not token_is_current(refresh):
+                raise ValueError("Refresh token was revoked.")
             access = str(refresh.access_token)
         except Exception:
             return Response({"detail": "Invalid refresh token."}, status=status.HTTP_401_UNAUTHORIZED)
@@ -242,7 +274,7 @@ class PasswordResetRequestView(APIView):
 
         try:
             user = User.objects.get(email__iexact=email)
-            send_password_reset_email(user)
+            send_password_reset_email_async.delay(user.id)
         except User.DoesNotExist:
             pass
 
@@ -258,14 +290,20 @@ class PasswordConfirmView(APIView):
 
     def post(self, request, uidb64, token):
         """
-        Validate the reset token and set a new password for the user.
+        Validate the reset token, set a new password for the user and
+        revoke all tokens issued with the old one.
 
         Args:
             uidb64 (str): Base64-encoded user ID.
             token (str): Password reset token.
 
+        The tokens are revoked before the password is changed; if that
+        fails, the password stays unchanged and 503 is returned, so the
+        reset link can be used again.
+
         Returns:
-            Response: 200 on successful password reset, 400 on invalid token or user.
+            Response: 200 on successful password reset, 400 on invalid token
+                or user, 503 if the user's tokens could not be revoked.
         """
         serializer = PasswordConfirmSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -279,6 +317,31 @@ class PasswordConfirmView(APIView):
         if not password_reset_token_generator.check_token(user, token):
             return Response({"detail": "Invalid token or user."}, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            revoke_tokens(user.pk)
+        except Exception:
+            logger.exception("Could not revoke tokens of user %s on password reset", user.pk)
+            return Response(
+                {"detail": "Password could not be reset. Please try again."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
         user.set_password(serializer.validated_data["new_password"])
         user.save(update_fields=["password"])
         return Response({"detail": "Your Password has been successfully reset."}, status=status.HTTP_200_OK)
+
+
+class UserCacheStatsView(APIView):
+    """
+    Report the hit and miss counters of the authenticated-user cache (staff only).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Return the counters of the process that handles this request.
+
+        Returns:
+            Response: 200 with the local (in-process) and shared (Redis) counters.
+        """
+        return Response(user_cache_stats(), status=status.HTTP_200_OK)
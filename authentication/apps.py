@@ -9,9 +9,15 @@ class AuthenticationConfig(AppConfig):
     """
     Configuration settings for the authentication app.
     Defines the app’s name, default primary key field type,
-    and human-readable verbose name.
+    and human-readable verbose name, and registers the signal handlers.
     """
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "authentication"
     verbose_name = "Authentication"
+
+    def ready(self):
+        """
+        Import signal handlers to ensure they are registered when the app loads.
+        """
+        from . import signals
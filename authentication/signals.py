@@ -0,0 +1,41 @@
+"""
+Signal handlers keeping the authenticated-user cache and token epochs consistent.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .api.token_epochs import revoke_tokens
+from .api.user_cache import invalidate_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Remove a saved or deleted user from the user cache.
+
+    Args:
+        sender: The model class (User).
+        instance (User): The changed user.
+        **kwargs: Additional signal arguments.
+    """
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_of_inactive_user(sender, instance, created, **kwargs):
+    """
+    Revoke every token of a deactivated user.
+
+    Args:
+        sender: The model class (User).
+        instance (User): The saved user.
+        created (bool): Whether the user was just created.
+        **kwargs: Additional signal arguments.
+    """
+    if not created and not instance.is_active:
+        revoke_tokens(instance.pk)
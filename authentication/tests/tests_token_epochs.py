@@ -0,0 +1,70 @@
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from authentication.api import token_epochs, user_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache.cache.clear()
+    user_cache._local.clear()
+    token_epochs._local.clear()
+
+
+@pytest.fixture
+def logged_in(django_user_model):
+    user = django_user_model.objects.create_user(email="viewer@example.com", password="Password123!")
+    user.is_active = True
+    user.save()
+    client = APIClient()
+    res = client.post(
+        reverse("authentication:login"),
+        {"email": user.email, "password": "Password123!"}, format="json",
+    )
+    assert res.status_code == 200
+    return user, client
+
+
+@pytest.mark.django_db
+def test_logout_revokes_access_and_refresh_tokens(logged_in):
+    user, client = logged_in
+    cookies = {name: morsel.value for name, morsel in client.cookies.items()}
+    assert client.get(reverse("video:video_list")).status_code == 200
+
+    assert client.post(reverse("authentication:logout")).status_code == 200
+
+    stolen = APIClient()
+    for name, value in cookies.items():
+        stolen.cookies[name] = value
+    assert stolen.get(reverse("video:video_list")).status_code in (401, 403)
+    assert stolen.post(reverse("authentication:token_refresh")).status_code == 401
+
+
+@pytest.mark.django_db
+def test_logout_reports_failed_revocation(logged_in):
+    user, client = logged_in
+    with mock.patch("authentication.api.views.revoke_tokens", side_effect=ConnectionError):
+        assert client.post(reverse("authentication:logout")).status_code == 503
+    assert token_epochs.current_epoch(user.pk) == 0
+
+    client.cookies["refresh_token"] = "garbage"
+    assert client.post(reverse("authentication:logout")).status_code == 200
+
+
+@pytest.mark.django_db
+def test_deactivation_revokes_tokens_and_new_login_gets_current_epoch(logged_in):
+    user, client = logged_in
+    epoch = token_epochs.current_epoch(user.pk)
+
+    user.is_active = False
+    user.save()
+    assert token_epochs.current_epoch(user.pk) == epoch + 1
+
+    user.is_active = True
+    user.save()
+    refresh = token_epochs.issue_tokens(user)
+    assert token_epochs.token_is_current(refresh)
+    assert token_epochs.token_is_current(refresh.access_token)
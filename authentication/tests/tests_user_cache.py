@@ -0,0 +1,48 @@
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.api import token_epochs, user_cache
+from video.api.permissions import CookieJWTAuthentication
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache._local.clear()
+    user_cache.cache.clear()
+    token_epochs._local.clear()
+    yield
+    user_cache._local.clear()
+
+
+@pytest.mark.django_db
+def test_cached_user_is_resolved_without_queries(django_user_model, django_assert_num_queries, rf):
+    user = django_user_model.objects.create_user(email="viewer@example.com", password="pw")
+    user.is_active = True
+    user.save()
+    request = rf.get("/")
+    request.COOKIES["access_token"] = str(AccessToken.for_user(user))
+
+    assert CookieJWTAuthentication().authenticate(request)[0] == user
+    with django_assert_num_queries(0):
+        assert CookieJWTAuthentication().authenticate(request)[0] == user
+    assert user_cache.user_cache_stats()["local"]["hits"] == 1
+
+    cached = user_cache.cache.get(user_cache._cache_key(user.pk))
+    assert set(cached) == set(user_cache.AUTH_FIELDS)
+    assert user_cache.get_active_user(user.pk).get_deferred_fields() >= {"password", "last_login"}
+
+
+@pytest.mark.django_db
+def test_deactivation_invalidates_the_cached_user(django_user_model):
+    user = django_user_model.objects.create_user(email="viewer@example.com", password="pw")
+    user.is_active = True
+    user.save()
+    assert user_cache.get_active_user(user.pk) == user
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    assert user_cache.get_active_user(user.pk) is None
+
+    user_id = user.pk
+    user.delete()
+    assert user_cache.get_active_user(user_id) is None
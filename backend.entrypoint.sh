@@ -56,11 +56,17 @@ else:
 EOF
 
 # -----------------------------------------------------------------------------
-# Start RQ worker (background)
+# Start RQ worker pools (background, see RQ_WORKER_POOLS in settings)
 # -----------------------------------------------------------------------------
-python manage.py rqworker default &
+python manage.py run_workers &
 
 # -----------------------------------------------------------------------------
 # Start Gunicorn application server
+# APP_SERVER=asgi runs uvicorn workers with the async HLS views; the default
+# (wsgi) keeps the sync workers.
 # -----------------------------------------------------------------------------
+if [ "${APP_SERVER:-wsgi}" = "asgi" ]; then
+  export VIDEO_ASYNC_DELIVERY="${VIDEO_ASYNC_DELIVERY:-True}"
+  exec gunicorn core.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:8000 --reload
+fi
 exec gunicorn core.wsgi:application --bind 0.0.0.0:8000 --reload
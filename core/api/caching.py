@@ -0,0 +1,101 @@
+"""
+Small in-process cache placed in front of the shared Redis cache.
+
+Values looked up on every request, such as the user authenticated from a
+JWT cookie, are kept for a few seconds in each web process, so most
+lookups cost neither a database nor a Redis round trip. Entries expire
+after a short TTL, which bounds how long a process can serve a value that
+was changed or invalidated elsewhere.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Attributes:
+        maxsize (int): Largest number of entries; the least recently used
+            entry is evicted first.
+        ttl (float): Lifetime of an entry in seconds.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that found no live entry.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = max(int(maxsize), 1)
+        self.ttl = float(ttl)
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the live value of a key, or `default`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key: Hashable key.
+            value: Value to keep.
+            ttl (float | None): Lifetime in seconds. Defaults to the cache's ttl.
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        """
+        Remove a key if present.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Return the size and hit/miss counters of this process's cache.
+
+        Returns:
+            dict: {"size", "maxsize", "ttl", "hits", "misses", "hit_ratio"}
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
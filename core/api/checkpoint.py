@@ -0,0 +1,330 @@
+"""
+Checkpoints that let an interrupted HLS transcode resume where it stopped.
+
+Every encoder run ("attempt") writes an EVENT playlist to a hidden working
+file (.partNN.m3u8) next to the rendition's segments. ffmpeg only lists a
+segment there once it is completely written, so after a crash the working
+playlists describe exactly which output can be reused. A retried job
+verifies those segments, truncates every rendition to the last boundary
+they all reached and encodes the rest as a new attempt. When the encoder
+finishes, the attempts are stitched into the public index.m3u8.
+
+A pass that replaces an already published rendition (the high-quality
+pass after the fast preview) uses its own namespace for segments and
+working playlists, so it never touches the files the published playlist
+references; the superseded files are deleted later.
+"""
+
+import logging
+import shutil
+from pathlib import Path
+
+from .playlists import (
+    MEDIA_PLAYLIST,
+    parse_media_playlist,
+    playlist_version,
+    stitch_playlists,
+    write_media_playlist,
+)
+
+logger = logging.getLogger(__name__)
+
+TS_PACKET_SIZE = 188
+TS_SYNC_BYTE = 0x47
+
+
+def part_names(attempt: int, namespace: str = "") -> tuple:
+    """
+    Return the segment prefix and working playlist name of one attempt.
+
+    The first attempt keeps the regular segment names, later attempts get
+    their own prefix so they never overwrite reused output.
+
+    Args:
+        attempt (int): Attempt number, starting at 0.
+        namespace (str): Prefix separating the files of one pass, e.g. "hq_".
+
+    Returns:
+        tuple[str, str]: (segment_prefix, playlist_name)
+    """
+    prefix = "segment" if attempt == 0 else f"part{attempt:02d}_segment"
+    return f"{namespace}{prefix}", f".{namespace}part{attempt:02d}.m3u8"
+
+
+def part_playlists(rendition_dir: Path, namespace: str = "") -> list:
+    """
+    Return the working playlists of a rendition (of one pass) in attempt order.
+    """
+    return sorted(rendition_dir.glob(f".{namespace}part[0-9][0-9].m3u8"))
+
+
+def _byte_range(segment):
+    """
+    Return (length, offset) from a segment's EXT-X-BYTERANGE tag, or None.
+    """
+    for tag in segment.tags:
+        if tag.startswith("#EXT-X-BYTERANGE:"):
+            length, _, offset = tag.split(":", 1)[1].partition("@")
+            return int(length), int(offset or 0)
+    return None
+
+
+def verify_segment(rendition_dir: Path, segment) -> bool:
+    """
+    Check that a listed segment is completely present on disk.
+
+    Byte-range (fMP4) segments must lie inside their media file; MPEG-TS
+    segments must be a non-empty whole number of sync-aligned packets.
+
+    Args:
+        rendition_dir (Path): Directory containing the segment file.
+        segment (Segment): Segment entry from a playlist.
+
+    Returns:
+        bool: True if the segment can be reused.
+    """
+    path = rendition_dir / segment.uri
+    try:
+        size = path.stat().st_size
+        byte_range = _byte_range(segment)
+        if byte_range:
+            length, offset = byte_range
+            return size >= offset + length
+        if not size or size % TS_PACKET_SIZE:
+            return False
+        with open(path, "rb") as fh:
+            return fh.read(1)[0] == TS_SYNC_BYTE
+    except (OSError, IndexError):
+        return False
+
+
+def verified_prefix(rendition_dir: Path, playlist) -> list:
+    """
+    Return the leading segments of a playlist that pass verify_segment().
+    """
+    segments = []
+    for segment in playlist.segments:
+        if not verify_segment(rendition_dir, segment):
+            break
+        segments.append(segment)
+    return segments
+
+
+def playlist_finished(rendition_dir: Path, name: str) -> bool:
+    """
+    Return True if a playlist is closed and every segment it lists is verified.
+
+    Args:
+        rendition_dir (Path): Rendition output directory.
+        name (str): Playlist file name inside it.
+
+    Returns:
+        bool: Whether the playlist's output can be reused as is.
+    """
+    path = rendition_dir / name
+    if not path.is_file():
+        return False
+    playlist = parse_media_playlist(path)
+    return playlist.ended and len(verified_prefix(rendition_dir, playlist)) == len(playlist.segments)
+
+
+def _remove_unreferenced(rendition_dir: Path, prefix: str, keep: set) -> None:
+    """
+    Delete media files of one attempt that no playlist references.
+    """
+    for path in rendition_dir.glob(f"{prefix}[._]*"):
+        if path.name not in keep and path.suffix in (".ts", ".mp4", ".m4s"):
+            path.unlink(missing_ok=True)
+
+
+def prepare_resume(rendition_dirs, namespace: str = "") -> tuple:
+    """
+    Close the last interrupted attempt and compute where to continue.
+
+    The last working playlist of every rendition is cut down to the
+    segments that are verified in all renditions (segment boundaries are
+    aligned across the ladder) and closed with EXT-X-ENDLIST. Partially
+    written files of that attempt are removed. If the encoder already
+    finished every rendition, only publishing is left to do.
+
+    Args:
+        rendition_dirs (Iterable[Path]): Output directories of one job,
+            lowest resolution first.
+        namespace (str): File namespace of the pass, see part_names().
+
+    Returns:
+        tuple[int, float, bool]: (next attempt number, seconds already
+            encoded, whether encoding is already finished).
+    """
+    rendition_dirs = list(rendition_dirs)
+    parts = {d: part_playlists(d, namespace) for d in rendition_dirs}
+    attempts = max((len(p) for p in parts.values()), default=0)
+    if not attempts:
+        return 0, 0.0, False
+
+    last = attempts - 1
+    prefix, name = part_names(last, namespace)
+    playlists = {}
+    for d in rendition_dirs:
+        path = d / name
+        playlists[d] = parse_media_playlist(path) if path.is_file() else None
+
+    keep = min(
+        len(verified_prefix(d, p)) if p else 0
+        for d, p in playlists.items()
+    )
+    finished = all(
+        p is not None and p.ended and keep == len(p.segments)
+        for p in playlists.values()
+    )
+    if finished:
+        return attempts, 0.0, True
+
+    for d, playlist in playlists.items():
+        if playlist is None:
+            continue
+        if keep:
+            write_media_playlist(d / name, playlist.segments[:keep], playlist_version(playlist))
+        else:
+            (d / name).unlink(missing_ok=True)
+        _remove_unreferenced(d, prefix, {s.uri for s in playlist.segments[:keep]})
+
+    lowest = rendition_dirs[0]
+    done = sum(
+        parse_media_playlist(path).duration for path in part_playlists(lowest, namespace)
+    )
+    next_attempt = attempts if keep else last
+    if done:
+        logger.info(
+            "Resuming %s at %.1fs (attempt %d)", lowest.parent, done, next_attempt,
+        )
+    return next_attempt, done, False
+
+
+def publish_parts(rendition_dir: Path, namespace: str = "") -> Path:
+    """
+    Stitch all finished attempts of a rendition into its index.m3u8.
+
+    The playlist is replaced atomically, so players never read a partial
+    one.
+
+    Args:
+        rendition_dir (Path): Rendition output directory.
+        namespace (str): File namespace of the pass, see part_names().
+
+    Returns:
+        Path: The published playlist path.
+
+    Raises:
+        ValueError: If an attempt is unfinished.
+    """
+    return stitch_playlists(
+        part_playlists(rendition_dir, namespace), rendition_dir / MEDIA_PLAYLIST,
+    )
+
+
+def _working_playlists(rendition_dir: Path) -> list:
+    """
+    Return every working playlist of a rendition: attempts of all passes
+    and chunks of a chunked transcode.
+    """
+    return sorted(rendition_dir.glob(".*part[0-9][0-9].m3u8")) + sorted(
+        rendition_dir.glob(".chunk*.m3u8")
+    )
+
+
+def remove_superseded_media(rendition_dir: Path) -> int:
+    """
+    Delete media files that neither the published nor a working playlist uses.
+
+    Run some time after a rendition was replaced, so players still on the
+    old playlist can finish fetching its segments first. Nothing is removed
+    while an encode is writing to the directory; that encode schedules its
+    own cleanup when it replaces the playlist.
+
+    Args:
+        rendition_dir (Path): Rendition output directory.
+
+    Returns:
+        int: Number of files removed.
+    """
+    published = rendition_dir / MEDIA_PLAYLIST
+    if not published.is_file() or _working_playlists(rendition_dir):
+        return 0
+
+    referenced = {segment.uri for segment in parse_media_playlist(published).segments}
+
+    removed = 0
+    for path in rendition_dir.iterdir():
+        if path.suffix in (".ts", ".mp4", ".m4s") and path.name not in referenced:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def discard_partial_output(rendition_dirs, keep_verified: bool = True) -> list:
+    """
+    Delete rendition directories that a failed encode left without usable output.
+
+    Published renditions (index.m3u8 present) are never touched. With
+    keep_verified, directories holding verified segments of an attempt or
+    chunk are kept so a retry can resume from them.
+
+    Args:
+        rendition_dirs (Iterable[Path]): Output directories of the failed job.
+        keep_verified (bool): Keep resumable directories.
+
+    Returns:
+        list[Path]: The removed directories.
+    """
+    removed = []
+    for rendition_dir in rendition_dirs:
+        if not rendition_dir.is_dir() or (rendition_dir / MEDIA_PLAYLIST).is_file():
+            continue
+        working = _working_playlists(rendition_dir)
+        if keep_verified and any(
+            verified_prefix(rendition_dir, parse_media_playlist(path)) for path in working
+        ):
+            continue
+        shutil.rmtree(rendition_dir, ignore_errors=True)
+        removed.append(rendition_dir)
+    return removed
+
+
+def checkpoint_state(movie_dir: Path) -> dict:
+    """
+    Describe how much of each rendition of a movie is verified on disk.
+
+    Finished renditions report their published playlist; unfinished ones
+    the verified segments of their working playlists (resumable attempts
+    and finished chunks of a chunked transcode).
+
+    Args:
+        movie_dir (Path): <HLS_ROOT>/<movie_id>/ directory.
+
+    Returns:
+        dict[str, dict]: Rendition label -> {"complete", "segments",
+            "seconds", "attempts"}.
+    """
+    state = {}
+    if not movie_dir.is_dir():
+        return state
+
+    for rendition_dir in sorted(p for p in movie_dir.iterdir() if p.is_dir()):
+        working = _working_playlists(rendition_dir)
+        published = rendition_dir / MEDIA_PLAYLIST
+        if not working and not published.is_file():
+            continue
+
+        playlists = [published] if not working else working
+        segments = []
+        for path in playlists:
+            segments += verified_prefix(rendition_dir, parse_media_playlist(path))
+
+        state[rendition_dir.name] = {
+            "complete": not working,
+            "segments": len(segments),
+            "seconds": round(sum(s.duration for s in segments), 3),
+            "attempts": len(list(rendition_dir.glob(".*part[0-9][0-9].m3u8"))),
+        }
+    return state
@@ -0,0 +1,302 @@
+"""
+Running ffmpeg as a supervised subprocess.
+
+Every ffmpeg call goes through run_ffmpeg(). It streams "-progress" output
+and stderr incrementally (only the last lines of the log are kept), kills
+encoders that exceed their wall-clock budget or stop making progress, and
+stops them when the RQ job they belong to is cancelled. ffmpeg runs in its
+own process group, which is always killed as a whole, and it receives
+SIGKILL if the worker process that started it dies.
+"""
+
+import logging
+import os
+import selectors
+import shutil
+import signal
+import subprocess
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from rq import get_current_job
+from rq.job import JobStatus
+
+from .governor import lower_priority
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_TIMEOUT = float(getattr(settings, "VIDEO_FFMPEG_TIMEOUT", 0))
+STALL_TIMEOUT = float(getattr(settings, "VIDEO_FFMPEG_STALL_TIMEOUT", 120))
+
+STDERR_LINES = 50
+MAX_LINE_BYTES = 64 * 1024
+POLL_INTERVAL = 1.0
+CANCEL_POLL_INTERVAL = 2.0
+KILL_GRACE = 5.0
+
+
+class FFmpegError(subprocess.CalledProcessError):
+    """
+    ffmpeg exited unsuccessfully; `stderr` holds the last lines of its log.
+    """
+
+    def __str__(self):
+        tail = (self.stderr or "").strip().splitlines()[-1:]
+        return f"{super().__str__()} {tail[0] if tail else ''}".rstrip()
+
+
+class FFmpegTimeout(FFmpegError):
+    """
+    ffmpeg was killed because it ran too long or stopped making progress.
+    """
+
+    def __init__(self, returncode, cmd, reason, stderr=None):
+        super().__init__(returncode, cmd, stderr=stderr)
+        self.reason = reason
+
+    def __str__(self):
+        return f"ffmpeg killed: {self.reason}"
+
+
+class FFmpegCancelled(FFmpegError):
+    """
+    ffmpeg was stopped because its RQ job was cancelled.
+    """
+
+    def __str__(self):
+        return "ffmpeg stopped: job was cancelled"
+
+
+def parse_progress(block: dict) -> dict:
+    """
+    Convert one block of ffmpeg "-progress" key/value output.
+
+    Args:
+        block (dict): Raw key/value pairs up to and including "progress".
+
+    Returns:
+        dict: {"out_time": float seconds, "speed": float | None,
+            "done": bool}
+    """
+    try:
+        out_time = int(block.get("out_time_us", "")) / 1_000_000
+    except ValueError:
+        out_time = 0.0
+
+    try:
+        speed = float(block.get("speed", "").rstrip("x"))
+    except ValueError:
+        speed = None
+
+    return {
+        "out_time": max(out_time, 0.0),
+        "speed": speed,
+        "done": block.get("progress") == "end",
+    }
+
+
+def _supervised(cmd: list) -> list:
+    """
+    Lower the command's priority and make it die together with this process.
+
+    setpriv's --pdeathsig survives the exec into nice/ionice/ffmpeg, so an
+    encoder is killed even when the worker itself is SIGKILLed.
+    """
+    cmd = lower_priority(cmd)
+    if shutil.which("setpriv"):
+        cmd = ["setpriv", "--pdeathsig", "KILL", *cmd]
+    return cmd
+
+
+def _job_deadline(job):
+    """
+    Return the monotonic time at which the RQ job's timeout runs out, or None.
+
+    Workers without a death penalty (core.simpleworker.SimpleWorker) rely on
+    this to still honour the job timeout.
+    """
+    if job is None or not job.timeout or job.timeout < 0 or job.started_at is None:
+        return None
+    started = job.started_at
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+    return time.monotonic() + max(job.timeout - elapsed, 0.0)
+
+
+def _cancel_requested(job) -> bool:
+    """
+    Return True if the RQ job was cancelled or stopped.
+    """
+    try:
+        return job.get_status(refresh=True) in (JobStatus.CANCELED, JobStatus.STOPPED)
+    except Exception as exc:
+        logger.debug("Could not refresh status of job %s: %s", job.id, exc)
+        return False
+
+
+def _kill_group(proc, grace: float = KILL_GRACE) -> None:
+    """
+    Terminate ffmpeg's process group, escalating to SIGKILL after `grace` seconds.
+    """
+    for sig, wait in ((signal.SIGTERM, grace), (signal.SIGKILL, None)):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=wait)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def _remove(paths) -> None:
+    """
+    Delete partial output files and directories.
+    """
+    for path in map(Path, paths):
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def run_ffmpeg(
+    cmd: list,
+    on_progress=None,
+    *,
+    timeout: float = None,
+    stall_timeout: float = None,
+    cleanup=(),
+    job=None,
+) -> list:
+    """
+    Run an ffmpeg command under supervision.
+
+    ffmpeg is started with "-progress pipe:1"; every progress block is
+    parsed and passed to `on_progress` as it arrives. stderr is read at the
+    same time and only its last STDERR_LINES lines are kept. The process
+    group is killed when the wall-clock budget is spent, when out_time has
+    not advanced for `stall_timeout` seconds, when the RQ job is cancelled,
+    or when the calling code is interrupted (e.g. by RQ's job timeout).
+
+    Args:
+        cmd (list[str]): Full ffmpeg command, starting with the executable.
+        on_progress (Callable[[dict], None] | None): Receives the result of
+            parse_progress() for every progress block.
+        timeout (float | None): Wall-clock limit in seconds. Defaults to
+            VIDEO_FFMPEG_TIMEOUT (0 = none); never exceeds what is left of
+            the RQ job's timeout.
+        stall_timeout (float | None): Seconds without progress before the
+            encoder is considered stuck. Defaults to VIDEO_FFMPEG_STALL_TIMEOUT.
+        cleanup (Iterable[str | Path]): Partial output removed if ffmpeg
+            does not finish successfully.
+        job (rq.job.Job | None): Job whose cancellation stops ffmpeg.
+            Defaults to the job running in the current thread.
+
+    Returns:
+        list[str]: The last lines ffmpeg wrote to stderr.
+
+    Raises:
+        FFmpegError: If ffmpeg exits with a non-zero status.
+        FFmpegTimeout: If ffmpeg was killed for running too long or stalling.
+        FFmpegCancelled: If the RQ job was cancelled.
+    """
+    job = job or get_current_job()
+    timeout = FFMPEG_TIMEOUT if timeout is None else timeout
+    stall_timeout = STALL_TIMEOUT if stall_timeout is None else stall_timeout
+
+    started = time.monotonic()
+    deadlines = [d for d in (started + timeout if timeout else None, _job_deadline(job)) if d]
+    deadline = min(deadlines, default=None)
+
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    proc = subprocess.Popen(
+        _supervised(cmd),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    stderr_tail = deque(maxlen=STDERR_LINES)
+    pending = {proc.stdout: b"", proc.stderr: b""}
+    block = {}
+    last_out_time = -1.0
+    last_progress = started
+    next_cancel_poll = started + CANCEL_POLL_INTERVAL
+    failure = None
+
+    def handle_line(stream, line: bytes):
+        nonlocal block, last_out_time, last_progress
+        text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+        if stream is proc.stderr:
+            if text:
+                stderr_tail.append(text)
+            return
+        key, _, value = text.strip().partition("=")
+        block[key] = value
+        if key == "progress":
+            progress = parse_progress(block)
+            block = {}
+            if progress["out_time"] > last_out_time or progress["done"]:
+                last_out_time = progress["out_time"]
+                last_progress = time.monotonic()
+            if on_progress is not None:
+                on_progress(progress)
+
+    try:
+        with selectors.DefaultSelector() as selector:
+            for stream in pending:
+                selector.register(stream, selectors.EVENT_READ)
+
+            while selector.get_map():
+                for key, _ in selector.select(POLL_INTERVAL):
+                    stream = key.fileobj
+                    chunk = os.read(stream.fileno(), 65536)
+                    if not chunk:
+                        selector.unregister(stream)
+                        if pending[stream]:
+                            handle_line(stream, pending[stream])
+                        continue
+                    lines = (pending[stream] + chunk).split(b"\n")
+                    pending[stream] = lines.pop()[-MAX_LINE_BYTES:]
+                    for line in lines:
+                        handle_line(stream, line)
+
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    failure = FFmpegTimeout(
+                        -signal.SIGTERM, cmd, f"exceeded {now - started:.0f}s wall-clock limit",
+                    )
+                elif stall_timeout and now - last_progress >= stall_timeout:
+                    failure = FFmpegTimeout(
+                        -signal.SIGTERM, cmd, f"no progress for {stall_timeout:.0f}s",
+                    )
+                elif job is not None and now >= next_cancel_poll:
+                    next_cancel_poll = now + CANCEL_POLL_INTERVAL
+                    if _cancel_requested(job):
+                        failure = FFmpegCancelled(-signal.SIGTERM, cmd)
+                if failure is not None:
+                    logger.warning("Stopping ffmpeg (pid %s): %s", proc.pid, failure)
+                    _kill_group(proc)
+                    break
+        proc.wait()
+    except BaseException:
+        _kill_group(proc, grace=0)
+        _remove(cleanup)
+        raise
+    finally:
+        proc.stdout.close()
+        proc.stderr.close()
+
+    if failure is None and proc.returncode:
+        failure = FFmpegError(proc.returncode, cmd)
+    if failure is not None:
+        failure.stderr = "\n".join(stderr_tail)
+        _remove(cleanup)
+        raise failure
+    return list(stderr_tail)
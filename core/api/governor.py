@@ -0,0 +1,306 @@
+"""
+CPU governor for ffmpeg encodes running in RQ workers.
+
+All workers share one budget of encoder threads stored in Redis. Before an
+encode starts it leases a share of that budget and passes the granted count
+to ffmpeg ("-threads"); if too little is free it waits, but never past
+VIDEO_ENCODER_MAX_WAIT, the RQ job's timeout or its cancellation. Chunked
+transcodes take one lease per job and split it between their chunks. Leases
+expire unless renewed, so a crashed worker cannot hold threads forever.
+Encoders run with a lower CPU and I/O priority so web requests on the same
+host stay responsive. Lease counters are kept for the saturation metrics
+endpoint.
+"""
+
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import WatchError
+from rq import get_current_job
+
+logger = logging.getLogger(__name__)
+
+LEASES_KEY = "videoflix:governor:leases"
+STATS_KEY = "videoflix:governor:stats"
+
+RESERVED_CORES = int(getattr(settings, "VIDEO_ENCODER_RESERVED_CORES", 1))
+THREAD_BUDGET = int(getattr(settings, "VIDEO_ENCODER_THREAD_BUDGET", 0))
+THREADS_PER_JOB = int(getattr(settings, "VIDEO_ENCODER_THREADS_PER_JOB", 0))
+ENCODER_NICE = int(getattr(settings, "VIDEO_ENCODER_NICE", 10))
+ENCODER_IDLE_IO = bool(getattr(settings, "VIDEO_ENCODER_IDLE_IO", True))
+MAX_WAIT = float(getattr(settings, "VIDEO_ENCODER_MAX_WAIT", 600))
+
+LEASE_TTL = 60
+WAIT_INTERVAL = 1.0
+
+ENCODING_QUEUES = {"preview", "transcode", "default"}
+
+
+class EncoderWaitTimeout(TimeoutError):
+    """
+    No encoder threads became free before the wait limit or job deadline.
+    """
+
+
+def thread_budget() -> int:
+    """
+    Return the total number of encoder threads all workers may use.
+
+    Defaults to the core count minus VIDEO_ENCODER_RESERVED_CORES.
+    """
+    return THREAD_BUDGET or max((os.cpu_count() or 1) - RESERVED_CORES, 1)
+
+
+def threads_per_job() -> int:
+    """
+    Return the thread share one encode asks for.
+
+    Defaults to the budget divided by the number of workers that run
+    encodes (pools listening on a preview/transcode queue).
+    """
+    if THREADS_PER_JOB:
+        return THREADS_PER_JOB
+    pools = getattr(settings, "RQ_WORKER_POOLS", {})
+    encoders = sum(
+        int(pool.get("workers", 1))
+        for pool in pools.values()
+        if ENCODING_QUEUES & set(pool.get("queues", []))
+    )
+    return max(thread_budget() // max(encoders, 1), 1)
+
+
+def lower_priority(cmd: list) -> list:
+    """
+    Prefix a command with nice (and ionice if available).
+
+    Args:
+        cmd (list[str]): Command line to run.
+
+    Returns:
+        list[str]: The command running at lower CPU/I/O priority.
+    """
+    prefix = []
+    if ENCODER_NICE and shutil.which("nice"):
+        prefix += ["nice", "-n", str(ENCODER_NICE)]
+    if ENCODER_IDLE_IO and shutil.which("ionice"):
+        prefix += ["ionice", "-c", "3"]
+    return prefix + list(cmd)
+
+
+def _live_leases(leases: dict, now: float) -> dict:
+    """
+    Decode the lease hash and drop expired entries.
+    """
+    live = {}
+    for lease_id, raw in leases.items():
+        entry = json.loads(raw)
+        if entry["expires"] > now:
+            key = lease_id.decode() if isinstance(lease_id, bytes) else lease_id
+            live[key] = entry
+    return live
+
+
+def try_acquire(conn, lease_id: str, wanted: int, minimum: int, label: str = ""):
+    """
+    Atomically lease up to `wanted` threads if at least `minimum` are free.
+
+    Args:
+        conn: Redis connection.
+        lease_id (str): Unique id of the lease.
+        wanted (int): Threads requested.
+        minimum (int): Smallest acceptable grant.
+        label (str): Description stored with the lease (shown in metrics).
+
+    Returns:
+        int | None: Granted thread count, or None if the budget is exhausted.
+    """
+    with conn.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(LEASES_KEY)
+                now = time.time()
+                raw = pipe.hgetall(LEASES_KEY)
+                live = _live_leases(raw, now)
+                free = thread_budget() - sum(e["threads"] for e in live.values())
+                if free < minimum:
+                    pipe.unwatch()
+                    return None
+
+                granted = min(wanted, free)
+                entry = {
+                    "threads": granted,
+                    "expires": now + LEASE_TTL,
+                    "label": label,
+                    "host": socket.gethostname(),
+                }
+                pipe.multi()
+                expired = [k for k in raw if (k.decode() if isinstance(k, bytes) else k) not in live]
+                if expired:
+                    pipe.hdel(LEASES_KEY, *expired)
+                pipe.hset(LEASES_KEY, lease_id, json.dumps(entry))
+                pipe.execute()
+                return granted
+            except WatchError:
+                continue
+
+
+def _renew(conn, lease_id: str, stop: threading.Event) -> None:
+    """
+    Extend a lease until `stop` is set.
+    """
+    while not stop.wait(LEASE_TTL / 3):
+        try:
+            raw = conn.hget(LEASES_KEY, lease_id)
+            if raw is None:
+                return
+            entry = json.loads(raw)
+            entry["expires"] = time.time() + LEASE_TTL
+            conn.hset(LEASES_KEY, lease_id, json.dumps(entry))
+        except Exception as exc:
+            logger.debug("Could not renew encoder lease %s: %s", lease_id, exc)
+
+
+def _wait_for_grant(conn, lease_id: str, wanted: int, minimum: int, label: str, job) -> int:
+    """
+    Retry try_acquire() until it succeeds, the job is cancelled or time is up.
+
+    Args:
+        conn: Redis connection.
+        lease_id (str): Unique id of the lease.
+        wanted (int): Threads requested.
+        minimum (int): Smallest acceptable grant.
+        label (str): Description stored with the lease.
+        job (rq.job.Job | None): Job whose cancellation and timeout end the wait.
+
+    Returns:
+        int: Granted thread count.
+
+    Raises:
+        FFmpegCancelled: If the job was cancelled while waiting.
+        EncoderWaitTimeout: If MAX_WAIT passed or the job's timeout ran out.
+    """
+    # Imported here: ffmpeg imports lower_priority() from this module.
+    from .ffmpeg import FFmpegCancelled, _cancel_requested, _job_deadline
+
+    started = time.monotonic()
+    deadlines = [d for d in (started + MAX_WAIT if MAX_WAIT else None, _job_deadline(job)) if d]
+    deadline = min(deadlines, default=None)
+
+    granted = try_acquire(conn, lease_id, wanted, minimum, label)
+    while granted is None:
+        if job is not None and _cancel_requested(job):
+            raise FFmpegCancelled(-1, label)
+        if deadline is not None and time.monotonic() + WAIT_INTERVAL > deadline:
+            raise EncoderWaitTimeout(
+                f"no {minimum} encoder threads free after {time.monotonic() - started:.0f}s ({label})"
+            )
+        time.sleep(WAIT_INTERVAL)
+        granted = try_acquire(conn, lease_id, wanted, minimum, label)
+    return granted
+
+
+@contextmanager
+def encoder_threads(label: str = "", wanted: int = None, job=None):
+    """
+    Lease encoder threads for the duration of an encode.
+
+    Blocks until at least half of the requested share is free, for at most
+    VIDEO_ENCODER_MAX_WAIT seconds and never beyond the job's timeout. If
+    Redis is unreachable the encode is not blocked; it runs with the
+    requested share.
+
+    Args:
+        label (str): Description of the encode, shown in the metrics.
+        wanted (int | None): Threads to ask for. Defaults to threads_per_job().
+        job (rq.job.Job | None): Job whose cancellation ends the wait.
+            Defaults to the worker's current job.
+
+    Yields:
+        int: Number of threads the encode may use.
+
+    Raises:
+        FFmpegCancelled: If the job was cancelled while waiting.
+        EncoderWaitTimeout: If no threads became free in time.
+    """
+    from .ffmpeg import FFmpegCancelled
+
+    wanted = min(wanted or threads_per_job(), thread_budget())
+    minimum = max(wanted // 2, 1)
+    lease_id = uuid.uuid4().hex
+    job = job or get_current_job()
+
+    try:
+        conn = get_redis_connection("default")
+        started = time.monotonic()
+        granted = _wait_for_grant(conn, lease_id, wanted, minimum, label, job)
+        waited = time.monotonic() - started
+
+        pipe = conn.pipeline()
+        pipe.hincrby(STATS_KEY, "leases", 1)
+        pipe.hincrby(STATS_KEY, "threads_granted", granted)
+        if waited >= WAIT_INTERVAL:
+            pipe.hincrby(STATS_KEY, "waits", 1)
+        pipe.hincrbyfloat(STATS_KEY, "wait_seconds", waited)
+        pipe.execute()
+    except (EncoderWaitTimeout, FFmpegCancelled):
+        raise
+    except Exception as exc:
+        logger.warning("Encoder governor unavailable, not limiting threads: %s", exc)
+        yield wanted
+        return
+
+    stop = threading.Event()
+    renewer = threading.Thread(target=_renew, args=(conn, lease_id, stop), daemon=True)
+    renewer.start()
+    try:
+        yield granted
+    finally:
+        stop.set()
+        try:
+            conn.hdel(LEASES_KEY, lease_id)
+        except Exception as exc:
+            logger.debug("Could not release encoder lease %s: %s", lease_id, exc)
+
+
+def governor_metrics() -> dict:
+    """
+    Return the current saturation of the encoder thread budget.
+
+    Returns:
+        dict: budget, threads in use, utilization, active leases, lease and
+            wait counters, core count and load average.
+    """
+    conn = get_redis_connection("default")
+    live = _live_leases(conn.hgetall(LEASES_KEY), time.time())
+    stats = {
+        (k.decode() if isinstance(k, bytes) else k): float(v)
+        for k, v in conn.hgetall(STATS_KEY).items()
+    }
+    budget = thread_budget()
+    in_use = sum(entry["threads"] for entry in live.values())
+
+    return {
+        "cpu_count": os.cpu_count(),
+        "load_average": list(os.getloadavg()),
+        "thread_budget": budget,
+        "threads_per_job": threads_per_job(),
+        "threads_in_use": in_use,
+        "utilization": round(in_use / budget, 3),
+        "active_leases": [
+            {"threads": e["threads"], "label": e["label"], "host": e["host"]}
+            for e in live.values()
+        ],
+        "leases_total": int(stats.get("leases", 0)),
+        "threads_granted_total": int(stats.get("threads_granted", 0)),
+        "waits_total": int(stats.get("waits", 0)),
+        "wait_seconds_total": round(stats.get("wait_seconds", 0.0), 1),
+    }
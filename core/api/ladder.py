@@ -0,0 +1,165 @@
+"""
+Per-title encoding ladder based on a content complexity analysis.
+
+Short clips sampled across the source are trial-encoded at several CRF
+values per rendition and compared with the source using SSIM. Each
+rendition gets the highest CRF (smallest output) whose worst sampled clip
+still reaches the target quality, plus a VBV bitrate cap. Static content
+therefore ends up with fewer bits, while complex content gets a lower CRF
+instead of a visible quality drop.
+"""
+
+import math
+import re
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .ffmpeg import run_ffmpeg
+from .governor import encoder_threads
+
+TARGET_SSIM = float(getattr(settings, "VIDEO_PER_TITLE_TARGET_SSIM", 0.98))
+SAMPLE_COUNT = int(getattr(settings, "VIDEO_PER_TITLE_SAMPLES", 3))
+SAMPLE_SECONDS = float(getattr(settings, "VIDEO_PER_TITLE_SAMPLE_SECONDS", 4))
+
+CRF_CANDIDATES = (18, 20, 22, 24, 26, 28, 30)
+
+MAX_BITRATES = {
+    "120p": 200_000,
+    "360p": 800_000,
+    "480p": 1_400_000,
+    "720p": 2_800_000,
+    "1080p": 5_000_000,
+}
+
+_SSIM_RE = re.compile(r"SSIM .*All:([\d.]+)")
+
+
+def sample_offsets(duration: float, count: int = SAMPLE_COUNT, length: float = SAMPLE_SECONDS) -> list:
+    """
+    Pick evenly spread start times for the analysis clips.
+
+    Args:
+        duration (float): Source duration in seconds.
+        count (int): Number of clips.
+        length (float): Clip length in seconds.
+
+    Returns:
+        list[float]: Clip start times; a single clip at 0 for short sources.
+    """
+    usable = duration - length
+    if usable <= 0 or count < 2:
+        return [0.0]
+    return [round(usable * (i + 1) / (count + 1), 3) for i in range(count)]
+
+
+def _trial(input_path: str, start: float, length: float, height: int, crf: int, workdir: Path) -> dict:
+    """
+    Encode one sample clip and measure its bitrate and SSIM against the source.
+
+    Args:
+        input_path (str): Source video file.
+        start (float): Clip start in seconds.
+        length (float): Clip length in seconds.
+        height (int): Output height.
+        crf (int): x264 CRF for the trial.
+        workdir (Path): Directory for the temporary trial file.
+
+    Returns:
+        dict: {"bitrate": bits per second, "ssim": float}
+
+    Raises:
+        CalledProcessError: If ffmpeg fails.
+    """
+    output = workdir / f"trial_{height}_{crf}_{int(start * 1000)}.mp4"
+    seek = ["-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", input_path]
+
+    with encoder_threads(f"ladder trial {height}p crf {crf}") as threads:
+        run_ffmpeg(
+            ["ffmpeg", "-y", "-v", "error", *seek, "-an",
+             "-vf", f"scale=-2:{height}",
+             "-c:v", "libx264", "-preset", "veryfast", "-crf", str(crf),
+             "-threads", str(threads),
+             str(output)],
+            cleanup=[output],
+        )
+        log = run_ffmpeg(
+            ["ffmpeg", "-v", "info", "-threads", str(threads),
+             "-i", str(output), *seek,
+             "-lavfi", f"[1:v]scale=-2:{height}[ref];[0:v][ref]ssim",
+             "-f", "null", "-"]
+        )
+    match = _SSIM_RE.search("\n".join(log))
+
+    return {
+        "bitrate": output.stat().st_size * 8 / length,
+        "ssim": float(match.group(1)) if match else 0.0,
+    }
+
+
+def analyze_rendition(input_path: str, resolution: str, height: int, offsets: list, workdir: Path) -> dict:
+    """
+    Choose CRF and bitrate cap for one rendition of a title.
+
+    The CRF candidates are binary-searched for the highest value whose
+    worst sampled clip still reaches VIDEO_PER_TITLE_TARGET_SSIM.
+
+    Args:
+        input_path (str): Source video file.
+        resolution (str): Resolution label, used for the bitrate cap.
+        height (int): Output height in pixels.
+        offsets (list[float]): Clip start times from sample_offsets().
+        workdir (Path): Directory for temporary trial files.
+
+    Returns:
+        dict: {"crf", "maxrate", "bufsize", "ssim", "trial_bitrate"}
+    """
+    def measure(crf):
+        trials = [_trial(input_path, start, SAMPLE_SECONDS, height, crf, workdir) for start in offsets]
+        return {
+            "crf": crf,
+            "ssim": min(t["ssim"] for t in trials),
+            "trial_bitrate": sum(t["bitrate"] for t in trials) / len(trials),
+        }
+
+    low, high = 0, len(CRF_CANDIDATES) - 1
+    best = None
+    while low <= high:
+        mid = (low + high) // 2
+        trial = measure(CRF_CANDIDATES[mid])
+        if trial["ssim"] >= TARGET_SSIM:
+            best, low = trial, mid + 1
+        else:
+            high = mid - 1
+    if best is None:
+        best = measure(CRF_CANDIDATES[0])
+
+    maxrate = MAX_BITRATES.get(resolution, math.ceil(best["trial_bitrate"] * 2))
+    return {
+        "crf": best["crf"],
+        "maxrate": maxrate,
+        "bufsize": maxrate * 2,
+        "ssim": round(best["ssim"], 4),
+        "trial_bitrate": round(best["trial_bitrate"]),
+    }
+
+
+def analyze_title(input_path: str, renditions: dict, duration: float) -> dict:
+    """
+    Build the per-title ladder for the given renditions.
+
+    Args:
+        input_path (str): Source video file.
+        renditions (dict[str, int]): Resolution label -> output height.
+        duration (float): Source duration in seconds.
+
+    Returns:
+        dict[str, dict]: Resolution label -> result of analyze_rendition().
+    """
+    offsets = sample_offsets(duration)
+    with tempfile.TemporaryDirectory(prefix="videoflix-ladder-") as tmp:
+        return {
+            res: analyze_rendition(input_path, res, height, offsets, Path(tmp))
+            for res, height in renditions.items()
+        }
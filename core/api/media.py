@@ -0,0 +1,265 @@
+"""
+Helpers for inspecting media files with ffprobe.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+
+from django.core.cache import cache
+
+
+H264_PROFILES = {
+    "baseline": "4200",
+    "constrained baseline": "42e0",
+    "main": "4d40",
+    "extended": "5800",
+    "high": "6400",
+    "high 10": "6e00",
+    "high 4:2:2": "7a00",
+    "high 4:4:4 predictive": "f400",
+}
+
+AAC_PROFILES = {
+    "lc": "mp4a.40.2",
+    "he-aac": "mp4a.40.5",
+    "he-aacv2": "mp4a.40.29",
+}
+
+PROBE_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def ffprobe(path) -> dict:
+    """
+    Run ffprobe on a media file and return its format and stream information.
+
+    Args:
+        path (str | Path): File to inspect.
+
+    Returns:
+        dict: Parsed ffprobe JSON with "format" and "streams" keys.
+
+    Raises:
+        CalledProcessError: If ffprobe fails.
+        ValueError: If ffprobe returns invalid JSON.
+    """
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        str(path),
+    ]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout or "{}")
+
+
+def first_stream(probe: dict, codec_type: str):
+    """
+    Return the first stream of the given type from an ffprobe result.
+
+    Args:
+        probe (dict): Result of ffprobe().
+        codec_type (str): "video" or "audio".
+
+    Returns:
+        dict | None: The stream description, or None if there is none.
+    """
+    for stream in probe.get("streams", []):
+        if stream.get("codec_type") == codec_type:
+            return stream
+    return None
+
+
+def codec_tag(stream) -> str:
+    """
+    Build the RFC 6381 codec identifier used in HLS CODECS attributes.
+
+    Args:
+        stream (dict): ffprobe stream description.
+
+    Returns:
+        str: Identifier such as "avc1.64001f" or "mp4a.40.2", or an empty
+            string if the codec is not recognised.
+    """
+    if not stream:
+        return ""
+
+    codec = stream.get("codec_name")
+    profile = str(stream.get("profile", "")).strip().lower()
+
+    if codec == "h264":
+        profile_hex = H264_PROFILES.get(profile, H264_PROFILES["high"])
+        level = int(stream.get("level") or 0)
+        return f"avc1.{profile_hex}{level:02x}"
+
+    if codec == "aac":
+        return AAC_PROFILES.get(profile, AAC_PROFILES["lc"])
+
+    return ""
+
+
+def keyframe_times(path) -> list:
+    """
+    List the presentation timestamps of all video keyframes.
+
+    Only packets are read (no decoding), so this is fast even for long files.
+
+    Args:
+        path (str | Path): File to inspect.
+
+    Returns:
+        list[float]: Keyframe timestamps in seconds, ascending.
+
+    Raises:
+        CalledProcessError: If ffprobe fails.
+    """
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        str(path),
+    ]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+
+    times = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            times.append(float(pts))
+    return sorted(times)
+
+
+def _to_int(value):
+    """
+    Convert an ffprobe numeric string to int, returning None if absent.
+    """
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _frame_rate(value):
+    """
+    Convert an ffprobe rate such as "30000/1001" to frames per second.
+    """
+    num, _, den = str(value or "").partition("/")
+    try:
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) if rate else None
+
+
+def _rotation(stream: dict) -> int:
+    """
+    Return the display rotation of a video stream in degrees.
+    """
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            return _to_int(side_data["rotation"]) or 0
+    return _to_int(stream.get("tags", {}).get("rotate")) or 0
+
+
+def summarize_probe(probe: dict) -> dict:
+    """
+    Reduce an ffprobe result to the source properties stored on a video.
+
+    Width and height are the displayed dimensions, so a portrait phone
+    recording stored with a 90 degree rotation reports its real height.
+
+    Args:
+        probe (dict): Result of ffprobe().
+
+    Returns:
+        dict: duration, width, height, frame_rate, bit_rate, video_bit_rate,
+            audio_bit_rate, video_codec and audio_codec (None/"" if unknown).
+    """
+    fmt = probe.get("format", {})
+    video = first_stream(probe, "video") or {}
+    audio = first_stream(probe, "audio") or {}
+
+    width, height = _to_int(video.get("width")), _to_int(video.get("height"))
+    if abs(_rotation(video)) % 180 == 90:
+        width, height = height, width
+
+    duration = fmt.get("duration") or video.get("duration")
+    return {
+        "duration": float(duration) if duration else None,
+        "width": width,
+        "height": height,
+        "frame_rate": _frame_rate(video.get("avg_frame_rate") or video.get("r_frame_rate")),
+        "bit_rate": _to_int(fmt.get("bit_rate")),
+        "video_bit_rate": _to_int(video.get("bit_rate")),
+        "audio_bit_rate": _to_int(audio.get("bit_rate")),
+        "video_codec": video.get("codec_name", ""),
+        "audio_codec": audio.get("codec_name", ""),
+    }
+
+
+def file_identity(path) -> str:
+    """
+    Return a key identifying one version of a file on disk.
+
+    The key combines the resolved path, device, inode, size and
+    modification time, so it changes whenever the file is replaced or
+    rewritten.
+
+    Args:
+        path (str | Path): File to identify.
+
+    Returns:
+        str: Hex digest of the file identity.
+    """
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    raw = f"{real}:{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def file_digest(path) -> str:
+    """
+    Compute the SHA-256 content digest of a file without loading it into memory.
+
+    Args:
+        path (str | Path): File to hash.
+
+    Returns:
+        str: Hex digest.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(DIGEST_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_source(path) -> dict:
+    """
+    Probe a source file, reusing a cached result for the same file identity.
+
+    Args:
+        path (str | Path): Source video file.
+
+    Returns:
+        dict: Result of summarize_probe().
+
+    Raises:
+        CalledProcessError: If ffprobe fails.
+        OSError: If the file does not exist.
+    """
+    key = f"probe:{file_identity(path)}"
+    summary = cache.get(key)
+    if summary is None:
+        summary = summarize_probe(ffprobe(path))
+        cache.set(key, summary, PROBE_CACHE_TIMEOUT)
+    return summary
@@ -0,0 +1,319 @@
+"""
+Reading HLS media playlists and writing the adaptive-bitrate master playlist.
+"""
+
+import fcntl
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .media import codec_tag, ffprobe, first_stream
+
+logger = logging.getLogger(__name__)
+
+MASTER_PLAYLIST = "master.m3u8"
+MEDIA_PLAYLIST = "index.m3u8"
+
+
+@dataclass
+class Segment:
+    """
+    One media segment of an HLS playlist.
+
+    Attributes:
+        uri (str): Segment URI as written in the playlist.
+        duration (float): EXTINF duration in seconds.
+        tags (list[str]): Other tag lines attached to this segment
+            (e.g. EXT-X-DISCONTINUITY, EXT-X-MAP, EXT-X-BYTERANGE).
+    """
+
+    uri: str
+    duration: float
+    tags: list = field(default_factory=list)
+
+
+@dataclass
+class MediaPlaylist:
+    """
+    Parsed HLS media playlist.
+
+    Attributes:
+        header (list[str]): Tag lines before the first segment.
+        segments (list[Segment]): Segments in playlist order.
+        ended (bool): Whether the playlist carries EXT-X-ENDLIST.
+    """
+
+    header: list = field(default_factory=list)
+    segments: list = field(default_factory=list)
+    ended: bool = False
+
+    @property
+    def duration(self) -> float:
+        """
+        Total duration of all segments in seconds.
+        """
+        return sum(segment.duration for segment in self.segments)
+
+
+def parse_media_playlist(path) -> MediaPlaylist:
+    """
+    Parse an HLS media playlist from disk.
+
+    Args:
+        path (str | Path): Playlist file.
+
+    Returns:
+        MediaPlaylist: The parsed playlist.
+    """
+    playlist = MediaPlaylist()
+    pending_tags = []
+    duration = None
+
+    for raw in Path(path).read_text().splitlines():
+        line = raw.strip()
+        if not line or line == "#EXTM3U":
+            continue
+        if line == "#EXT-X-ENDLIST":
+            playlist.ended = True
+        elif line.startswith("#EXTINF:"):
+            duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+        elif line.startswith("#"):
+            if not playlist.segments and duration is None and _is_header_tag(line):
+                playlist.header.append(line)
+            else:
+                pending_tags.append(line)
+        else:
+            playlist.segments.append(Segment(line, duration or 0.0, pending_tags))
+            pending_tags = []
+            duration = None
+
+    return playlist
+
+
+def _is_header_tag(line: str) -> bool:
+    """
+    Return True for playlist-level tags that precede the first segment.
+    """
+    return line.split(":", 1)[0] in {
+        "#EXT-X-VERSION",
+        "#EXT-X-TARGETDURATION",
+        "#EXT-X-MEDIA-SEQUENCE",
+        "#EXT-X-PLAYLIST-TYPE",
+        "#EXT-X-INDEPENDENT-SEGMENTS",
+        "#EXT-X-ALLOW-CACHE",
+    }
+
+
+def write_media_playlist(output_path: Path, segments: list, version: int = 3) -> Path:
+    """
+    Write a finished VOD media playlist atomically.
+
+    Args:
+        output_path (Path): Destination playlist.
+        segments (list[Segment]): Segments in playback order.
+        version (int): EXT-X-VERSION of the playlist.
+
+    Returns:
+        Path: The written playlist path.
+    """
+    target = math.ceil(max([s.duration for s in segments] or [0]))
+    lines = [
+        "#EXTM3U",
+        f"#EXT-X-VERSION:{version}",
+        f"#EXT-X-TARGETDURATION:{target}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    for segment in segments:
+        lines += segment.tags
+        lines += [f"#EXTINF:{segment.duration:.6f},", segment.uri]
+    lines.append("#EXT-X-ENDLIST")
+
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    tmp_path.write_text("\n".join(lines) + "\n")
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def playlist_version(playlist: MediaPlaylist) -> int:
+    """
+    Return the EXT-X-VERSION of a parsed playlist (3 if absent).
+    """
+    for tag in playlist.header:
+        if tag.startswith("#EXT-X-VERSION:"):
+            return int(tag.split(":", 1)[1])
+    return 3
+
+
+def stitch_playlists(part_paths, output_path: Path) -> Path:
+    """
+    Concatenate several VOD media playlists into one.
+
+    Segments keep their URIs and per-segment tags; every part after the
+    first starts with EXT-X-DISCONTINUITY because it was produced by a
+    separate encoder run. The result is written atomically and the part
+    playlists are removed.
+
+    Args:
+        part_paths (list[Path]): Part playlists in playback order.
+        output_path (Path): Destination playlist (e.g. .../index.m3u8).
+
+    Returns:
+        Path: The written playlist path.
+
+    Raises:
+        ValueError: If a part is unfinished (no EXT-X-ENDLIST).
+    """
+    parts = [parse_media_playlist(path) for path in part_paths]
+    unfinished = [str(path) for path, part in zip(part_paths, parts) if not part.ended]
+    if unfinished:
+        raise ValueError(f"Cannot stitch unfinished playlists: {unfinished}")
+
+    version = max([playlist_version(part) for part in parts] or [3])
+    segments = []
+    for index, part in enumerate(parts):
+        for position, segment in enumerate(part.segments):
+            tags = list(segment.tags)
+            if index and not position and "#EXT-X-DISCONTINUITY" not in tags:
+                tags.insert(0, "#EXT-X-DISCONTINUITY")
+            segments.append(Segment(segment.uri, segment.duration, tags))
+
+    write_media_playlist(output_path, segments, version)
+
+    for path in part_paths:
+        Path(path).unlink(missing_ok=True)
+    return output_path
+
+
+def segment_size(rendition_dir: Path, segment: Segment) -> int:
+    """
+    Return the number of bytes a segment occupies.
+
+    Args:
+        rendition_dir (Path): Directory containing the segment file.
+        segment (Segment): Segment entry from the playlist.
+
+    Returns:
+        int: Byte length from EXT-X-BYTERANGE, or the file size.
+    """
+    for tag in segment.tags:
+        if tag.startswith("#EXT-X-BYTERANGE:"):
+            return int(tag.split(":", 1)[1].split("@", 1)[0])
+    return (rendition_dir / segment.uri).stat().st_size
+
+
+def measure_rendition(rendition_dir: Path):
+    """
+    Measure the stream attributes of a finished rendition.
+
+    Bandwidth values are computed from the real segment sizes, resolution
+    and codecs from ffprobe on the first segment.
+
+    Args:
+        rendition_dir (Path): Directory holding index.m3u8 and its segments.
+
+    Returns:
+        dict | None: {"bandwidth", "average_bandwidth", "width", "height",
+            "codecs"}, or None if the rendition is missing or unfinished.
+    """
+    playlist_path = rendition_dir / MEDIA_PLAYLIST
+    if not playlist_path.is_file():
+        return None
+
+    playlist = parse_media_playlist(playlist_path)
+    if not playlist.ended or not playlist.segments:
+        return None
+
+    peak = 0.0
+    total_bytes = 0
+    for segment in playlist.segments:
+        size = segment_size(rendition_dir, segment)
+        total_bytes += size
+        if segment.duration > 0:
+            peak = max(peak, size * 8 / segment.duration)
+
+    probe = ffprobe(rendition_dir / playlist.segments[0].uri)
+    video = first_stream(probe, "video") or {}
+    codecs = [codec_tag(video), codec_tag(first_stream(probe, "audio"))]
+
+    return {
+        "bandwidth": math.ceil(peak),
+        "average_bandwidth": math.ceil(total_bytes * 8 / max(playlist.duration, 1e-6)),
+        "width": int(video.get("width") or 0),
+        "height": int(video.get("height") or 0),
+        "codecs": ",".join(c for c in codecs if c),
+    }
+
+
+def render_master_playlist(variants) -> str:
+    """
+    Render the text of an HLS master playlist.
+
+    Args:
+        variants (list[tuple[str, dict]]): (playlist URI, measure_rendition()
+            result) pairs in the order they should be listed.
+
+    Returns:
+        str: Master playlist content.
+    """
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for uri, info in variants:
+        attrs = [
+            f"BANDWIDTH={info['bandwidth']}",
+            f"AVERAGE-BANDWIDTH={info['average_bandwidth']}",
+        ]
+        if info["width"] and info["height"]:
+            attrs.append(f"RESOLUTION={info['width']}x{info['height']}")
+        if info["codecs"]:
+            attrs.append(f'CODECS="{info["codecs"]}"')
+        lines.append("#EXT-X-STREAM-INF:" + ",".join(attrs))
+        lines.append(uri)
+    return "\n".join(lines) + "\n"
+
+
+def write_master_playlist(movie_dir: Path):
+    """
+    (Re)write master.m3u8 for a movie from all of its finished renditions.
+
+    Renditions are listed from lowest to highest resolution so players
+    start on the cheapest variant. The file is replaced atomically and
+    the rewrite is serialised with a lock file, so concurrent
+    per-resolution jobs cannot drop each other's variants.
+
+    Args:
+        movie_dir (Path): <HLS_ROOT>/<movie_id>/ directory.
+
+    Returns:
+        Path | None: Path to master.m3u8, or None if no rendition is finished.
+    """
+    if not movie_dir.is_dir():
+        return None
+
+    with open(movie_dir / ".master.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        variants = []
+        for child in sorted(movie_dir.iterdir()):
+            if not child.is_dir():
+                continue
+            try:
+                info = measure_rendition(child)
+            except Exception as exc:
+                logger.warning("Skipping rendition %s in master playlist: %s", child, exc)
+                continue
+            if info:
+                variants.append((f"{child.name}/{MEDIA_PLAYLIST}", info))
+
+        if not variants:
+            return None
+
+        variants.sort(key=lambda item: (item[1]["height"], item[1]["bandwidth"]))
+
+        master_path = movie_dir / MASTER_PLAYLIST
+        tmp_path = movie_dir / f".{MASTER_PLAYLIST}.tmp"
+        tmp_path.write_text(render_master_playlist(variants))
+        os.replace(tmp_path, master_path)
+
+    return master_path
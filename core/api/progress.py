@@ -0,0 +1,193 @@
+"""
+Live transcode progress stored in Redis.
+
+Each movie has one hash (videoflix:progress:<movie_id>) with a JSON entry
+per rendition; movies with running jobs are members of a set so all
+active jobs can be listed without scanning keys.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = float(getattr(settings, "VIDEO_PROGRESS_INTERVAL", 2))
+PROGRESS_TTL = 60 * 60
+ACTIVE_KEY = "videoflix:progress:active"
+
+
+def _movie_key(movie_id) -> str:
+    """
+    Return the Redis hash key that holds the progress of one movie.
+    """
+    return f"videoflix:progress:{movie_id}"
+
+
+def get_progress(movie_id) -> dict:
+    """
+    Return the stored progress of all renditions of a movie.
+
+    Args:
+        movie_id (int): Identifier of the video.
+
+    Returns:
+        dict[str, dict]: Rendition label -> progress entry.
+    """
+    raw = get_redis_connection("default").hgetall(_movie_key(movie_id))
+    return {
+        key.decode() if isinstance(key, bytes) else key: json.loads(value)
+        for key, value in raw.items()
+    }
+
+
+def get_active_progress() -> dict:
+    """
+    Return the progress of every movie with a running transcode job.
+
+    Returns:
+        dict[int, dict]: Movie id -> result of get_progress().
+    """
+    conn = get_redis_connection("default")
+    result = {}
+    for member in sorted(conn.smembers(ACTIVE_KEY), key=int):
+        movie_id = int(member)
+        progress = get_progress(movie_id)
+        if progress:
+            result[movie_id] = progress
+        else:
+            conn.srem(ACTIVE_KEY, member)
+    return result
+
+
+class ProgressReporter:
+    """
+    Collects ffmpeg progress for one transcode job and publishes percent
+    done, encode speed (realtime factor) and ETA per rendition to Redis.
+
+    Writes are throttled to one every VIDEO_PROGRESS_INTERVAL seconds.
+    A job encoding several parts in parallel (chunked mode) reports each
+    part through its own callback; the reporter sums their output time
+    and speed. Use it as a context manager so the final state ("done" or
+    "failed") is always written. Redis errors are logged and never fail
+    the transcode.
+    """
+
+    def __init__(self, movie_id: int, renditions: list, duration: float):
+        """
+        Initialize an empty reporter for one job.
+
+        Args:
+            movie_id (int): Identifier of the video being transcoded.
+            renditions (list[str]): Rendition labels this job produces.
+            duration (float): Media duration in seconds (0 if unknown).
+        """
+        self.movie_id = movie_id
+        self.renditions = list(renditions)
+        self.duration = duration
+        self.started_at = time.time()
+        self._parts = {}
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        """
+        Publish the initial "running" entry.
+        """
+        self._publish("running", force=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """
+        Publish the final state; exceptions are never suppressed.
+        """
+        self._publish("failed" if exc_type else "done", force=True)
+        return False
+
+    def callback(self, part: int = 0):
+        """
+        Return an on_progress callback for run_ffmpeg().
+
+        Args:
+            part (int): Identifier of the ffmpeg process within this job.
+
+        Returns:
+            Callable[[dict], None]: Callback recording that part's progress.
+        """
+        def on_progress(progress: dict) -> None:
+            with self._lock:
+                self._parts[part] = progress
+            self._publish("running")
+
+        return on_progress
+
+    def snapshot(self, state: str) -> dict:
+        """
+        Compute the current progress entry.
+
+        Args:
+            state (str): "running", "done" or "failed".
+
+        Returns:
+            dict: percent, speed, eta_seconds, out_time, duration, state
+                and timestamps.
+        """
+        with self._lock:
+            parts = list(self._parts.values())
+
+        out_time = sum(p["out_time"] for p in parts)
+        speed = sum(p["speed"] or 0.0 for p in parts if not p["done"]) or None
+        percent = eta = None
+        if self.duration:
+            percent = 100.0 if state == "done" else min(out_time / self.duration * 100, 99.9)
+            if speed and state == "running":
+                eta = max(self.duration - out_time, 0.0) / speed
+
+        return {
+            "state": state,
+            "percent": None if percent is None else round(percent, 1),
+            "speed": None if speed is None else round(speed, 2),
+            "eta_seconds": None if eta is None else round(eta),
+            "out_time": round(out_time, 2),
+            "duration": round(self.duration, 2),
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+        }
+
+    def _publish(self, state: str, force: bool = False) -> None:
+        """
+        Write the current snapshot for every rendition, throttled unless forced.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_write < PROGRESS_INTERVAL:
+                return
+            self._last_write = now
+
+        entry = json.dumps(self.snapshot(state))
+        key = _movie_key(self.movie_id)
+        try:
+            pipe = get_redis_connection("default").pipeline()
+            pipe.hset(key, mapping={res: entry for res in self.renditions})
+            pipe.expire(key, PROGRESS_TTL)
+            if state == "running":
+                pipe.sadd(ACTIVE_KEY, self.movie_id)
+            elif not self._other_renditions_running():
+                pipe.srem(ACTIVE_KEY, self.movie_id)
+            pipe.execute()
+        except Exception as exc:
+            logger.debug("Could not publish progress for movie %s: %s", self.movie_id, exc)
+
+    def _other_renditions_running(self) -> bool:
+        """
+        Return True if another job of the same movie is still running.
+        """
+        return any(
+            entry.get("state") == "running"
+            for res, entry in get_progress(self.movie_id).items()
+            if res not in self.renditions
+        )
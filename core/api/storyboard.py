@@ -0,0 +1,168 @@
+"""
+Trickplay storyboards: sprite sheets of thumbnails plus a WebVTT index.
+
+The sprites are normally produced by an extra branch of the transcode's
+filter graph, so the source is not decoded again. The WebVTT file maps
+every thumbnail interval to its sheet and tile ("sprite_000.jpg#xywh=...")
+and is what players load for scrub previews. Everything lives in
+<HLS_ROOT>/<movie_id>/storyboard/.
+"""
+
+import math
+import os
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image
+
+from .ffmpeg import run_ffmpeg
+
+STORYBOARD_DIR = "storyboard"
+STORYBOARD_VTT = "storyboard.vtt"
+
+INTERVAL = float(getattr(settings, "VIDEO_STORYBOARD_INTERVAL", 5))
+THUMB_WIDTH = int(getattr(settings, "VIDEO_STORYBOARD_WIDTH", 160))
+COLUMNS = int(getattr(settings, "VIDEO_STORYBOARD_COLUMNS", 5))
+ROWS = int(getattr(settings, "VIDEO_STORYBOARD_ROWS", 5))
+IMAGE_FORMAT = str(getattr(settings, "VIDEO_STORYBOARD_FORMAT", "jpg")).strip().lower()
+
+_ENCODERS = {
+    "jpg": ["-c:v", "mjpeg", "-q:v", "5"],
+    "webp": ["-c:v", "libwebp", "-quality", "60"],
+}
+
+
+def storyboard_dir(movie_dir: Path) -> Path:
+    """
+    Return (and create) the storyboard directory of a movie.
+    """
+    path = movie_dir / STORYBOARD_DIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def storyboard_filter(source: str, label: str) -> str:
+    """
+    Build the filter chain that turns decoded frames into sprite sheets.
+
+    Args:
+        source (str): Input pad label, e.g. "[sb]".
+        label (str): Output pad label, e.g. "[sprites]".
+
+    Returns:
+        str: fps/scale/tile filter chain.
+    """
+    return (
+        f"{source}fps=1/{INTERVAL:g},scale={THUMB_WIDTH}:-2,"
+        f"tile={COLUMNS}x{ROWS}{label}"
+    )
+
+
+def storyboard_output_args(movie_dir: Path, label: str) -> list:
+    """
+    Build the ffmpeg output options that write the sprite sheets.
+
+    Sheets left over from an earlier run are removed first.
+
+    Args:
+        movie_dir (Path): <HLS_ROOT>/<movie_id>/ directory.
+        label (str): Filter graph pad carrying the tiled frames.
+
+    Returns:
+        list[str]: Mapping, encoder and image2 muxer arguments.
+    """
+    output_dir = storyboard_dir(movie_dir)
+    for old in output_dir.glob("sprite_*"):
+        old.unlink()
+    return [
+        "-map", label,
+        *_ENCODERS.get(IMAGE_FORMAT, _ENCODERS["jpg"]),
+        "-start_number", "0",
+        "-f", "image2",
+        str(output_dir / f"sprite_%03d.{IMAGE_FORMAT}"),
+    ]
+
+
+def _timestamp(seconds: float) -> str:
+    """
+    Format seconds as a WebVTT timestamp (HH:MM:SS.mmm).
+    """
+    millis = int(round(seconds * 1000))
+    hours, rest = divmod(millis, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    secs, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def write_storyboard_vtt(movie_dir: Path, duration: float):
+    """
+    Write storyboard.vtt for the sprite sheets of a movie.
+
+    Tile size is read from the first sheet, so it follows the source's
+    aspect ratio.
+
+    Args:
+        movie_dir (Path): <HLS_ROOT>/<movie_id>/ directory.
+        duration (float): Media duration in seconds.
+
+    Returns:
+        Path | None: The written file, or None if there are no sheets.
+    """
+    output_dir = movie_dir / STORYBOARD_DIR
+    sheets = sorted(output_dir.glob(f"sprite_*.{IMAGE_FORMAT}"))
+    if not sheets or duration <= 0:
+        return None
+
+    with Image.open(sheets[0]) as image:
+        tile_width, tile_height = image.width // COLUMNS, image.height // ROWS
+
+    per_sheet = COLUMNS * ROWS
+    count = min(math.ceil(duration / INTERVAL), len(sheets) * per_sheet)
+    lines = ["WEBVTT", ""]
+    for index in range(count):
+        sheet, tile = divmod(index, per_sheet)
+        row, column = divmod(tile, COLUMNS)
+        start = index * INTERVAL
+        end = min(start + INTERVAL, duration)
+        lines += [
+            f"{_timestamp(start)} --> {_timestamp(end)}",
+            f"{sheets[sheet].name}#xywh={column * tile_width},{row * tile_height},"
+            f"{tile_width},{tile_height}",
+            "",
+        ]
+
+    path = output_dir / STORYBOARD_VTT
+    tmp_path = output_dir / f".{STORYBOARD_VTT}.tmp"
+    tmp_path.write_text("\n".join(lines))
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_storyboard(input_path: str, movie_dir: Path, duration: float):
+    """
+    Render the storyboard in a separate, keyframe-only decode.
+
+    Used when the sprites could not be produced inside the transcode, e.g.
+    when a job resumed in the middle of the source.
+
+    Args:
+        input_path (str): Path to the source video file.
+        movie_dir (Path): <HLS_ROOT>/<movie_id>/ directory.
+        duration (float): Media duration in seconds.
+
+    Returns:
+        Path | None: The written storyboard.vtt, or None.
+
+    Raises:
+        CalledProcessError: If ffmpeg fails.
+    """
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-skip_frame", "nokey",
+        "-i", input_path,
+        "-filter_complex", storyboard_filter("[0:v]", "[sprites]"),
+        *storyboard_output_args(movie_dir, "[sprites]"),
+    ]
+    run_ffmpeg(cmd, cleanup=[movie_dir / STORYBOARD_DIR])
+    return write_storyboard_vtt(movie_dir, duration)
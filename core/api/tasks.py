@@ -2,17 +2,49 @@
 Utilities for video conversion (MP4 and HLS) and async email-related tasks.
 """
 
+import logging
 import os
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from pathlib import Path
 
 from django.conf import settings
+from django.db import transaction
+import django_rq
 from django_rq import job
+from rq import get_current_job
 
-from authentication.api.utils import send_activation_email
+from authentication.api.utils import send_activation_email, send_password_reset_email
 from authentication.models import User
+from video.api.asset_index import publish_asset_index
+from video.api.usage import record_directory_usage, rendition_components
 from video.api.utils import hls_root
+from video.models import VideoMetadata
+
+from .checkpoint import (
+    discard_partial_output,
+    part_names,
+    playlist_finished,
+    prepare_resume,
+    publish_parts,
+    remove_superseded_media,
+)
+from .ffmpeg import FFmpegCancelled, run_ffmpeg
+from .governor import encoder_threads, threads_per_job
+from .ladder import analyze_title
+from .media import keyframe_times, probe_source
+from .playlists import stitch_playlists, write_master_playlist
+from .progress import ProgressReporter
+from .storyboard import (
+    STORYBOARD_DIR,
+    STORYBOARD_VTT,
+    render_storyboard,
+    storyboard_filter,
+    storyboard_output_args,
+    write_storyboard_vtt,
+)
 
+logger = logging.getLogger(__name__)
 
 _VIDEO_ALLOWED_RESOLUTIONS = getattr(
     settings,
@@ -34,6 +66,26 @@ RESOLUTION_HEIGHTS = {
     "1080p": 1080,
 }
 
+TRANSCODE_STRATEGY = str(
+    getattr(settings, "VIDEO_TRANSCODE_STRATEGY", "single_pass")
+).strip().lower()
+
+HLS_SEGMENT_SECONDS = 6
+
+SEGMENT_FORMAT = str(getattr(settings, "VIDEO_HLS_SEGMENT_FORMAT", "mpegts")).strip().lower()
+
+CHUNK_SECONDS = int(getattr(settings, "VIDEO_CHUNK_SECONDS", 120))
+CHUNK_WORKERS = int(getattr(settings, "VIDEO_CHUNK_WORKERS", 0)) or os.cpu_count() or 1
+
+PER_TITLE_ENCODING = bool(getattr(settings, "VIDEO_PER_TITLE_ENCODING", False))
+
+# Two-phase pipeline: a fast preview pass, then a slower high-quality pass
+# whose renditions replace the preview once they are complete.
+PREVIEW_PRESET = str(getattr(settings, "VIDEO_PREVIEW_PRESET", "ultrafast"))
+HQ_PRESET = str(getattr(settings, "VIDEO_HQ_PRESET", "slow"))
+SUPERSEDED_RETENTION = int(getattr(settings, "VIDEO_SUPERSEDED_RETENTION", 600))
+REPLACE_NAMESPACE = "hq_"
+
 
 def get_resolution_height(resolution: str) -> int:
     """
@@ -65,11 +117,431 @@ def get_resolution_height(resolution: str) -> int:
         ) from exc
 
 
+def ordered_resolutions(resolutions=None) -> list:
+    """
+    Return the given (or allowed) resolutions ordered from lowest to highest.
+
+    Unknown labels are dropped so callers can build a ladder without
+    having to validate every entry themselves.
+
+    Args:
+        resolutions (Iterable[str] | None): Resolution labels to order.
+            Defaults to ALLOWED_RESOLUTIONS.
+
+    Returns:
+        list[str]: Normalized resolution labels sorted by height.
+    """
+    if resolutions is None:
+        resolutions = ALLOWED_RESOLUTIONS
+
+    labels = {str(res).strip().lower() for res in resolutions}
+    return sorted(
+        (res for res in labels if res in RESOLUTION_HEIGHTS),
+        key=RESOLUTION_HEIGHTS.__getitem__,
+    )
+
+
+def rendition_ladder(source_height, resolutions=None) -> list:
+    """
+    Return the renditions worth encoding for a source of the given height.
+
+    Renditions taller than the source are skipped, since upscaling adds
+    encode time and disk usage without adding detail. If the source is
+    smaller than every rendition, the lowest one is kept so the video is
+    still playable; if the height is unknown, the full ladder is returned.
+
+    Args:
+        source_height (int | None): Displayed height of the source in pixels.
+        resolutions (Iterable[str] | None): Candidate labels. Defaults to
+            ALLOWED_RESOLUTIONS.
+
+    Returns:
+        list[str]: Resolution labels ordered lowest first.
+    """
+    ladder = ordered_resolutions(resolutions)
+    if not source_height:
+        return ladder
+
+    fitting = [res for res in ladder if RESOLUTION_HEIGHTS[res] <= source_height]
+    return fitting or ladder[:1]
+
+
+def rendition_dir(movie_id: int, resolution: str) -> Path:
+    """
+    Return (and create) the HLS output directory for one rendition.
+
+    Args:
+        movie_id (int): Identifier used to build the output directory path.
+        resolution (str): Resolution label such as "480p".
+
+    Returns:
+        Path: <HLS_ROOT>/<movie_id>/<resolution>/
+    """
+    output_dir = hls_root() / str(movie_id) / resolution.lower()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def _hls_output_args(
+    output_dir: Path,
+    *,
+    segment_prefix: str = "segment",
+    playlist_name: str = "index.m3u8",
+    ts_offset: float = 0.0,
+    encoding: dict = None,
+    playlist_type: str = "vod",
+    threads: int = None,
+    preset: str = None,
+) -> list:
+    """
+    Build the ffmpeg output options that write one HLS rendition.
+
+    Keyframes are forced on every segment boundary so all renditions cut
+    their segments at the same timestamps, which lets players switch
+    between them via the master playlist.
+
+    With VIDEO_HLS_SEGMENT_FORMAT "fmp4" the rendition is written as one
+    fragmented MP4 file (<segment_prefix>.mp4, init segment at its start)
+    addressed through EXT-X-MAP/EXT-X-BYTERANGE; otherwise as numbered
+    MPEG-TS segments (<segment_prefix>_NNN.ts).
+
+    Args:
+        output_dir (Path): Rendition directory receiving playlist and segments.
+        segment_prefix (str): File name prefix of the written media files.
+        playlist_name (str): File name of the written playlist.
+        ts_offset (float): Seconds added to output timestamps, used when
+            the input is only a slice of the source.
+        encoding (dict | None): Per-title settings with "crf", "maxrate"
+            and "bufsize"; the encoder defaults are used if omitted.
+        playlist_type (str): "vod", or "event" for a playlist that lists
+            every segment as soon as it is completely written.
+        threads (int | None): Encoder threads for this output, as granted
+            by the CPU governor.
+        preset (str | None): x264 preset; the encoder default if omitted.
+
+    Returns:
+        list[str]: Encoder and HLS muxer arguments ending with the playlist path.
+    """
+    args = ["-c:v", "libx264"]
+    if preset:
+        args += ["-preset", preset]
+    if threads:
+        args += ["-threads", str(threads)]
+    if encoding:
+        args += [
+            "-crf", str(encoding["crf"]),
+            "-maxrate", str(encoding["maxrate"]),
+            "-bufsize", str(encoding["bufsize"]),
+        ]
+    args += [
+        "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        "-c:a", "aac",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", playlist_type,
+    ]
+    if SEGMENT_FORMAT == "fmp4":
+        args += [
+            "-hls_segment_type", "fmp4",
+            "-hls_flags", "single_file",
+            "-hls_segment_filename", str(output_dir / f"{segment_prefix}.mp4"),
+        ]
+    else:
+        args += ["-hls_segment_filename", str(output_dir / f"{segment_prefix}_%03d.ts")]
+    if ts_offset:
+        args += ["-output_ts_offset", f"{ts_offset:.6f}"]
+    return args + [str(output_dir / playlist_name)]
+
+
+def _split_scale_graph(heights: list, storyboard: bool = False) -> str:
+    """
+    Build a filter graph that decodes once and scales to several heights.
+
+    Args:
+        heights (list[int]): Output heights; output i is labelled [v<i>].
+        storyboard (bool): Add a branch producing storyboard sprite
+            sheets, labelled [sprites].
+
+    Returns:
+        str: The -filter_complex expression.
+    """
+    branches = "".join(f"[s{i}]" for i in range(len(heights)))
+    if storyboard:
+        branches += "[sb]"
+    graph = [f"[0:v]split={len(heights) + (1 if storyboard else 0)}{branches}"]
+    graph += [f"[s{i}]scale=-2:{height}[v{i}]" for i, height in enumerate(heights)]
+    if storyboard:
+        graph.append(storyboard_filter("[sb]", "[sprites]"))
+    return ";".join(graph)
+
+
+def _validated_ladder(resolutions) -> list:
+    """
+    Validate resolution labels and return them ordered lowest first.
+
+    Args:
+        resolutions (Iterable[str] | None): Labels to validate. Defaults to
+            all allowed resolutions.
+
+    Returns:
+        list[str]: Validated, ordered resolution labels.
+
+    Raises:
+        ValueError: If any resolution is invalid or none is given.
+    """
+    resolutions = list(ALLOWED_RESOLUTIONS if resolutions is None else resolutions)
+    for res in resolutions:
+        get_resolution_height(res)
+
+    ladder = ordered_resolutions(resolutions)
+    if not ladder:
+        raise ValueError("At least one resolution is required.")
+    return ladder
+
+
+def _source_duration(input_path: str) -> float:
+    """
+    Return the duration of the source in seconds, or 0.0 if it cannot be probed.
+
+    Progress reporting only degrades (no percent/ETA) when this fails.
+    """
+    try:
+        return probe_source(input_path)["duration"] or 0.0
+    except Exception:
+        return 0.0
+
+
+def encoding_ladder(movie_id: int, input_path: str, resolutions: list, per_title=None) -> dict:
+    """
+    Return the per-title encoder settings for the given renditions.
+
+    Settings already stored in VideoMetadata.encoding_ladder are reused;
+    missing renditions are analysed and merged into the stored ladder.
+    A failed analysis only falls back to the fixed encoder settings.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        input_path (str): Path to the source video file.
+        resolutions (list[str]): Validated resolution labels.
+        per_title (bool | dict | None): Enable the analysis, or a ladder
+            computed earlier to use as is. Defaults to
+            VIDEO_PER_TITLE_ENCODING.
+
+    Returns:
+        dict[str, dict]: Resolution label -> {"crf", "maxrate", "bufsize", ...};
+            empty if per-title encoding is disabled.
+    """
+    if isinstance(per_title, dict):
+        return {res: per_title[res] for res in resolutions if res in per_title}
+    if not (PER_TITLE_ENCODING if per_title is None else per_title):
+        return {}
+
+    metadata = VideoMetadata.objects.filter(video_id=movie_id).first()
+    stored = dict(metadata.encoding_ladder) if metadata else {}
+    missing = {res: RESOLUTION_HEIGHTS[res] for res in resolutions if res not in stored}
+
+    if missing:
+        try:
+            chosen = analyze_title(input_path, missing, _source_duration(input_path))
+        except Exception as exc:
+            logger.warning("Per-title analysis of video %s failed: %s", movie_id, exc)
+            chosen = {}
+
+        if chosen:
+            with transaction.atomic():
+                row = VideoMetadata.objects.select_for_update().filter(video_id=movie_id).first()
+                if row:
+                    row.encoding_ladder = {**row.encoding_ladder, **chosen}
+                    row.save(update_fields=["encoding_ladder"])
+            stored.update(chosen)
+
+    return {res: stored[res] for res in resolutions if res in stored}
+
+
+def chunk_ranges(keyframes: list, duration: float, chunk_seconds: float) -> list:
+    """
+    Split a timeline into chunks that start on keyframes.
+
+    Each boundary is the first keyframe at or after the next multiple of
+    chunk_seconds, so every chunk can be decoded independently.
+
+    Args:
+        keyframes (list[float]): Keyframe timestamps in seconds, ascending.
+        duration (float): Total duration of the source in seconds.
+        chunk_seconds (float): Target chunk length in seconds.
+
+    Returns:
+        list[tuple[float, float]]: (start, end) pairs covering the timeline.
+    """
+    boundaries = [0.0]
+    for time in keyframes:
+        if time >= boundaries[-1] + chunk_seconds and time < duration:
+            boundaries.append(time)
+    boundaries.append(duration)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _per_output(threads: int, outputs: int) -> int:
+    """
+    Split a thread grant between the encoders of one ffmpeg process.
+    """
+    return max(threads // max(outputs, 1), 1)
+
+
+def _encode_resumable(
+    movie_id: int,
+    input_path: str,
+    output_dirs: dict,
+    encoding: dict,
+    storyboard: bool = False,
+    preset: str = None,
+    replace: bool = False,
+) -> list:
+    """
+    Run one ffmpeg process for several renditions, resuming earlier attempts.
+
+    The source is decoded once and split/scaled to every rendition.
+    Segments verified by a previous, interrupted run are kept and the
+    encoder starts at the last segment boundary all renditions reached.
+    The working playlists are published as index.m3u8 once ffmpeg succeeds.
+    If it fails, renditions without reusable segments are removed; if the
+    job was cancelled, its unpublished output is removed entirely. The
+    encoder threads are leased from the CPU governor.
+
+    Args:
+        movie_id (int): Identifier of the video being transcoded.
+        input_path (str): Path to the input video file.
+        output_dirs (dict[str, Path]): Rendition label -> output directory,
+            ordered lowest resolution first.
+        encoding (dict[str, dict]): Per-title settings per rendition.
+        storyboard (bool): Also write the trickplay storyboard. It comes
+            from the same decode unless the job resumes mid-source, in
+            which case a separate keyframe-only pass renders it.
+        preset (str | None): x264 preset for every rendition.
+        replace (bool): Write separately named files and only swap the
+            published playlists once all of them are complete, see
+            schedule_superseded_cleanup().
+
+    Returns:
+        list[str]: Paths to the published playlists, in output_dirs order.
+
+    Raises:
+        CalledProcessError: If ffmpeg fails.
+    """
+    namespace = REPLACE_NAMESPACE if replace else ""
+    attempt, offset, finished = prepare_resume(output_dirs.values(), namespace)
+    movie_dir = hls_root() / str(movie_id)
+    duration = _source_duration(input_path)
+    sprites_inline = storyboard and not finished and not offset
+
+    if not finished:
+        segment_prefix, playlist_name = part_names(attempt, namespace)
+        label = f"movie {movie_id} {','.join(output_dirs)}"
+        heights = [RESOLUTION_HEIGHTS[res] for res in output_dirs]
+
+        with encoder_threads(label) as threads:
+            cmd = ["ffmpeg", "-y"]
+            if offset:
+                cmd += ["-ss", f"{offset:.6f}"]
+            cmd += [
+                "-i", input_path,
+                "-filter_complex", _split_scale_graph(heights, storyboard=sprites_inline),
+            ]
+            for i, (res, output_dir) in enumerate(output_dirs.items()):
+                cmd += [
+                    "-map", f"[v{i}]", "-map", "0:a?",
+                    *_hls_output_args(
+                        output_dir,
+                        segment_prefix=segment_prefix,
+                        playlist_name=playlist_name,
+                        ts_offset=offset,
+                        encoding=encoding.get(res),
+                        playlist_type="event",
+                        threads=_per_output(threads, len(output_dirs)),
+                        preset=preset,
+                    ),
+                ]
+            if sprites_inline:
+                cmd += storyboard_output_args(movie_dir, "[sprites]")
+
+            remaining = max(duration - offset, 0.0)
+            with ProgressReporter(movie_id, list(output_dirs), remaining) as progress:
+                try:
+                    run_ffmpeg(cmd, progress.callback())
+                except FFmpegCancelled:
+                    discard_partial_output(output_dirs.values(), keep_verified=False)
+                    raise
+                except Exception:
+                    discard_partial_output(output_dirs.values())
+                    raise
+
+    playlists = [
+        str(publish_parts(output_dir, namespace)) for output_dir in output_dirs.values()
+    ]
+    publish_asset_index(movie_id)
+    if replace:
+        schedule_superseded_cleanup(movie_id, list(output_dirs))
+    if sprites_inline:
+        write_storyboard_vtt(movie_dir, duration)
+    elif storyboard and not (movie_dir / STORYBOARD_DIR / STORYBOARD_VTT).is_file():
+        render_storyboard(input_path, movie_dir, duration)
+    usage = rendition_components(output_dirs)
+    if storyboard:
+        usage["storyboard"] = movie_dir / STORYBOARD_DIR
+    record_directory_usage(movie_id, usage)
+    return playlists
+
+
+def remove_superseded_segments(movie_id: int, resolutions: list) -> int:
+    """
+    Delete the media files a high-quality pass replaced.
+
+    Runs on the "maintenance" queue VIDEO_SUPERSEDED_RETENTION seconds after
+    the replacement, so players still on the old playlist can finish.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        resolutions (list[str]): Renditions that were replaced.
+
+    Returns:
+        int: Number of files removed.
+    """
+    removed = 0
+    output_dirs = {res: hls_root() / str(movie_id) / res for res in resolutions}
+    for output_dir in output_dirs.values():
+        if output_dir.is_dir():
+            removed += remove_superseded_media(output_dir)
+    publish_asset_index(movie_id)
+    record_directory_usage(movie_id, rendition_components(output_dirs))
+    logger.info("Removed %d superseded media files of movie %s", removed, movie_id)
+    return removed
+
+
+def schedule_superseded_cleanup(movie_id: int, resolutions: list) -> None:
+    """
+    Queue remove_superseded_segments() after the retention period.
+
+    Needs a worker started with --with-scheduler (the maintenance pool);
+    failing to schedule only leaves the old files on disk.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        resolutions (list[str]): Renditions whose playlists were replaced.
+    """
+    try:
+        django_rq.get_queue("maintenance").enqueue_in(
+            timedelta(seconds=SUPERSEDED_RETENTION),
+            remove_superseded_segments, movie_id, resolutions,
+        )
+    except Exception as exc:
+        logger.warning("Could not schedule cleanup of movie %s: %s", movie_id, exc)
+
+
 def convert_to_mp4(input_path: str, resolution: str) -> str:
     """
     Convert a video file to MP4 at the specified resolution.
 
-    The output file name follows the pattern:
+    A partially written file is removed if ffmpeg fails. The output file
+    name follows the pattern:
         <base>_<resolution>.mp4
 
     Example:
@@ -91,19 +563,21 @@ def convert_to_mp4(input_path: str, resolution: str) -> str:
     base, ext = os.path.splitext(input_path)
     output_path = f"{base}_{resolution.lower()}.mp4"
 
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i", input_path,
-        "-vf", f"scale=-2:{height}",
-        "-c:v", "libx264",
-        "-crf", "23",
-        "-c:a", "aac",
-        "-strict", "-2",
-        output_path,
-    ]
-
-    subprocess.run(cmd, check=True)
+    with encoder_threads(f"mp4 {os.path.basename(output_path)}") as threads:
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-i", input_path,
+            "-vf", f"scale=-2:{height}",
+            "-c:v", "libx264",
+            "-threads", str(threads),
+            "-crf", "23",
+            "-c:a", "aac",
+            "-strict", "-2",
+            output_path,
+        ]
+
+        run_ffmpeg(cmd, cleanup=[output_path])
     return output_path
 
 
@@ -120,17 +594,36 @@ def convert720px(input_path: str) -> str:
     return convert_to_mp4(input_path, "720p")
 
 
-def convert_to_hls(movie_id: int, input_path: str, resolution: str) -> str:
+def convert_to_hls(
+    movie_id: int,
+    input_path: str,
+    resolution: str,
+    per_title=None,
+    storyboard: bool = False,
+    preset: str = None,
+    replace: bool = False,
+) -> str:
     """
     Convert a video file to HLS at the specified resolution.
 
     The output is stored under:
         <HLS_ROOT>/<movie_id>/<resolution>/
 
+    An interrupted earlier run of the same rendition is resumed from its
+    last verified segment. Afterwards the movie's master.m3u8 is rewritten
+    to include the new rendition.
+
     Args:
         movie_id (int): Identifier used to build the output directory path.
         input_path (str): Path to the input video file.
         resolution (str): Resolution label such as "480p" or "720p".
+        per_title (bool | dict | None): Use per-title encoder settings, see
+            encoding_ladder(). Defaults to VIDEO_PER_TITLE_ENCODING.
+        storyboard (bool): Also write the trickplay storyboard sprites and
+            storyboard.vtt from the same decode.
+        preset (str | None): x264 preset, e.g. VIDEO_PREVIEW_PRESET.
+        replace (bool): Replace an already published (preview) rendition
+            atomically once the new one is complete.
 
     Returns:
         str: Path to the generated HLS playlist (index.m3u8).
@@ -139,31 +632,248 @@ def convert_to_hls(movie_id: int, input_path: str, resolution: str) -> str:
         ValueError: If the resolution is invalid.
         CalledProcessError: If ffmpeg fails.
     """
-    height = get_resolution_height(resolution)
-    resolution = resolution.lower()
+    get_resolution_height(resolution)
+    output_dir = rendition_dir(movie_id, resolution)
+    encoding = encoding_ladder(movie_id, input_path, [resolution.lower()], per_title)
+
+    [playlist] = _encode_resumable(
+        movie_id,
+        input_path,
+        {resolution.lower(): output_dir},
+        encoding,
+        storyboard,
+        preset,
+        replace,
+    )
+    write_master_playlist(output_dir.parent)
+    return playlist
+
+
+def convert_to_hls_renditions(
+    movie_id: int,
+    input_path: str,
+    resolutions=None,
+    per_title=None,
+    storyboard: bool = False,
+    preset: str = None,
+    replace: bool = False,
+) -> list:
+    """
+    Convert a video file to several HLS renditions with a single decode.
 
-    base_dir: Path = hls_root()
-    output_dir = base_dir / str(movie_id) / resolution
-    output_dir.mkdir(parents=True, exist_ok=True)
+    The source is decoded once and fanned out through a split/scale filter
+    graph, so one ffmpeg process encodes every rendition. Like
+    convert_to_hls it resumes an interrupted earlier run. The output layout
+    is identical to convert_to_hls:
+        <HLS_ROOT>/<movie_id>/<resolution>/index.m3u8
+    plus the adaptive-bitrate <HLS_ROOT>/<movie_id>/master.m3u8.
 
-    playlist_path = output_dir / "index.m3u8"
-    segment_pattern = output_dir / "segment_%03d.ts"
+    Args:
+        movie_id (int): Identifier used to build the output directory path.
+        input_path (str): Path to the input video file.
+        resolutions (Iterable[str] | None): Resolution labels to produce.
+            Defaults to all allowed resolutions.
+        per_title (bool | dict | None): Use per-title encoder settings, see
+            encoding_ladder(). Defaults to VIDEO_PER_TITLE_ENCODING.
+        storyboard (bool): Also write the trickplay storyboard from the
+            same decode.
+        preset (str | None): x264 preset, e.g. VIDEO_HQ_PRESET.
+        replace (bool): Replace already published (preview) renditions
+            atomically once the new ones are complete.
 
+    Returns:
+        list[str]: Paths to the generated playlists, lowest resolution first.
+
+    Raises:
+        ValueError: If any resolution is invalid or none is given.
+        CalledProcessError: If ffmpeg fails.
+    """
+    ladder = _validated_ladder(resolutions)
+    encoding = encoding_ladder(movie_id, input_path, ladder, per_title)
+
+    playlists = _encode_resumable(
+        movie_id,
+        input_path,
+        {res: rendition_dir(movie_id, res) for res in ladder},
+        encoding,
+        storyboard,
+        preset,
+        replace,
+    )
+    write_master_playlist(hls_root() / str(movie_id))
+    return playlists
+
+
+def _encode_chunk(
+    index: int,
+    start: float,
+    end: float,
+    input_path: str,
+    output_dirs: dict,
+    on_progress=None,
+    encoding: dict = None,
+    rq_job=None,
+    preset: str = None,
+    threads: int = 1,
+) -> None:
+    """
+    Encode one time range of the source into every rendition directory.
+
+    Media files are prefixed with the chunk number and each rendition gets a
+    hidden part playlist (.chunk<NNN>.m3u8) that is stitched later. The
+    chunk does not lease encoder threads itself; it runs with its share of
+    the job's lease.
+
+    Args:
+        index (int): Chunk number.
+        start (float): Chunk start in seconds (a keyframe).
+        end (float): Chunk end in seconds.
+        input_path (str): Path to the input video file.
+        output_dirs (dict[str, Path]): Rendition label -> output directory,
+            ordered lowest resolution first.
+        on_progress (Callable[[dict], None] | None): Progress callback.
+        encoding (dict[str, dict] | None): Per-title settings per rendition.
+        rq_job (rq.job.Job | None): Job whose cancellation stops the chunk;
+            pool threads do not see the worker's current job themselves.
+        preset (str | None): x264 preset.
+        threads (int): Encoder threads granted to this chunk.
+
+    Raises:
+        CalledProcessError: If ffmpeg fails.
+    """
+    encoding = encoding or {}
+    heights = [RESOLUTION_HEIGHTS[res] for res in output_dirs]
     cmd = [
         "ffmpeg",
         "-y",
+        "-ss", f"{start:.6f}",
+        "-t", f"{end - start:.6f}",
         "-i", input_path,
-        "-vf", f"scale=-2:{height}",
-        "-c:v", "libx264",
-        "-c:a", "aac",
-        "-hls_time", "6",
-        "-hls_playlist_type", "vod",
-        "-hls_segment_filename", str(segment_pattern),
-        str(playlist_path),
+        "-filter_complex", _split_scale_graph(heights),
     ]
+    for i, (res, output_dir) in enumerate(output_dirs.items()):
+        cmd += [
+            "-map", f"[v{i}]", "-map", "0:a?",
+            *_hls_output_args(
+                output_dir,
+                segment_prefix=f"chunk{index:03d}_segment",
+                playlist_name=f".chunk{index:03d}.m3u8",
+                ts_offset=start,
+                encoding=encoding.get(res),
+                threads=_per_output(threads, len(output_dirs)),
+                preset=preset,
+            ),
+        ]
+    run_ffmpeg(cmd, on_progress, job=rq_job)
+
+
+def convert_to_hls_chunked(
+    movie_id: int,
+    input_path: str,
+    resolutions=None,
+    chunk_seconds: float = None,
+    workers: int = None,
+    per_title=None,
+    preset: str = None,
+    replace: bool = False,
+) -> list:
+    """
+    Convert a video file to HLS by encoding keyframe-aligned chunks in parallel.
 
-    subprocess.run(cmd, check=True)
-    return str(playlist_path)
+    The source is cut at keyframes into ranges of roughly chunk_seconds.
+    Each range is encoded to every rendition by its own ffmpeg process
+    (single decode per chunk); up to `workers` processes run at the same
+    time. The job takes one lease from the CPU governor and splits it
+    between its chunks, so fewer chunks run in parallel if fewer threads
+    than workers are granted. The part playlists are then stitched into one VOD index.m3u8 per
+    rendition, keeping the usual layout:
+        <HLS_ROOT>/<movie_id>/<resolution>/index.m3u8
+
+    Chunks that an interrupted earlier run finished and whose segments
+    verify are not encoded again. A cancelled job removes its unpublished
+    output.
+
+    Args:
+        movie_id (int): Identifier used to build the output directory path.
+        input_path (str): Path to the input video file.
+        resolutions (Iterable[str] | None): Resolution labels to produce.
+            Defaults to all allowed resolutions.
+        chunk_seconds (float | None): Target chunk length. Defaults to
+            VIDEO_CHUNK_SECONDS.
+        workers (int | None): Parallel ffmpeg processes. Defaults to
+            VIDEO_CHUNK_WORKERS (or the number of CPUs).
+        per_title (bool | dict | None): Use per-title encoder settings, see
+            encoding_ladder(). Defaults to VIDEO_PER_TITLE_ENCODING.
+        preset (str | None): x264 preset, e.g. VIDEO_HQ_PRESET.
+        replace (bool): Renditions replace already published (preview)
+            output; chunk files never collide with it and each index.m3u8
+            is swapped atomically, so this only schedules the cleanup.
+
+    Returns:
+        list[str]: Paths to the generated playlists, lowest resolution first.
+
+    Raises:
+        ValueError: If any resolution is invalid or none is given.
+        CalledProcessError: If ffmpeg or ffprobe fails.
+    """
+    ladder = _validated_ladder(resolutions)
+    duration = probe_source(input_path)["duration"] or 0.0
+    ranges = chunk_ranges(keyframe_times(input_path), duration, chunk_seconds or CHUNK_SECONDS)
+    if len(ranges) < 2:
+        return convert_to_hls_renditions(
+            movie_id, input_path, ladder, per_title, preset=preset, replace=replace,
+        )
+
+    encoding = encoding_ladder(movie_id, input_path, ladder, per_title)
+    output_dirs = {res: rendition_dir(movie_id, res) for res in ladder}
+    rq_job = get_current_job()
+    parallel = workers or CHUNK_WORKERS
+    label = f"movie {movie_id} chunks {','.join(output_dirs)}"
+    with encoder_threads(label, wanted=max(threads_per_job(), parallel), job=rq_job) as threads:
+        if threads < parallel:
+            logger.info(
+                "Movie %s: %s encoder threads granted, encoding %s chunks at a time instead of %s",
+                movie_id, threads, threads, parallel,
+            )
+        parallel = min(parallel, threads)
+        with ProgressReporter(movie_id, ladder, duration) as progress:
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                futures = []
+                for index, (start, end) in enumerate(ranges):
+                    if all(
+                        playlist_finished(output_dir, f".chunk{index:03d}.m3u8")
+                        for output_dir in output_dirs.values()
+                    ):
+                        progress.callback(part=index)(
+                            {"out_time": end - start, "speed": None, "done": True}
+                        )
+                        continue
+                    futures.append(pool.submit(
+                        _encode_chunk, index, start, end, input_path, output_dirs,
+                        progress.callback(part=index), encoding, rq_job, preset,
+                        threads // parallel,
+                    ))
+                try:
+                    for future in futures:
+                        future.result()
+                except FFmpegCancelled:
+                    for future in futures:
+                        future.cancel()
+                    pool.shutdown(wait=True)
+                    discard_partial_output(output_dirs.values(), keep_verified=False)
+                    raise
+
+    playlists = []
+    for output_dir in output_dirs.values():
+        parts = [output_dir / f".chunk{index:03d}.m3u8" for index in range(len(ranges))]
+        playlists.append(str(stitch_playlists(parts, output_dir / "index.m3u8")))
+
+    write_master_playlist(hls_root() / str(movie_id))
+    publish_asset_index(movie_id)
+    if replace:
+        schedule_superseded_cleanup(movie_id, ladder)
+    record_directory_usage(movie_id, rendition_components(output_dirs))
+    return playlists
 
 
 def convert_to_hls_480p(movie_id: int, input_path: str) -> str:
@@ -180,13 +890,27 @@ def convert_to_hls_480p(movie_id: int, input_path: str) -> str:
     return convert_to_hls(movie_id, input_path, "480p")
 
 
-@job
+@job("mail")
 def send_activation_email_async(user_id: int) -> None:
     """
     Asynchronous task to send an activation email to a user.
 
+    Runs on the "mail" queue so emails never wait behind transcodes.
+
     Args:
         user_id (int): Primary key of the user who should receive the email.
     """
     user = User.objects.get(pk=user_id)
     send_activation_email(user)
+
+
+@job("mail")
+def send_password_reset_email_async(user_id: int) -> None:
+    """
+    Asynchronous task to send a password reset email to a user.
+
+    Args:
+        user_id (int): Primary key of the user who should receive the email.
+    """
+    user = User.objects.get(pk=user_id)
+    send_password_reset_email(user)
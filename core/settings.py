@@ -110,13 +110,45 @@ CACHES = {
     }
 }
 
+_RQ_CONNECTION = {
+    "HOST": os.environ.get("REDIS_HOST", "redis"),
+    "PORT": int(os.environ.get("REDIS_PORT", 6379)),
+    "DB": int(os.environ.get("REDIS_DB", 0)),
+    "REDIS_CLIENT_KWARGS": {},
+}
+
+# One queue per work class: "mail" for transactional emails, "preview" for
+# the first (lowest) rendition of an upload, "transcode" for the remaining
+# renditions and "maintenance" for housekeeping jobs.
 RQ_QUEUES = {
-    "default": {
-        "HOST": os.environ.get("REDIS_HOST", "redis"),
-        "PORT": int(os.environ.get("REDIS_PORT", 6379)),
-        "DB": int(os.environ.get("REDIS_DB", 0)),
-        "DEFAULT_TIMEOUT": 900,
-        "REDIS_CLIENT_KWARGS": {},
+    "default": {**_RQ_CONNECTION, "DEFAULT_TIMEOUT": 900},
+    "mail": {**_RQ_CONNECTION, "DEFAULT_TIMEOUT": config("RQ_MAIL_TIMEOUT", default=60, cast=int)},
+    "preview": {**_RQ_CONNECTION, "DEFAULT_TIMEOUT": config("RQ_PREVIEW_TIMEOUT", default=900, cast=int)},
+    "transcode": {**_RQ_CONNECTION, "DEFAULT_TIMEOUT": config("RQ_TRANSCODE_TIMEOUT", default=3600, cast=int)},
+    "maintenance": {**_RQ_CONNECTION, "DEFAULT_TIMEOUT": config("RQ_MAINTENANCE_TIMEOUT", default=1800, cast=int)},
+}
+
+# Worker pools started by "manage.py run_workers". Each worker of a pool
+# listens on its queues in the given order (strict priority), so mail never
+# waits behind encodes and idle transcode workers help with previews.
+RQ_WORKER_POOLS = {
+    "mail": {
+        "queues": ["mail"],
+        "workers": config("RQ_MAIL_WORKERS", default=1, cast=int),
+    },
+    "preview": {
+        "queues": ["preview", "mail"],
+        "workers": config("RQ_PREVIEW_WORKERS", default=1, cast=int),
+    },
+    "transcode": {
+        "queues": ["transcode", "preview", "default"],
+        "workers": config("RQ_TRANSCODE_WORKERS", default=1, cast=int),
+    },
+    "maintenance": {
+        "queues": ["maintenance", "default"],
+        "workers": config("RQ_MAINTENANCE_WORKERS", default=1, cast=int),
+        # Runs the RQ scheduler for delayed jobs (enqueue_in).
+        "scheduler": True,
     },
 }
 
@@ -170,6 +202,18 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Users resolved from JWT cookies are cached per process for
+# USER_CACHE_LOCAL_TTL seconds (at most USER_CACHE_LOCAL_SIZE entries) and in
+# Redis for USER_CACHE_TTL seconds; changes to a user invalidate both.
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=300, cast=int)
+USER_CACHE_LOCAL_TTL = config("USER_CACHE_LOCAL_TTL", default=15, cast=float)
+USER_CACHE_LOCAL_SIZE = config("USER_CACHE_LOCAL_SIZE", default=4096, cast=int)
+
+# Logout, password reset and deactivation raise the user's token epoch in
+# Redis; each process caches epochs for TOKEN_EPOCH_LOCAL_TTL seconds, the
+# longest a revoked token can still be accepted by another process.
+TOKEN_EPOCH_LOCAL_TTL = config("TOKEN_EPOCH_LOCAL_TTL", default=5, cast=float)
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
 USE_I18N = True
@@ -183,13 +227,112 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
-HLS_ROOT = str(MEDIA_ROOT / "hls")
+HLS_ROOT = config("HLS_ROOT", default=str(MEDIA_ROOT / "hls"))
+
+# How authorized HLS files are sent: "direct" streams them from Django,
+# "x-accel" returns an nginx X-Accel-Redirect to VIDEO_ACCEL_REDIRECT_PREFIX
+# (an internal location aliasing HLS_ROOT, see nginx/videoflix.conf) and
+# "x-sendfile" returns the file path in X-Sendfile.
+VIDEO_DELIVERY_MODE = config("VIDEO_DELIVERY_MODE", default="direct")
+VIDEO_ACCEL_REDIRECT_PREFIX = config("VIDEO_ACCEL_REDIRECT_PREFIX", default="/protected-hls/")
+
+# Rendition playlists list segments as HMAC-signed URLs bound to the viewer,
+# movie, resolution and an expiry at least VIDEO_SEGMENT_URL_TTL seconds
+# ahead (rounded up to a quarter of it, so URLs stay stable and cacheable
+# meanwhile), so segment requests skip JWT authentication and database access.
+VIDEO_SIGNED_SEGMENTS = config("VIDEO_SIGNED_SEGMENTS", default=True, cast=bool)
+VIDEO_SEGMENT_URL_TTL = config("VIDEO_SEGMENT_URL_TTL", default=4 * 3600, cast=int)
+
+# Browser caching of HLS files: playlists and storyboards may be replaced and
+# are cached for VIDEO_PLAYLIST_MAX_AGE seconds (0 = always revalidate);
+# published segments never change and are cached as immutable.
+VIDEO_PLAYLIST_MAX_AGE = config("VIDEO_PLAYLIST_MAX_AGE", default=5, cast=int)
+VIDEO_SEGMENT_MAX_AGE = config("VIDEO_SEGMENT_MAX_AGE", default=365 * 24 * 3600, cast=int)
+
+# Segment requests are checked against an index of published files kept in
+# Redis (rebuilt by the transcode tasks) and mirrored per process for
+# VIDEO_ASSET_INDEX_LOCAL_TTL seconds, instead of probing the file system.
+VIDEO_ASSET_INDEX = config("VIDEO_ASSET_INDEX", default=True, cast=bool)
+VIDEO_ASSET_INDEX_LOCAL_TTL = config("VIDEO_ASSET_INDEX_LOCAL_TTL", default=30, cast=float)
+
+# Serve the HLS routes with async views that stream files in chunks of
+# VIDEO_STREAM_CHUNK_SIZE bytes read off the event loop. Only useful under
+# an ASGI server (APP_SERVER=asgi in backend.entrypoint.sh turns it on).
+VIDEO_ASYNC_DELIVERY = config("VIDEO_ASYNC_DELIVERY", default=False, cast=bool)
+VIDEO_STREAM_CHUNK_SIZE = config("VIDEO_STREAM_CHUNK_SIZE", default=256 * 1024, cast=int)
 
 VIDEO_ALLOWED_RESOLUTIONS = _split_env(
     "VIDEO_ALLOWED_RESOLUTIONS",
     default="120p,360p,720p,1080p",
 )
 
+# "single_pass" decodes each upload once and encodes every rendition in one
+# ffmpeg run; "per_resolution" enqueues one independent job per rendition;
+# "chunked" splits the source at keyframes and encodes the chunks in parallel.
+VIDEO_TRANSCODE_STRATEGY = config("VIDEO_TRANSCODE_STRATEGY", default="single_pass")
+VIDEO_CHUNK_SECONDS = config("VIDEO_CHUNK_SECONDS", default=120, cast=int)
+VIDEO_CHUNK_WORKERS = config("VIDEO_CHUNK_WORKERS", default=0, cast=int)
+
+# "mpegts" writes numbered .ts segments per rendition; "fmp4" writes one
+# fragmented MP4 (CMAF) file per rendition addressed with byte ranges.
+VIDEO_HLS_SEGMENT_FORMAT = config("VIDEO_HLS_SEGMENT_FORMAT", default="mpegts")
+
+# Minimum seconds between two progress writes to Redis per transcode job.
+VIDEO_PROGRESS_INTERVAL = config("VIDEO_PROGRESS_INTERVAL", default=2, cast=float)
+
+# CPU governor: all workers share a budget of encoder threads (default:
+# cores minus VIDEO_ENCODER_RESERVED_CORES); every encode leases
+# VIDEO_ENCODER_THREADS_PER_JOB of them (0 = budget / encoding workers) and
+# runs with nice VIDEO_ENCODER_NICE and, if enabled, idle I/O priority.
+# An encode waits at most VIDEO_ENCODER_MAX_WAIT seconds for free threads
+# (0 = until its RQ job times out) and stops waiting if the job is cancelled.
+VIDEO_ENCODER_THREAD_BUDGET = config("VIDEO_ENCODER_THREAD_BUDGET", default=0, cast=int)
+VIDEO_ENCODER_RESERVED_CORES = config("VIDEO_ENCODER_RESERVED_CORES", default=1, cast=int)
+VIDEO_ENCODER_THREADS_PER_JOB = config("VIDEO_ENCODER_THREADS_PER_JOB", default=0, cast=int)
+VIDEO_ENCODER_NICE = config("VIDEO_ENCODER_NICE", default=10, cast=int)
+VIDEO_ENCODER_IDLE_IO = config("VIDEO_ENCODER_IDLE_IO", default=True, cast=bool)
+VIDEO_ENCODER_MAX_WAIT = config("VIDEO_ENCODER_MAX_WAIT", default=600, cast=float)
+
+# ffmpeg supervision: wall-clock limit per ffmpeg run (0 = only the RQ job
+# timeout applies) and seconds without encoding progress before it is killed.
+VIDEO_FFMPEG_TIMEOUT = config("VIDEO_FFMPEG_TIMEOUT", default=0, cast=float)
+VIDEO_FFMPEG_STALL_TIMEOUT = config("VIDEO_FFMPEG_STALL_TIMEOUT", default=120, cast=float)
+
+# Two-phase transcoding: x264 preset of the fast preview rendition and of the
+# high-quality pass that replaces it, and how long (seconds) replaced
+# segments stay on disk for players still on the old playlist.
+VIDEO_PREVIEW_PRESET = config("VIDEO_PREVIEW_PRESET", default="ultrafast")
+VIDEO_HQ_PRESET = config("VIDEO_HQ_PRESET", default="slow")
+VIDEO_SUPERSEDED_RETENTION = config("VIDEO_SUPERSEDED_RETENTION", default=600, cast=int)
+
+# Resumable uploads (video/uploads/): largest accepted file and the directory
+# for unfinished uploads (default: MEDIA_ROOT/uploads).
+VIDEO_UPLOAD_MAX_SIZE = config("VIDEO_UPLOAD_MAX_SIZE", default=20 * 1024 ** 3, cast=int)
+VIDEO_UPLOAD_DIR = config("VIDEO_UPLOAD_DIR", default="")
+
+# Media garbage collection: orphaned HLS output and stale uploads older than
+# VIDEO_GC_MIN_AGE seconds are swept every VIDEO_GC_INTERVAL seconds (0 = off);
+# upload sessions idle for VIDEO_UPLOAD_EXPIRY seconds are expired.
+VIDEO_GC_MIN_AGE = config("VIDEO_GC_MIN_AGE", default=3600, cast=int)
+VIDEO_GC_INTERVAL = config("VIDEO_GC_INTERVAL", default=6 * 3600, cast=int)
+VIDEO_UPLOAD_EXPIRY = config("VIDEO_UPLOAD_EXPIRY", default=7 * 24 * 3600, cast=int)
+
+# Trickplay storyboard written by the preview transcode: one thumbnail of
+# VIDEO_STORYBOARD_WIDTH px every VIDEO_STORYBOARD_INTERVAL seconds, tiled
+# into COLUMNS x ROWS sprite sheets (jpg or webp) plus storyboard.vtt.
+VIDEO_STORYBOARD_INTERVAL = config("VIDEO_STORYBOARD_INTERVAL", default=5, cast=float)
+VIDEO_STORYBOARD_WIDTH = config("VIDEO_STORYBOARD_WIDTH", default=160, cast=int)
+VIDEO_STORYBOARD_COLUMNS = config("VIDEO_STORYBOARD_COLUMNS", default=5, cast=int)
+VIDEO_STORYBOARD_ROWS = config("VIDEO_STORYBOARD_ROWS", default=5, cast=int)
+VIDEO_STORYBOARD_FORMAT = config("VIDEO_STORYBOARD_FORMAT", default="jpg")
+
+# Per-title encoding: trial-encode sampled clips before transcoding and pick
+# the highest CRF per rendition that still reaches the target SSIM.
+VIDEO_PER_TITLE_ENCODING = config("VIDEO_PER_TITLE_ENCODING", default=False, cast=bool)
+VIDEO_PER_TITLE_TARGET_SSIM = config("VIDEO_PER_TITLE_TARGET_SSIM", default=0.98, cast=float)
+VIDEO_PER_TITLE_SAMPLES = config("VIDEO_PER_TITLE_SAMPLES", default=3, cast=int)
+VIDEO_PER_TITLE_SAMPLE_SECONDS = config("VIDEO_PER_TITLE_SAMPLE_SECONDS", default=4, cast=float)
+
 LOG_LEVEL = config("LOG_LEVEL", default="INFO")
 
 LOGGING = {
@@ -11,6 +11,7 @@ class BaseDeathPenalty:
     """
     No-op death penalty class used to bypass RQ's default timeout mechanism.
     Acts as a placeholder for environments that do not support forking.
+    ffmpeg runs still stop at the job timeout, see core.api.ffmpeg.run_ffmpeg.
     """
 
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,20 @@
+from unittest import mock
+
+from core.api.caching import LocalTTLCache
+
+
+def test_local_cache_evicts_least_recently_used_and_expired_entries():
+    cache = LocalTTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    with mock.patch("core.api.caching.time.monotonic", return_value=10 ** 9):
+        assert cache.get("a") is None
+    assert cache.stats() == {
+        "size": 1, "maxsize": 2, "ttl": 10.0, "hits": 2, "misses": 2, "hit_ratio": 0.5,
+    }
@@ -0,0 +1,74 @@
+from core.api.checkpoint import (
+    checkpoint_state,
+    part_names,
+    prepare_resume,
+    publish_parts,
+    remove_superseded_media,
+)
+from core.api.playlists import parse_media_playlist
+
+TS_PACKET = b"\x47" + bytes(187)
+
+
+def _event_playlist(rendition_dir, segments, ended=False):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-PLAYLIST-TYPE:EVENT"]
+    for name in segments:
+        lines += ["#EXTINF:6.000000,", name]
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    (rendition_dir / ".part00.m3u8").write_text("\n".join(lines) + "\n")
+
+
+def test_prepare_resume_keeps_segments_verified_in_all_renditions(tmp_path):
+    low, high = tmp_path / "120p", tmp_path / "360p"
+    for rendition_dir, good in ((low, 3), (high, 2)):
+        rendition_dir.mkdir()
+        names = [f"segment_{i:03d}.ts" for i in range(3)]
+        for i, name in enumerate(names):
+            (rendition_dir / name).write_bytes(TS_PACKET * 4 if i < good else b"\x47partial")
+        _event_playlist(rendition_dir, names)
+
+    assert prepare_resume([low, high]) == (1, 12.0, False)
+    assert part_names(1) == ("part01_segment", ".part01.m3u8")
+    for rendition_dir in (low, high):
+        playlist = parse_media_playlist(rendition_dir / ".part00.m3u8")
+        assert playlist.ended and len(playlist.segments) == 2
+        assert not (rendition_dir / "segment_002.ts").exists()
+
+    assert checkpoint_state(tmp_path)["360p"] == {
+        "complete": False, "segments": 2, "seconds": 12.0, "attempts": 1,
+    }
+
+
+def test_prepare_resume_detects_finished_encode(tmp_path):
+    rendition_dir = tmp_path / "120p"
+    rendition_dir.mkdir()
+    (rendition_dir / "segment_000.ts").write_bytes(TS_PACKET)
+    _event_playlist(rendition_dir, ["segment_000.ts"], ended=True)
+
+    assert prepare_resume([rendition_dir]) == (1, 0.0, True)
+    assert prepare_resume([tmp_path / "missing"]) == (0, 0.0, False)
+
+
+def test_replacement_pass_swaps_playlist_then_drops_old_segments(tmp_path):
+    rendition_dir = tmp_path / "120p"
+    rendition_dir.mkdir()
+    for name in ("segment_000.ts", "hq_segment_000.ts"):
+        (rendition_dir / name).write_bytes(TS_PACKET)
+    (rendition_dir / "index.m3u8").write_text(
+        "#EXTM3U\n#EXTINF:6.000000,\nsegment_000.ts\n#EXT-X-ENDLIST\n"
+    )
+    assert part_names(0, "hq_") == ("hq_segment", ".hq_part00.m3u8")
+    (rendition_dir / ".hq_part00.m3u8").write_text(
+        "#EXTM3U\n#EXTINF:6.000000,\nhq_segment_000.ts\n#EXT-X-ENDLIST\n"
+    )
+
+    assert prepare_resume([rendition_dir], "hq_") == (1, 0.0, True)
+    assert remove_superseded_media(rendition_dir) == 0
+
+    publish_parts(rendition_dir, "hq_")
+    assert [s.uri for s in parse_media_playlist(rendition_dir / "index.m3u8").segments] == [
+        "hq_segment_000.ts",
+    ]
+    assert remove_superseded_media(rendition_dir) == 1
+    assert not (rendition_dir / "segment_000.ts").exists()
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from core.api import ffmpeg
+
+
+def _fake_ffmpeg(tmp_path, body):
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!/bin/sh\n{body}\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_stalled_encoder_is_killed_and_output_removed(tmp_path):
+    partial = tmp_path / "out.mp4"
+    partial.write_bytes(b"partial")
+    cmd = [_fake_ffmpeg(tmp_path, "sleep 30")]
+
+    started = time.monotonic()
+    with pytest.raises(ffmpeg.FFmpegTimeout):
+        ffmpeg.run_ffmpeg(cmd, stall_timeout=1, cleanup=[partial])
+
+    assert time.monotonic() - started < 10
+    assert not partial.exists()
+
+
+def test_failure_keeps_only_the_stderr_tail(tmp_path):
+    cmd = [_fake_ffmpeg(
+        tmp_path, 'i=0; while [ $i -lt 500 ]; do echo "line $i" >&2; i=$((i+1)); done; exit 3',
+    )]
+
+    with pytest.raises(ffmpeg.FFmpegError) as excinfo:
+        ffmpeg.run_ffmpeg(cmd)
+
+    lines = excinfo.value.stderr.splitlines()
+    assert excinfo.value.returncode == 3
+    assert len(lines) == ffmpeg.STDERR_LINES
+    assert lines[-1] == "line 499"
@@ -0,0 +1,67 @@
+import json
+from unittest import mock
+
+import fakeredis
+import pytest
+from rq.job import JobStatus
+
+from core.api import governor
+from core.api.ffmpeg import FFmpegCancelled
+
+
+def test_leases_never_exceed_budget():
+    conn = fakeredis.FakeStrictRedis()
+    with mock.patch.object(governor, "thread_budget", return_value=4):
+        assert governor.try_acquire(conn, "a", 3, 2) == 3
+        assert governor.try_acquire(conn, "b", 3, 2) is None
+        assert governor.try_acquire(conn, "c", 3, 1) == 1
+        conn.hdel(governor.LEASES_KEY, "a")
+        assert governor.try_acquire(conn, "d", 3, 2) == 3
+
+
+def test_expired_leases_are_reclaimed():
+    conn = fakeredis.FakeStrictRedis()
+    with mock.patch.object(governor, "thread_budget", return_value=2):
+        assert governor.try_acquire(conn, "a", 2, 2) == 2
+        with mock.patch.object(governor.time, "time", return_value=governor.time.time() + 120):
+            assert governor.try_acquire(conn, "b", 2, 2) == 2
+            assert conn.hkeys(governor.LEASES_KEY) == [b"b"]
+
+
+def test_encodes_run_at_lower_priority():
+    with mock.patch.object(governor.shutil, "which", return_value="/usr/bin/x"):
+        assert governor.lower_priority(["ffmpeg", "-i", "x"])[:3] == ["nice", "-n", "10"]
+
+
+def _exhausted_budget():
+    conn = fakeredis.FakeStrictRedis()
+    conn.hset(governor.LEASES_KEY, "busy", json.dumps(
+        {"threads": 2, "expires": governor.time.time() + 600, "label": "", "host": ""}
+    ))
+    return conn
+
+
+def test_wait_for_threads_stops_when_job_is_cancelled():
+    conn = _exhausted_budget()
+    job = mock.Mock(timeout=None, started_at=None)
+    job.get_status.return_value = JobStatus.CANCELED
+    with mock.patch.object(governor, "thread_budget", return_value=2), \
+            mock.patch.object(governor, "get_redis_connection", return_value=conn), \
+            mock.patch.object(governor.time, "sleep") as sleep:
+        with pytest.raises(FFmpegCancelled):
+            with governor.encoder_threads("test", wanted=2, job=job):
+                pass
+    sleep.assert_not_called()
+
+
+def test_wait_for_threads_is_bounded():
+    conn = _exhausted_budget()
+    clock = iter(range(0, 10_000, 30))
+    with mock.patch.object(governor, "thread_budget", return_value=2), \
+            mock.patch.object(governor, "MAX_WAIT", 100), \
+            mock.patch.object(governor, "get_redis_connection", return_value=conn), \
+            mock.patch.object(governor.time, "monotonic", side_effect=lambda: next(clock)), \
+            mock.patch.object(governor.time, "sleep"):
+        with pytest.raises(governor.EncoderWaitTimeout):
+            with governor.encoder_threads("test", wanted=2, job=None):
+                pass
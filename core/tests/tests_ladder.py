@@ -0,0 +1,34 @@
+from unittest import mock
+
+from core.api import ladder, tasks
+
+
+def test_sample_offsets_spread_over_source():
+    assert ladder.sample_offsets(100.0, count=3, length=4) == [24.0, 48.0, 72.0]
+    assert ladder.sample_offsets(3.0, count=3, length=4) == [0.0]
+
+
+def test_analyze_rendition_picks_highest_crf_reaching_target(tmp_path):
+    def fake_trial(input_path, start, length, height, crf, workdir):
+        return {"bitrate": 1_000_000 / crf, "ssim": 0.99 if crf <= 24 else 0.95}
+
+    with mock.patch.object(ladder, "_trial", side_effect=fake_trial), \
+            mock.patch.object(ladder, "TARGET_SSIM", 0.98):
+        result = ladder.analyze_rendition("/src.mp4", "720p", 720, [0.0, 10.0], tmp_path)
+
+    assert result["crf"] == 24
+    assert result["maxrate"] == ladder.MAX_BITRATES["720p"]
+    assert result["bufsize"] == 2 * result["maxrate"]
+
+
+def test_per_title_settings_reach_encoder(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    chosen = {"360p": {"crf": 28, "maxrate": 800000, "bufsize": 1600000}}
+
+    with mock.patch.object(tasks, "run_ffmpeg") as run:
+        tasks.convert_to_hls_renditions(7, "/src.mp4", ["120p", "360p"], per_title=chosen)
+
+    cmd = run.call_args.args[0]
+    assert cmd.count("-crf") == 1
+    assert cmd[cmd.index("-crf") + 1] == "28"
+    assert cmd[cmd.index("-maxrate") + 1] == "800000"
@@ -0,0 +1,45 @@
+from core.api.playlists import parse_media_playlist, render_master_playlist
+
+
+def test_parse_media_playlist(tmp_path):
+    path = tmp_path / "index.m3u8"
+    path.write_text(
+        "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:6\n#EXT-X-PLAYLIST-TYPE:VOD\n"
+        "#EXTINF:6.000000,\nsegment_000.ts\n#EXTINF:2.500000,\nsegment_001.ts\n#EXT-X-ENDLIST\n"
+    )
+    playlist = parse_media_playlist(path)
+
+    assert playlist.ended is True
+    assert [s.uri for s in playlist.segments] == ["segment_000.ts", "segment_001.ts"]
+    assert playlist.duration == 8.5
+    assert "#EXT-X-TARGETDURATION:6" in playlist.header
+
+
+def test_render_master_playlist_lists_variant_attributes():
+    info = {"bandwidth": 900000, "average_bandwidth": 800000, "width": 640, "height": 360,
+            "codecs": "avc1.64001e,mp4a.40.2"}
+    text = render_master_playlist([("360p/index.m3u8", info)])
+
+    assert text.startswith("#EXTM3U\n")
+    assert ('#EXT-X-STREAM-INF:BANDWIDTH=900000,AVERAGE-BANDWIDTH=800000,'
+            'RESOLUTION=640x360,CODECS="avc1.64001e,mp4a.40.2"\n360p/index.m3u8') in text
+
+
+def test_stitch_playlists_marks_discontinuities(tmp_path):
+    from core.api.playlists import stitch_playlists
+
+    parts = []
+    for index in range(2):
+        part = tmp_path / f".chunk{index:03d}.m3u8"
+        part.write_text(
+            "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:7\n#EXT-X-PLAYLIST-TYPE:VOD\n"
+            f"#EXTINF:6.5,\nchunk{index:03d}_segment_000.ts\n#EXT-X-ENDLIST\n"
+        )
+        parts.append(part)
+
+    playlist = parse_media_playlist(stitch_playlists(parts, tmp_path / "index.m3u8"))
+
+    assert playlist.ended
+    assert [s.tags for s in playlist.segments] == [[], ["#EXT-X-DISCONTINUITY"]]
+    assert "#EXT-X-TARGETDURATION:7" in playlist.header
+    assert not any(part.exists() for part in parts)
@@ -0,0 +1,23 @@
+from core.api.ffmpeg import parse_progress
+from core.api.progress import ProgressReporter
+
+
+def test_parse_progress_block():
+    block = {"out_time_us": "12500000", "speed": "2.5x", "progress": "continue"}
+    assert parse_progress(block) == {"out_time": 12.5, "speed": 2.5, "done": False}
+    assert parse_progress({"out_time_us": "N/A", "speed": "N/A", "progress": "end"}) == {
+        "out_time": 0.0, "speed": None, "done": True,
+    }
+
+
+def test_reporter_sums_parallel_parts():
+    reporter = ProgressReporter(1, ["360p"], duration=100.0)
+    reporter._parts = {
+        0: {"out_time": 30.0, "speed": 2.0, "done": False},
+        1: {"out_time": 20.0, "speed": 3.0, "done": False},
+    }
+    entry = reporter.snapshot("running")
+
+    assert entry["percent"] == 50.0
+    assert entry["speed"] == 5.0
+    assert entry["eta_seconds"] == 10
@@ -0,0 +1,35 @@
+from unittest import mock
+
+from PIL import Image
+
+from core.api import storyboard, tasks
+
+
+def test_vtt_maps_intervals_to_sprite_tiles(tmp_path):
+    sprites = tmp_path / "storyboard"
+    sprites.mkdir()
+    Image.new("RGB", (160 * 5, 90 * 5)).save(sprites / "sprite_000.jpg")
+    Image.new("RGB", (160 * 5, 90 * 5)).save(sprites / "sprite_001.jpg")
+
+    path = storyboard.write_storyboard_vtt(tmp_path, 128.0)
+    lines = path.read_text().splitlines()
+
+    assert lines[0] == "WEBVTT"
+    assert lines[2:4] == ["00:00:00.000 --> 00:00:05.000", "sprite_000.jpg#xywh=0,0,160,90"]
+    assert "sprite_000.jpg#xywh=160,90,160,90" in lines
+    assert lines[-2:] == ["00:02:05.000 --> 00:02:08.000", "sprite_001.jpg#xywh=0,0,160,90"]
+
+
+def test_storyboard_branch_shares_the_decode(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+
+    with mock.patch.object(tasks, "run_ffmpeg") as run, \
+            mock.patch.object(tasks, "write_storyboard_vtt") as write_vtt:
+        tasks.convert_to_hls_renditions(7, "/src.mp4", ["120p", "360p"], storyboard=True)
+
+    cmd = run.call_args.args[0]
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert cmd.count("-i") == 1
+    assert "split=3" in graph and "tile=" in graph
+    assert cmd[cmd.index("[sprites]") + 1 :].count("image2") == 1
+    write_vtt.assert_called_once()
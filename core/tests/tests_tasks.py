@@ -0,0 +1,42 @@
+from unittest import mock
+
+from core.api import tasks
+
+
+def test_ordered_resolutions_sorts_by_height_and_drops_unknown():
+    assert tasks.ordered_resolutions(["720p", "120P", "4k", "360p"]) == ["120p", "360p", "720p"]
+
+
+def test_single_pass_decodes_once(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    ladder = tasks.ordered_resolutions(tasks.ALLOWED_RESOLUTIONS)
+
+    with mock.patch.object(tasks, "run_ffmpeg") as run:
+        playlists = tasks.convert_to_hls_renditions(7, "/src.mp4", ladder)
+
+    cmd = run.call_args.args[0]
+    assert cmd.count("-i") == 1
+    assert f"split={len(ladder)}" in cmd[cmd.index("-filter_complex") + 1]
+    assert playlists == [str(tmp_path / "7" / res / "index.m3u8") for res in ladder]
+
+
+def test_chunk_ranges_start_on_keyframes():
+    keyframes = [0.0, 4.0, 8.5, 12.0, 17.0, 21.0]
+    assert tasks.chunk_ranges(keyframes, 24.0, 8) == [(0.0, 8.5), (8.5, 17.0), (17.0, 24.0)]
+    assert tasks.chunk_ranges(keyframes, 24.0, 60) == [(0.0, 24.0)]
+
+
+def test_rendition_ladder_skips_upscaling():
+    candidates = ["120p", "360p", "720p", "1080p"]
+    assert tasks.rendition_ladder(480, candidates) == ["120p", "360p"]
+    assert tasks.rendition_ladder(90, candidates) == ["120p"]
+    assert tasks.rendition_ladder(None, candidates) == candidates
+
+
+def test_fmp4_writes_single_file_per_rendition(tmp_path):
+    with mock.patch.object(tasks, "SEGMENT_FORMAT", "fmp4"):
+        args = tasks._hls_output_args(tmp_path)
+
+    assert args[args.index("-hls_segment_type") + 1] == "fmp4"
+    assert args[args.index("-hls_flags") + 1] == "single_file"
+    assert args[args.index("-hls_segment_filename") + 1] == str(tmp_path / "segment.mp4")
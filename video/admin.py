@@ -1,9 +1,31 @@
 """
-Admin configuration for the Video model.
+Admin configuration for the Video and UploadSession models.
 """
 
 from django.contrib import admin
-from .models import Video
+from django.template.defaultfilters import filesizeformat
+
+from core.api.checkpoint import checkpoint_state
+
+from .api.utils import hls_root
+from .models import UploadSession, Video, VideoMetadata
+
+
+class VideoMetadataInline(admin.StackedInline):
+    """
+    Read-only display of the probed source metadata on the video page.
+    """
+
+    model = VideoMetadata
+    can_delete = False
+    extra = 0
+    readonly_fields = [f.name for f in VideoMetadata._meta.fields if f.name != "id"]
+
+    def has_add_permission(self, request, obj=None):
+        """
+        Metadata is created by the upload pipeline, never by hand.
+        """
+        return False
 
 
 @admin.register(Video)
@@ -13,7 +35,58 @@ class VideoAdmin(admin.ModelAdmin):
     Provides search, filtering, and ordering capabilities.
     """
 
-    list_display = ("id", "title", "category", "created_at")
+    inlines = [VideoMetadataInline]
+    readonly_fields = ("transcode_checkpoints", "disk_usage")
+
+    list_display = ("id", "title", "category", "disk_usage", "created_at")
+    list_select_related = ("usage",)
     list_filter = ("category", "created_at")
     search_fields = ("title", "description")
     ordering = ("-created_at",)
+
+    @admin.display(description="Disk usage", ordering="usage__total_bytes")
+    def disk_usage(self, obj):
+        """
+        Show the recorded size of all files of the video.
+        """
+        usage = getattr(obj, "usage", None) if obj.pk else None
+        return filesizeformat(usage.total_bytes) if usage else "-"
+
+    @admin.display(description="Transcode checkpoints")
+    def transcode_checkpoints(self, obj):
+        """
+        Summarize the verified HLS output per rendition, including partial
+        output an interrupted transcode will resume from.
+        """
+        if not obj.pk:
+            return "-"
+        state = checkpoint_state(hls_root() / str(obj.pk))
+        if not state:
+            return "No HLS output yet"
+        lines = []
+        for res, entry in state.items():
+            line = (
+                f"{res}: {'complete' if entry['complete'] else 'partial'}, "
+                f"{entry['segments']} segments / {entry['seconds']:.0f}s"
+            )
+            if entry["attempts"] > 1:
+                line += f" ({entry['attempts']} attempts)"
+            lines.append(line)
+        return "; ".join(lines)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """
+    Read-only overview of resumable uploads and the videos they created.
+    """
+
+    list_display = ("id", "filename", "offset", "length", "status", "video", "created_at")
+    list_filter = ("status",)
+    readonly_fields = [f.name for f in UploadSession._meta.fields]
+
+    def has_add_permission(self, request):
+        """
+        Sessions are opened through the upload API only.
+        """
+        return False
@@ -0,0 +1,262 @@
+"""
+Index of the published HLS media files of every movie.
+
+For each movie the index maps rendition -> segment file name -> size,
+together with the movie's resolved output directory. Only media files
+referenced by a published index.m3u8 are indexed, never the segments an
+encode is still writing. It is rebuilt when a transcode publishes (or
+cleans up) renditions and stored in Redis; every
+web process mirrors entries for VIDEO_ASSET_INDEX_LOCAL_TTL seconds.
+Segment requests are checked against the index instead of the file system:
+the served path is joined from indexed names only, so it cannot escape
+HLS_ROOT, and unknown segments are answered with 404 without a syscall.
+"""
+
+import logging
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from core.api.caching import LocalTTLCache
+from core.api.playlists import MEDIA_PLAYLIST, parse_media_playlist
+
+from ..models import Video
+from .utils import (
+    SEGMENT_CONTENT_TYPES,
+    allowed_resolutions,
+    file_response,
+    hls_root,
+    segment_cache_control,
+)
+
+logger = logging.getLogger(__name__)
+
+ASSET_INDEX = bool(getattr(settings, "VIDEO_ASSET_INDEX", True))
+LOCAL_TTL = float(getattr(settings, "VIDEO_ASSET_INDEX_LOCAL_TTL", 30))
+LAZY_TTL = 300
+
+_local = LocalTTLCache(maxsize=1024, ttl=LOCAL_TTL)
+_URI_ATTR_RE = re.compile(r'URI="([^"/]+)"')
+
+
+def _index_key(movie_id: int) -> str:
+    """
+    Return the shared cache key of a movie's asset index.
+    """
+    return f"video:assets:{movie_id}"
+
+
+def published_media(rendition_dir) -> set:
+    """
+    Return the media files a rendition's published playlist references.
+
+    Args:
+        rendition_dir (str | Path): Rendition output directory.
+
+    Returns:
+        set[str]: Segment URIs and EXT-X-MAP (fMP4 init section) URIs that
+            name local files; empty if the rendition is not published.
+    """
+    try:
+        playlist = parse_media_playlist(Path(rendition_dir, MEDIA_PLAYLIST))
+    except FileNotFoundError:
+        return set()
+
+    names = set()
+    for segment in playlist.segments:
+        names.add(segment.uri)
+        for tag in segment.tags:
+            if tag.startswith("#EXT-X-MAP:"):
+                names.update(_URI_ATTR_RE.findall(tag))
+    return {
+        name for name in names
+        if "/" not in name and os.path.splitext(name)[1].lower() in SEGMENT_CONTENT_TYPES
+    }
+
+
+def build_asset_index(movie_id: int, previous: dict = None) -> dict:
+    """
+    Index the media files of a movie's published renditions.
+
+    Only directories named after an allowed resolution are included, and
+    in them only the files their index.m3u8 references (see
+    published_media()). Segments of `previous` that are still on disk stay
+    indexed: a high-quality pass keeps the preview segments it replaced
+    for VIDEO_SUPERSEDED_RETENTION seconds, so players on the old playlist
+    can finish, and drops them in remove_superseded_segments().
+
+    Args:
+        movie_id (int): Identifier of the video.
+        previous (dict | None): The index being replaced.
+
+    Returns:
+        dict: {"root": str, "renditions": {resolution: {segment: size}}};
+            "root" is "" and "renditions" empty if the movie has no output.
+    """
+    try:
+        root = (hls_root() / str(movie_id)).resolve(strict=True)
+    except OSError:
+        return {"root": "", "renditions": {}}
+
+    kept = previous["renditions"] if previous and previous.get("root") == str(root) else {}
+    allowed = set(allowed_resolutions())
+    renditions = {}
+    with os.scandir(root) as children:
+        rendition_dirs = [c.path for c in children if c.name in allowed and c.is_dir()]
+    for rendition_dir in rendition_dirs:
+        resolution = os.path.basename(rendition_dir)
+        names = published_media(rendition_dir)
+        if not names:
+            continue
+        segments = {}
+        for name in names.union(kept.get(resolution, ())):
+            try:
+                segments[name] = os.stat(os.path.join(rendition_dir, name)).st_size
+            except FileNotFoundError:
+                continue
+        renditions[resolution] = segments
+    return {"root": str(root), "renditions": renditions}
+
+
+def publish_asset_index(movie_id: int) -> dict:
+    """
+    Rebuild a movie's index and store it for every video sharing its output.
+
+    Called whenever renditions are published or superseded files removed.
+    Failures are only logged (indexing never fails a transcode); the stored
+    index is then dropped, so the next request rebuilds it from disk.
+
+    Args:
+        movie_id (int): Identifier of the transcoded video.
+
+    Returns:
+        dict | None: The new index, or None if it could not be built.
+    """
+    try:
+        previous = cache.get(_index_key(movie_id))
+    except Exception as exc:
+        logger.warning("Asset index unavailable: %s", exc)
+        previous = None
+
+    try:
+        index = build_asset_index(movie_id, previous)
+        digest = Video.objects.filter(pk=movie_id).values_list("content_digest", flat=True).first()
+        movie_ids = {movie_id}
+        if digest:
+            movie_ids.update(Video.objects.filter(content_digest=digest).values_list("pk", flat=True))
+    except Exception as exc:
+        logger.warning("Could not index media of movie %s: %s", movie_id, exc)
+        forget_asset_index(movie_id)
+        return None
+
+    for other_id in movie_ids:
+        _local.delete(_index_key(other_id))
+        try:
+            cache.set(_index_key(other_id), index, timeout=None)
+        except Exception as exc:
+            logger.warning("Could not store asset index of movie %s: %s", other_id, exc)
+    return index
+
+
+def forget_asset_index(movie_id: int) -> None:
+    """
+    Drop a movie's index, e.g. after the video was deleted.
+    """
+    _local.delete(_index_key(movie_id))
+    try:
+        cache.delete(_index_key(movie_id))
+    except Exception as exc:
+        logger.warning("Could not drop asset index of movie %s: %s", movie_id, exc)
+
+
+def get_asset_index(movie_id: int, refresh: bool = False) -> dict:
+    """
+    Return a movie's index from the local mirror, Redis or, failing both, disk.
+
+    An index built on demand is stored for LAZY_TTL seconds only; indexes
+    written by publish_asset_index() do not expire.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        refresh (bool): Skip the local mirror.
+
+    Returns:
+        dict: See build_asset_index().
+    """
+    key = _index_key(movie_id)
+    index = None if refresh else _local.get(key)
+    if index is not None:
+        return index
+
+    try:
+        index = cache.get(key)
+    except Exception as exc:
+        logger.warning("Asset index unavailable: %s", exc)
+    if index is None:
+        index = build_asset_index(movie_id)
+        try:
+            cache.add(key, index, timeout=LAZY_TTL)
+        except Exception as exc:
+            logger.warning("Could not store asset index of movie %s: %s", movie_id, exc)
+    _local.set(key, index)
+    return index
+
+
+def lookup_segment(movie_id: int, resolution: str, segment: str):
+    """
+    Return the path of an indexed segment.
+
+    A segment missing from the local mirror is looked up once more in
+    Redis, since it may have been published after the mirror was filled.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        resolution (str): Rendition label.
+        segment (str): Segment file name.
+
+    Returns:
+        Path | None: Absolute path of the segment, or None if it is not
+            published.
+    """
+    index = get_asset_index(movie_id)
+    if segment not in index["renditions"].get(resolution, ()):
+        index = get_asset_index(movie_id, refresh=True)
+        if segment not in index["renditions"].get(resolution, ()):
+            return None
+    return Path(index["root"], resolution, segment)
+
+
+def serve_indexed_segment(movie_id: int, resolution: str, segment: str,
+                          range_header=None, if_range=None, **conditions):
+    """
+    Serve a segment after checking it against the asset index.
+
+    Equivalent to utils.serve_segment() without resolving paths or probing
+    the file system for unknown segments.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        resolution (str): Rendition label.
+        segment (str): Segment file name.
+        range_header (str | None): Value of the request's Range header.
+        if_range (str | None): Value of the request's If-Range header.
+        **conditions: if_none_match / if_modified_since, see file_response().
+
+    Returns:
+        HttpResponse: See utils.file_response().
+
+    Raises:
+        Http404: If the segment is not published.
+    """
+    content_type = SEGMENT_CONTENT_TYPES.get(os.path.splitext(segment)[1].lower())
+    path = lookup_segment(movie_id, resolution, segment) if content_type else None
+    if path is None:
+        raise Http404("Not found")
+    return file_response(
+        path, content_type, range_header, if_range,
+        cache_control=segment_cache_control(), **conditions,
+    )
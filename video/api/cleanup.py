@@ -0,0 +1,226 @@
+"""
+Removal of every file a video owns, and a sweep for media left behind.
+
+Deleting a Video removes its source, the MP4 renditions derived from it,
+its thumbnail (unless another video uses the same file) and its HLS output
+(shared output only once the last video with the same content is gone).
+Files whose owner disappeared without the delete signal running (bulk
+deletes, crashes, failed uploads) are found by sweep_orphaned_media(),
+which the worker supervisor queues every VIDEO_GC_INTERVAL seconds.
+"""
+
+import logging
+import os
+import shutil
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+import django_rq
+
+from core.api.tasks import ALLOWED_RESOLUTIONS
+
+from ..models import UploadSession, Video
+from .asset_index import forget_asset_index
+from .storage import SHARED_DIR, release_shared_output
+from .uploads import upload_dir
+from .usage import tree_bytes
+from .utils import hls_root
+
+logger = logging.getLogger(__name__)
+
+GC_MIN_AGE = int(getattr(settings, "VIDEO_GC_MIN_AGE", 3600))
+GC_INTERVAL = int(getattr(settings, "VIDEO_GC_INTERVAL", 6 * 3600))
+UPLOAD_EXPIRY = int(getattr(settings, "VIDEO_UPLOAD_EXPIRY", 7 * 24 * 3600))
+GC_LOCK_KEY = "videoflix:gc:sweep"
+
+
+def _remove_path(path: Path) -> int:
+    """
+    Delete a file, symlink or directory tree and return the bytes freed.
+    """
+    if path.is_symlink():
+        path.unlink()
+        return 0
+    size = tree_bytes(path)
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+    return size
+
+
+def derived_mp4_paths(source_path: str) -> list:
+    """
+    Return the MP4 renditions convert_to_mp4() may have written for a source.
+
+    Args:
+        source_path (str): Path of the uploaded source file.
+
+    Returns:
+        list[Path]: Existing "<source>_<resolution>.mp4" files.
+    """
+    base = os.path.splitext(source_path)[0]
+    return [
+        path for path in (Path(f"{base}_{res}.mp4") for res in ALLOWED_RESOLUTIONS)
+        if path.is_file()
+    ]
+
+
+def delete_video_assets(instance) -> int:
+    """
+    Remove all files belonging to a deleted video.
+
+    Args:
+        instance (Video): The deleted video (its row is already gone).
+
+    Returns:
+        int: Bytes freed.
+    """
+    freed = 0
+    if instance.video_file:
+        source = Path(instance.video_file.path)
+        for path in [source, *derived_mp4_paths(str(source))]:
+            if path.is_file():
+                freed += _remove_path(path)
+
+    thumbnail = instance.thumbnail.name if instance.thumbnail else ""
+    if thumbnail and not Video.objects.filter(thumbnail=thumbnail).exists():
+        path = Path(instance.thumbnail.path)
+        if path.is_file():
+            freed += _remove_path(path)
+
+    digest = instance.content_digest
+    remaining = Video.objects.filter(content_digest=digest).count() if digest else 0
+    release_shared_output(instance.id, digest, remaining)
+    forget_asset_index(instance.id)
+    movie_dir = hls_root() / str(instance.id)
+    if movie_dir.is_dir() and not movie_dir.is_symlink():
+        freed += _remove_path(movie_dir)
+
+    logger.info("Removed %d bytes of media of deleted video %s", freed, instance.id)
+    return freed
+
+
+def _older_than(path: Path, min_age: float) -> bool:
+    """
+    Return True if a path was last modified more than `min_age` seconds ago.
+    """
+    try:
+        return time.time() - path.lstat().st_mtime >= min_age
+    except FileNotFoundError:
+        return False
+
+
+def _cutoff(seconds: float):
+    """
+    Return the aware datetime `seconds` ago.
+    """
+    return timezone.now() - timedelta(seconds=seconds)
+
+
+def orphaned_media(min_age: float = None) -> list:
+    """
+    Find media that no Video or upload session references any more.
+
+    Candidates are movie directories under HLS_ROOT without a Video row,
+    shared output whose digest no video carries, and unfinished upload
+    files without an uploading or finalizing session or whose session has
+    been idle longer than VIDEO_UPLOAD_EXPIRY. Anything modified within `min_age` seconds is
+    skipped, so output of a transcode or upload still in progress survives.
+
+    Args:
+        min_age (float | None): Grace period in seconds. Defaults to
+            VIDEO_GC_MIN_AGE.
+
+    Returns:
+        list[Path]: Paths that can be removed.
+    """
+    min_age = GC_MIN_AGE if min_age is None else min_age
+    orphans = []
+
+    root = hls_root()
+    if root.is_dir():
+        movie_dirs = {int(p.name): p for p in root.iterdir() if p.name.isdigit()}
+        known = set(Video.objects.filter(pk__in=movie_dirs).values_list("pk", flat=True))
+        orphans += [p for pk, p in movie_dirs.items() if pk not in known]
+
+        shared_root = root / SHARED_DIR
+        if shared_root.is_dir():
+            digests = {p.name: p for p in shared_root.iterdir() if p.is_dir()}
+            used = set(
+                Video.objects.filter(content_digest__in=digests)
+                .values_list("content_digest", flat=True)
+            )
+            orphans += [p for digest, p in digests.items() if digest not in used]
+
+    uploads = upload_dir()
+    parts = {p.stem: p for p in uploads.glob("*.part")}
+    live = set(
+        str(pk) for pk in UploadSession.objects.filter(
+            status__in=(UploadSession.UPLOADING, UploadSession.FINALIZING),
+            updated_at__gte=_cutoff(UPLOAD_EXPIRY),
+        ).values_list("pk", flat=True)
+    )
+    orphans += [p for session_id, p in parts.items() if session_id not in live]
+
+    return [p for p in orphans if _older_than(p, min_age)]
+
+
+def sweep_orphaned_media(min_age: float = None, dry_run: bool = False) -> dict:
+    """
+    Delete orphaned media and expired upload sessions.
+
+    Sessions idle for VIDEO_UPLOAD_EXPIRY seconds are expired, and so are
+    sessions stuck in FINALIZING for VIDEO_GC_MIN_AGE seconds (the request
+    finalizing them died), so their files are swept next time.
+
+    Runs on the "maintenance" queue, see enqueue_sweep_if_due().
+
+    Args:
+        min_age (float | None): Grace period in seconds, see orphaned_media().
+        dry_run (bool): Only report what would be removed.
+
+    Returns:
+        dict: {"paths": [str], "bytes": int, "dry_run": bool}
+    """
+    orphans = orphaned_media(min_age)
+    freed = 0
+    for path in orphans:
+        if dry_run:
+            freed += 0 if path.is_symlink() else tree_bytes(path)
+        else:
+            freed += _remove_path(path)
+
+    if not dry_run:
+        expired = UploadSession.objects.filter(
+            Q(status=UploadSession.UPLOADING, updated_at__lt=_cutoff(UPLOAD_EXPIRY))
+            | Q(status=UploadSession.FINALIZING, updated_at__lt=_cutoff(GC_MIN_AGE))
+        )
+        expired.update(status=UploadSession.FAILED)
+        if orphans:
+            logger.info("Removed %d orphaned media paths (%d bytes)", len(orphans), freed)
+
+    return {"paths": [str(p) for p in orphans], "bytes": freed, "dry_run": dry_run}
+
+
+def enqueue_sweep_if_due() -> bool:
+    """
+    Queue sweep_orphaned_media() at most once per VIDEO_GC_INTERVAL.
+
+    The interval is tracked with a Redis key, so several supervisors on
+    different hosts still queue a single sweep.
+
+    Returns:
+        bool: True if a sweep was queued.
+    """
+    if GC_INTERVAL <= 0:
+        return False
+    queue = django_rq.get_queue("maintenance")
+    if not queue.connection.set(GC_LOCK_KEY, 1, nx=True, ex=GC_INTERVAL):
+        return False
+    queue.enqueue(sweep_orphaned_media)
+    return True
@@ -4,18 +4,46 @@ Custom authentication backend for validating JWT access tokens stored in cookies
 
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
-from django.contrib.auth import get_user_model
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework_simplejwt.tokens import AccessToken
 
-User = get_user_model()
+from authentication.api.token_epochs import token_is_current
+from authentication.api.user_cache import get_active_user
+
+
+def user_from_access_token(raw: str):
+    """
+    Validate a raw access token and return its active user.
+
+    Args:
+        raw (str): Value of the 'access_token' cookie.
+
+    Returns:
+        User: The token's user.
+
+    Raises:
+        AuthenticationFailed: If the token is invalid or revoked, or the
+            user cannot be retrieved.
+    """
+    try:
+        token = AccessToken(raw)
+        if not token_is_current(token):
+            raise exceptions.AuthenticationFailed("Token was revoked.")
+        user = get_active_user(token.get("user_id"))
+    except Exception:
+        raise exceptions.AuthenticationFailed("Not authenticated.")
+    if user is None:
+        raise exceptions.AuthenticationFailed("Not authenticated.")
+    return user
 
 
 class CookieJWTAuthentication(BaseAuthentication):
     """
     Authentication class that extracts a JWT access token from the request's cookies.
-    Validates the token using SimpleJWT and returns the associated active user.
+    Validates the token using SimpleJWT, rejects tokens revoked through the
+    user's token epoch and returns the associated active user, resolved
+    through the two-level user cache.
     """
 
     def authenticate(self, request: Request):
@@ -36,14 +64,7 @@ class CookieJWTAuthentication(BaseAuthentication):
         if not raw:
             return None
 
-        try:
-            token = AccessToken(raw)
-            user_id = token.get("user_id")
-            user = User.objects.get(id=user_id, is_active=True)
-        except Exception:
-            raise exceptions.AuthenticationFailed("Not authenticated.")
-
-        return (user, None)
+        return (user_from_access_token(raw), None)
 
 
 AuthenticatedOnly = {
@@ -0,0 +1,289 @@
+"""
+Processing of newly uploaded videos.
+
+Hashing and probing the source read the whole (possibly multi-GB) file, so
+they do not run in the request that created the video: video_post_save only
+queues prepare_video() once the video is committed. It runs on the "preview"
+queue and then queues the preview and high-quality transcode jobs, or links
+the video to existing HLS output if the same content was uploaded before.
+
+Videos with the same content share one output directory, which exactly one
+of them encodes: the first to claim the digest in Redis. The claim lists the
+owner's transcode jobs and lapses once none of them is pending any more, so
+a duplicate of a failed or cancelled encode takes over instead of linking to
+incomplete output forever.
+"""
+
+import json
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+import django_rq
+from django_redis import get_redis_connection
+from redis.exceptions import WatchError
+from rq.job import Dependency, Job, JobStatus
+
+from core.api.media import file_digest, probe_source
+from core.api.playlists import MEDIA_PLAYLIST
+from core.api.tasks import (
+    HQ_PRESET,
+    PREVIEW_PRESET,
+    TRANSCODE_STRATEGY,
+    convert_to_hls,
+    convert_to_hls_chunked,
+    convert_to_hls_renditions,
+    rendition_ladder,
+)
+
+from ..models import Video, VideoMetadata
+from .storage import link_shared_output
+from .utils import hls_root
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_QUEUE = "preview"
+TRANSCODE_QUEUE = "transcode"
+MAINTENANCE_QUEUE = "maintenance"
+
+OWNER_KEY = "videoflix:encode-owner:{digest}"
+OWNER_TTL = 7 * 24 * 3600
+CLAIM_GRACE = 60
+RECHECK_DELAY = 300
+PENDING_STATUSES = {JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED}
+
+
+def _queue_timeout(name: str) -> int:
+    """
+    Return the configured default job timeout (seconds) of an RQ queue.
+
+    Args:
+        name (str): Queue name as configured in RQ_QUEUES.
+
+    Returns:
+        int: The queue's DEFAULT_TIMEOUT, or 900 if it is not configured.
+    """
+    return int(settings.RQ_QUEUES.get(name, {}).get("DEFAULT_TIMEOUT", 900))
+
+
+def _store_source_metadata(instance):
+    """
+    Probe the uploaded source file and store the result on the video.
+
+    Args:
+        instance (Video): The uploaded video.
+
+    Returns:
+        VideoMetadata | None: The stored metadata, or None if probing failed.
+    """
+    try:
+        summary = probe_source(instance.video_file.path)
+    except Exception as exc:
+        logger.warning("Could not probe source of video %s: %s", instance.id, exc)
+        return None
+
+    metadata, _ = VideoMetadata.objects.update_or_create(video=instance, defaults=summary)
+    return metadata
+
+
+def _store_content_digest(instance):
+    """
+    Hash the uploaded source file and store the digest on the video.
+
+    Args:
+        instance (Video): The uploaded video.
+
+    Returns:
+        str: The hex digest, or "" if the file could not be read.
+    """
+    try:
+        digest = file_digest(instance.video_file.path)
+    except OSError as exc:
+        logger.warning("Could not hash source of video %s: %s", instance.id, exc)
+        return ""
+
+    Video.objects.filter(pk=instance.pk).update(content_digest=digest)
+    instance.content_digest = digest
+    return digest
+
+
+def _output_published(movie_id: int, ladder: list) -> bool:
+    """
+    Return True if every rendition of the ladder has a published playlist.
+    """
+    movie_dir = hls_root() / str(movie_id)
+    return all((movie_dir / res / MEDIA_PLAYLIST).is_file() for res in ladder)
+
+
+def _pending_jobs(job_ids) -> list:
+    """
+    Return the ids of the jobs that are still queued, deferred or running.
+    """
+    jobs = Job.fetch_many(list(job_ids), connection=django_rq.get_connection(PREVIEW_QUEUE))
+    return [job.id for job in jobs if job is not None and job.get_status() in PENDING_STATUSES]
+
+
+def claim_encode(digest: str, video_id: int, job_ids: list) -> list:
+    """
+    Atomically make a video the encoder of a digest's shared output.
+
+    The claim succeeds if there is none yet or none of the current owner's
+    jobs is pending any more (they finished, failed, were cancelled or have
+    expired). A claim younger than CLAIM_GRACE seconds always holds, since
+    its owner may not have queued its jobs yet.
+
+    Args:
+        digest (str): Hex SHA-256 of the source file.
+        video_id (int): Identifier of the claiming video.
+        job_ids (list[str]): Ids of the transcode jobs the video will queue.
+
+    Returns:
+        list[str]: The current owner's pending jobs; empty if the claim
+            succeeded.
+    """
+    key = OWNER_KEY.format(digest=digest)
+    conn = get_redis_connection("default")
+    with conn.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                raw = pipe.get(key)
+                owner = json.loads(raw) if raw else None
+                pending = _pending_jobs(owner["jobs"]) if owner else []
+                if owner and not pending and time.time() - owner["claimed"] < CLAIM_GRACE:
+                    pending = owner["jobs"]
+                if pending:
+                    pipe.unwatch()
+                    return pending
+                claim = {"video": video_id, "jobs": job_ids, "claimed": time.time()}
+                pipe.multi()
+                pipe.set(key, json.dumps(claim), ex=OWNER_TTL)
+                pipe.execute()
+                return []
+            except WatchError:
+                continue
+
+
+def enqueue_processing(video_id: int):
+    """
+    Queue prepare_video() for a new upload.
+
+    Args:
+        video_id (int): Identifier of the created video.
+
+    Returns:
+        rq.job.Job: The queued job.
+    """
+    return django_rq.get_queue(PREVIEW_QUEUE, autocommit=True).enqueue(prepare_video, video_id)
+
+
+def _recheck_later(video_id: int) -> None:
+    """
+    Run prepare_video() again after RECHECK_DELAY seconds.
+
+    Needs a worker started with --with-scheduler (the maintenance pool).
+    """
+    try:
+        django_rq.get_queue(MAINTENANCE_QUEUE).enqueue_in(
+            timedelta(seconds=RECHECK_DELAY), prepare_video, video_id,
+        )
+    except Exception as exc:
+        logger.warning("Could not schedule processing of video %s: %s", video_id, exc)
+
+
+def _enqueue_transcodes(instance, ladder: list, job_ids: list) -> None:
+    """
+    Queue the preview job and the high-quality jobs of a video.
+
+    Args:
+        instance (Video): The uploaded video.
+        ladder (list[str]): Renditions to produce, lowest first.
+        job_ids (list[str]): Job ids to use: the preview's, then one per
+            high-quality job.
+    """
+    path = instance.video_file.path
+    preview_id, *hq_ids = job_ids
+
+    preview_job = django_rq.get_queue(PREVIEW_QUEUE, autocommit=True).enqueue(
+        convert_to_hls, instance.id, path, ladder[0],
+        storyboard=True, preset=PREVIEW_PRESET, per_title=False, job_id=preview_id,
+    )
+    # Start the high-quality pass only after the preview, even if it
+    # failed, so the preview can never overwrite a finished rendition.
+    after_preview = Dependency(jobs=[preview_job.id], allow_failure=True)
+    options = {"preset": HQ_PRESET, "replace": True, "depends_on": after_preview}
+
+    queue = django_rq.get_queue(TRANSCODE_QUEUE, autocommit=True)
+    if TRANSCODE_STRATEGY in ("single_pass", "chunked"):
+        task = (
+            convert_to_hls_chunked
+            if TRANSCODE_STRATEGY == "chunked"
+            else convert_to_hls_renditions
+        )
+        queue.enqueue(
+            task,
+            instance.id,
+            path,
+            ladder,
+            job_timeout=_queue_timeout(TRANSCODE_QUEUE) * len(ladder),
+            job_id=hq_ids[0],
+            **options,
+        )
+        return
+
+    for res, job_id in zip(ladder, hq_ids):
+        queue.enqueue(convert_to_hls, instance.id, path, res, job_id=job_id, **options)
+
+
+def prepare_video(video_id: int) -> None:
+    """
+    Hash and probe a new upload, then queue its transcode jobs.
+
+    If a video with the same content digest exists, its HLS output is
+    shared: nothing is transcoded if all renditions are published, and a
+    video whose digest is being encoded by another one checks again after
+    RECHECK_DELAY seconds. Otherwise the video claims the digest (see
+    claim_encode()) and encodes it. Renditions taller than the source are
+    skipped.
+
+    Processing runs in two phases. The lowest rendition (together with the
+    trickplay storyboard) is encoded first with the fast
+    VIDEO_PREVIEW_PRESET and without per-title trial encodes on the
+    "preview" queue, so the title becomes playable quickly. Once that job
+    has ended, the whole ladder, including the preview's resolution, is
+    encoded with VIDEO_HQ_PRESET on the "transcode" queue according to
+    VIDEO_TRANSCODE_STRATEGY: one single-decode job, one chunk-parallel
+    job, or one job per resolution.
+    Each finished high-quality rendition replaces its preview atomically.
+
+    Args:
+        video_id (int): Identifier of the uploaded video.
+    """
+    instance = Video.objects.filter(pk=video_id).first()
+    if instance is None:
+        logger.warning("Video %s no longer exists, not processing it", video_id)
+        return
+    if not instance.video_file:
+        return
+
+    metadata = VideoMetadata.objects.filter(video=instance).first() or _store_source_metadata(instance)
+    ladder = rendition_ladder(metadata.height if metadata else None)
+    if not ladder:
+        return
+
+    hq_jobs = 1 if TRANSCODE_STRATEGY in ("single_pass", "chunked") else len(ladder)
+    job_ids = [uuid.uuid4().hex for _ in range(1 + hq_jobs)]
+    digest = instance.content_digest or _store_content_digest(instance)
+    if digest and link_shared_output(instance.id, digest):
+        if _output_published(instance.id, ladder):
+            logger.info("Video %s reuses HLS output of digest %s", instance.id, digest)
+            return
+        pending = claim_encode(digest, instance.id, job_ids)
+        if pending:
+            logger.info("Digest %s of video %s is being encoded by jobs %s", digest, instance.id, pending)
+            _recheck_later(instance.id)
+            return
+
+    _enqueue_transcodes(instance, ladder, job_ids)
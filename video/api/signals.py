@@ -3,21 +3,47 @@ Signal handlers for processing uploaded videos and cleaning up related files.
 """
 
 from django.dispatch import receiver
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from ..models import Video
-import os
-import django_rq
+import logging
 
-from core.api.tasks import convert_to_hls, ALLOWED_RESOLUTIONS
+from .cleanup import delete_video_assets
+from .processing import enqueue_processing
+from .usage import record_usage
+
+logger = logging.getLogger(__name__)
+
+
+def _record_upload_usage(instance):
+    """
+    Record the size of the uploaded source and thumbnail.
+
+    Args:
+        instance (Video): The saved video instance.
+    """
+    sizes = {}
+    for name, field in (("source", instance.video_file), ("thumbnail", instance.thumbnail)):
+        try:
+            sizes[name] = field.size if field else 0
+        except OSError:
+            sizes[name] = 0
+    record_usage(instance.id, sizes)
 
 
 @receiver(post_save, sender=Video)
 def video_post_save(sender, instance, created, **kwargs):
     """
-    Trigger HLS conversion jobs when a new video is created.
+    Queue the processing of a newly created video.
 
-    When a new Video instance is saved with an attached file,
-    queued background tasks are created for each allowed resolution.
+    Hashing, probing, the duplicate check and queueing the transcode jobs
+    run in video.api.processing.prepare_video() on the "preview" queue, so
+    saving a multi-GB upload does not read the whole file in the request.
+    The job is queued once the transaction commits; otherwise the worker
+    could look for the video before it exists (e.g. admin saves).
+
+    The size of the source and thumbnail is recorded on every save, so a
+    replaced thumbnail updates the video's disk usage.
 
     Args:
         sender: The model class (Video).
@@ -25,21 +51,26 @@ def video_post_save(sender, instance, created, **kwargs):
         created (bool): Indicates whether this is a new instance.
         **kwargs: Additional signal arguments.
     """
+    _record_upload_usage(instance)
     if created and instance.video_file:
-        queue = django_rq.get_queue("default", autocommit=True)
-        for res in ALLOWED_RESOLUTIONS:
-            queue.enqueue(convert_to_hls, instance.id, instance.video_file.path, res)
+        transaction.on_commit(lambda: enqueue_processing(instance.id))
 
 
 @receiver(post_delete, sender=Video)
 def delete_related_file(sender, instance, **kwargs):
     """
-    Remove the video file from storage when the associated Video instance is deleted.
+    Remove every file of a deleted video: the source, derived MP4s, the
+    thumbnail and its HLS output.
+
+    Shared HLS output is only removed once no other video carries the
+    same content digest. See video.api.cleanup.delete_video_assets().
 
     Args:
         sender: The model class (Video).
         instance (Video): The deleted video instance.
         **kwargs: Additional signal arguments.
     """
-    if instance.video_file and os.path.isfile(instance.video_file.path):
-        os.remove(instance.video_file.path)
+    try:
+        delete_video_assets(instance)
+    except OSError as exc:
+        logger.warning("Could not remove all media of video %s: %s", instance.id, exc)
@@ -0,0 +1,142 @@
+"""
+Signed, expiring URLs for HLS media segments.
+
+The manifest endpoint authenticates the viewer once and rewrites every
+segment URI of the playlist into a URL carrying the viewer's id, an expiry
+timestamp and an HMAC over (user, movie, resolution, expiry). The signed
+segment view only recomputes that HMAC, so segment requests need neither a
+JWT decode nor a database query. Expiries are rounded up to fixed buckets,
+so repeated playlist fetches hand out the same URLs and cached segments and
+playlist ETags stay valid until the bucket rolls over.
+"""
+
+import re
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+SIGNING_SALT = "video.api.signing.segment"
+SIGNED_SEGMENTS = bool(getattr(settings, "VIDEO_SIGNED_SEGMENTS", True))
+SEGMENT_URL_TTL = int(getattr(settings, "VIDEO_SEGMENT_URL_TTL", 4 * 3600))
+
+_URI_ATTR_RE = re.compile(r'URI="([^"/]+)"')
+
+
+def segment_signature(user_id, movie_id: int, resolution: str, expires: int) -> str:
+    """
+    Return the HMAC binding a segment URL to a viewer, rendition and expiry.
+
+    Args:
+        user_id (int | str): Id of the authenticated viewer.
+        movie_id (int): Identifier of the video.
+        resolution (str): Rendition label such as "720p".
+        expires (int): Unix timestamp after which the URL is rejected.
+
+    Returns:
+        str: Hex digest (SHA-256, keyed with SECRET_KEY).
+    """
+    value = f"{user_id}:{movie_id}:{resolution}:{expires}"
+    return salted_hmac(SIGNING_SALT, value, algorithm="sha256").hexdigest()
+
+
+def url_expiry(ttl: int = None, now: float = None) -> int:
+    """
+    Return the expiry timestamp of URLs signed now.
+
+    The time is rounded up to the next multiple of a quarter of the TTL,
+    so every URL stays valid for at least `ttl` seconds and all URLs signed
+    within one bucket are identical.
+
+    Args:
+        ttl (int | None): Minimum lifetime in seconds. Defaults to
+            VIDEO_SEGMENT_URL_TTL.
+        now (float | None): Current Unix time. Defaults to time.time().
+
+    Returns:
+        int: Unix timestamp.
+    """
+    ttl = SEGMENT_URL_TTL if ttl is None else ttl
+    now = time.time() if now is None else now
+    bucket = max(ttl // 4, 1)
+    return -(-int(now + ttl) // bucket) * bucket
+
+
+def signed_query(user_id, movie_id: int, resolution: str, ttl: int = None) -> str:
+    """
+    Build the query string that authorizes segment requests of one rendition.
+
+    Args:
+        user_id (int | str): Id of the authenticated viewer.
+        movie_id (int): Identifier of the video.
+        resolution (str): Rendition label.
+        ttl (int | None): Minimum lifetime in seconds, see url_expiry().
+
+    Returns:
+        str: "u=<user>&e=<expires>&s=<signature>"
+    """
+    expires = url_expiry(ttl)
+    return urlencode({
+        "u": user_id,
+        "e": expires,
+        "s": segment_signature(user_id, movie_id, resolution, expires),
+    })
+
+
+def verify_segment_request(movie_id: int, resolution: str, params) -> bool:
+    """
+    Check the signature and expiry of a signed segment request.
+
+    Args:
+        movie_id (int): Identifier of the video from the URL.
+        resolution (str): Rendition label from the URL.
+        params (QueryDict | dict): The request's query parameters.
+
+    Returns:
+        bool: True if the URL was signed by us for this rendition and has
+            not expired.
+    """
+    user_id, signature = params.get("u", ""), params.get("s", "")
+    try:
+        expires = int(params.get("e", ""))
+    except ValueError:
+        return False
+    if not user_id or not signature or expires < time.time():
+        return False
+    expected = segment_signature(user_id, movie_id, resolution, expires)
+    return constant_time_compare(signature, expected)
+
+
+def sign_playlist(text: str, user_id, movie_id: int, resolution: str) -> str:
+    """
+    Rewrite the media URIs of a playlist into signed segment URLs.
+
+    Segment lines and the URI of EXT-X-MAP (fMP4 init section) are
+    replaced; one signature covers the whole rendition.
+
+    Args:
+        text (str): Playlist as stored on disk.
+        user_id (int | str): Id of the authenticated viewer.
+        movie_id (int): Identifier of the video.
+        resolution (str): Rendition label.
+
+    Returns:
+        str: The playlist with absolute, signed URIs.
+    """
+    query = signed_query(user_id, movie_id, resolution)
+
+    def signed(uri: str) -> str:
+        path = reverse("video:hls_signed_segment", args=[movie_id, resolution, uri])
+        return f"{path}?{query}"
+
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#EXT-X-MAP:"):
+            line = _URI_ATTR_RE.sub(lambda m: f'URI="{signed(m.group(1))}"', line)
+        elif stripped and not stripped.startswith("#") and "/" not in stripped:
+            line = signed(stripped)
+        lines.append(line)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,79 @@
+"""
+On-disk layout of HLS output shared between videos with identical sources.
+
+Output of a hashed upload lives in <HLS_ROOT>/_shared/<digest>/ and
+<HLS_ROOT>/<movie_id> is a relative symlink to it, so the usual
+<HLS_ROOT>/<movie_id>/<resolution>/ paths keep working for every video
+that references the same content. The number of Video rows carrying a
+digest is its reference count.
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from .utils import hls_root
+
+logger = logging.getLogger(__name__)
+
+SHARED_DIR = "_shared"
+
+
+def shared_output_dir(digest: str) -> Path:
+    """
+    Return the content-addressed output directory for a digest.
+
+    Args:
+        digest (str): Hex SHA-256 of the source file.
+
+    Returns:
+        Path: <HLS_ROOT>/_shared/<digest>/
+    """
+    return hls_root() / SHARED_DIR / digest
+
+
+def link_shared_output(movie_id: int, digest: str) -> bool:
+    """
+    Point a movie's output directory at the shared directory of its digest.
+
+    Nothing is changed if the movie already has an output directory.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        digest (str): Hex SHA-256 of the video's source file.
+
+    Returns:
+        bool: True if the movie directory now links to the shared output.
+    """
+    movie_dir = hls_root() / str(movie_id)
+    if not movie_dir.is_symlink() and movie_dir.exists():
+        return False
+
+    shared = shared_output_dir(digest)
+    shared.mkdir(parents=True, exist_ok=True)
+    if not movie_dir.is_symlink():
+        os.symlink(Path(SHARED_DIR) / digest, movie_dir, target_is_directory=True)
+    return movie_dir.resolve() == shared.resolve()
+
+
+def release_shared_output(movie_id: int, digest: str, remaining_references: int) -> None:
+    """
+    Drop a deleted movie's link and remove the shared output once unused.
+
+    Args:
+        movie_id (int): Identifier of the deleted video.
+        digest (str): Hex SHA-256 of its source file ("" if never hashed).
+        remaining_references (int): Videos still carrying the same digest.
+    """
+    movie_dir = hls_root() / str(movie_id)
+    if movie_dir.is_symlink():
+        movie_dir.unlink()
+
+    if not digest or remaining_references:
+        return
+
+    shared = shared_output_dir(digest)
+    if shared.is_dir():
+        shutil.rmtree(shared, ignore_errors=True)
+        logger.info("Removed unreferenced HLS output %s", shared)
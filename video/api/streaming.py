@@ -0,0 +1,129 @@
+"""
+Async delivery of HLS playlists and segments for ASGI deployments.
+
+Under WSGI every viewer occupies a worker thread for as long as its
+segment download takes. The async HLS views (see views.AsyncHLSView)
+authenticate and look up the file in a thread pool, then stream the body
+through an async iterator that reads bounded chunks off the event loop,
+so a slow viewer only costs a suspended coroutine while it drains its
+socket. They are routed instead of the DRF views if VIDEO_ASYNC_DELIVERY
+is set, which the ASGI launch mode of backend.entrypoint.sh does.
+
+ASGI offers no sendfile(): zero-copy delivery stays with the web server
+offload of VIDEO_DELIVERY_MODE, whose X-Accel-Redirect responses pass
+through these views unchanged.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from rest_framework import exceptions
+
+from .permissions import user_from_access_token
+
+ASYNC_DELIVERY = bool(getattr(settings, "VIDEO_ASYNC_DELIVERY", False))
+CHUNK_SIZE = int(getattr(settings, "VIDEO_STREAM_CHUNK_SIZE", 256 * 1024))
+
+
+async def authenticate_request(request):
+    """
+    Resolve the viewer of a request like the DRF HLS views do.
+
+    The 'access_token' cookie is checked first (token epoch and user come
+    from the in-process and Redis caches, so usually neither blocks on the
+    database); without it the session user is used.
+
+    Args:
+        request (HttpRequest): Incoming request.
+
+    Returns:
+        User: The authenticated, active user.
+
+    Raises:
+        AuthenticationFailed: If the access token is invalid or revoked.
+        NotAuthenticated: If the request carries no credentials.
+    """
+    raw = request.COOKIES.get("access_token")
+    if raw:
+        return await sync_to_async(user_from_access_token)(raw)
+
+    auser = getattr(request, "auser", None)  # set by AuthenticationMiddleware
+    user = await auser() if auser else None
+    if user is None or not user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    return user
+
+
+async def iter_file_chunks(filelike, chunk_size: int = None):
+    """
+    Yield the content of a file-like object in bounded chunks.
+
+    Each read runs in the default thread pool, so the event loop never
+    blocks on disk I/O and at most one chunk per viewer is held in memory.
+    The file is closed when the iterator is exhausted or discarded.
+
+    Args:
+        filelike: Open binary file or utils.RangeFileWrapper.
+        chunk_size (int | None): Bytes per read. Defaults to
+            VIDEO_STREAM_CHUNK_SIZE.
+
+    Yields:
+        bytes: The next chunk.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            data = await loop.run_in_executor(None, filelike.read, chunk_size)
+            if not data:
+                break
+            yield data
+    finally:
+        filelike.close()
+
+
+def async_response(resp):
+    """
+    Turn a FileResponse into a response streamed by iter_file_chunks().
+
+    Status and headers (Content-Length, Content-Range, validators, caching)
+    are kept; every other response (304, 416, offload redirects, rewritten
+    playlists) is returned as is.
+
+    Args:
+        resp (HttpResponse): Response of one of the utils.serve_* helpers.
+
+    Returns:
+        HttpResponse: A StreamingHttpResponse with an async body, or resp.
+    """
+    if not isinstance(resp, FileResponse):
+        return resp
+    return StreamingHttpResponse(
+        iter_file_chunks(resp.file_to_stream),
+        status=resp.status_code,
+        headers=resp.headers,
+    )
+
+
+async def serve_async(serve, *args, **kwargs):
+    """
+    Run a utils.serve_* helper in the thread pool and stream its response.
+
+    The helpers stat the file, consult the asset index and open the file;
+    none of that runs on the event loop.
+
+    Args:
+        serve (Callable): Helper returning an HttpResponse.
+        *args: Positional arguments for serve.
+        **kwargs: Keyword arguments for serve.
+
+    Returns:
+        HttpResponse: See async_response().
+
+    Raises:
+        Http404: Propagated from serve.
+    """
+    resp = await sync_to_async(serve, thread_sensitive=False)(*args, **kwargs)
+    return async_response(resp)
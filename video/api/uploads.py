@@ -0,0 +1,317 @@
+"""
+Resumable chunked uploads of source videos, following the core of the
+tus 1.0 protocol (creation, checksum and termination extensions).
+
+A client creates an upload session with the total length and the video's
+metadata, then PATCHes the file in chunks at the session's current
+offset. Each chunk is streamed to a temporary file in fixed-size reads,
+so memory use does not depend on the chunk size, and is only counted
+once its checksum matches and it is flushed to disk. After a dropped
+connection the client asks for the offset (HEAD) and continues there.
+The last chunk moves the file into the video storage and creates the
+Video, which starts processing through the post_save signal.
+"""
+
+import base64
+import binascii
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from ..models import UploadSession, Video
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = "1.0.0"
+TUS_EXTENSIONS = "creation,checksum,termination"
+CHECKSUM_ALGORITHMS = ("md5", "sha1", "sha256")
+
+MAX_UPLOAD_SIZE = int(getattr(settings, "VIDEO_UPLOAD_MAX_SIZE", 20 * 1024 ** 3))
+READ_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """
+    A client error while creating or appending to an upload session.
+
+    Attributes:
+        status (int): HTTP status code to answer with.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def upload_dir() -> Path:
+    """
+    Return (and create) the directory holding unfinished uploads.
+
+    Uses VIDEO_UPLOAD_DIR if set, otherwise MEDIA_ROOT / "uploads".
+    """
+    path = Path(getattr(settings, "VIDEO_UPLOAD_DIR", "") or Path(settings.MEDIA_ROOT) / "uploads")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def part_path(session: UploadSession) -> Path:
+    """
+    Return the temporary file an upload session appends to.
+    """
+    return upload_dir() / f"{session.id}.part"
+
+
+def parse_upload_metadata(header: str) -> dict:
+    """
+    Decode a tus Upload-Metadata header ("key base64value,key2 base64value").
+
+    Args:
+        header (str): Raw header value.
+
+    Returns:
+        dict[str, str]: Decoded key/value pairs.
+
+    Raises:
+        UploadError: If a value is not valid base64/UTF-8.
+    """
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in (header or "").split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(400, f"Invalid Upload-Metadata value for '{key}'.")
+    return metadata
+
+
+def parse_checksum(header: str):
+    """
+    Parse a tus Upload-Checksum header ("sha1 base64digest").
+
+    Args:
+        header (str | None): Raw header value.
+
+    Returns:
+        tuple[str, bytes] | None: (algorithm, expected digest), or None if
+            no checksum was sent.
+
+    Raises:
+        UploadError: If the algorithm is unsupported or the digest malformed.
+    """
+    if not header:
+        return None
+    algorithm, _, value = header.strip().partition(" ")
+    if algorithm.lower() not in CHECKSUM_ALGORITHMS:
+        raise UploadError(400, f"Unsupported checksum algorithm '{algorithm}'.")
+    try:
+        return algorithm.lower(), base64.b64decode(value, validate=True)
+    except binascii.Error:
+        raise UploadError(400, "Malformed Upload-Checksum digest.")
+
+
+def create_session(user, length: int, metadata: dict) -> UploadSession:
+    """
+    Validate the announced upload and open a session for it.
+
+    Args:
+        user (User): Staff user creating the upload.
+        length (int): Total size of the file in bytes.
+        metadata (dict): Must contain "filename", "title" and "category";
+            "description" is optional.
+
+    Returns:
+        UploadSession: The new session, at offset 0.
+
+    Raises:
+        UploadError: If the length or metadata is invalid.
+    """
+    if length <= 0:
+        raise UploadError(400, "Upload-Length must be a positive integer.")
+    if length > MAX_UPLOAD_SIZE:
+        raise UploadError(413, f"Uploads are limited to {MAX_UPLOAD_SIZE} bytes.")
+
+    filename = get_valid_filename(os.path.basename(metadata.get("filename", "")))
+    if not filename or not metadata.get("title"):
+        raise UploadError(400, "Upload-Metadata must include filename and title.")
+    if metadata.get("category") not in dict(Video.CATEGORY_CHOICES):
+        raise UploadError(400, f"category must be one of {[c for c, _ in Video.CATEGORY_CHOICES]}.")
+
+    session = UploadSession.objects.create(
+        created_by=user,
+        filename=filename,
+        length=length,
+        metadata={
+            "title": metadata["title"][:200],
+            "description": metadata.get("description", ""),
+            "category": metadata["category"],
+        },
+    )
+    part_path(session).touch()
+    return session
+
+
+def _copy_chunk(stream, fh, limit: int, hasher) -> int:
+    """
+    Copy at most `limit` bytes from the request body to the part file.
+
+    Returns:
+        int: Bytes written.
+
+    Raises:
+        UploadError: If the body is longer than `limit`.
+    """
+    written = 0
+    while True:
+        data = stream.read(min(READ_SIZE, limit - written + 1)) if stream else b""
+        if not data:
+            return written
+        if written + len(data) > limit:
+            raise UploadError(413, "Chunk exceeds the announced Upload-Length.")
+        fh.write(data)
+        if hasher is not None:
+            hasher.update(data)
+        written += len(data)
+
+
+def append_chunk(session_id, offset: int, stream, checksum=None) -> UploadSession:
+    """
+    Append one chunk to an upload at the given offset.
+
+    Only one request may write to a session at a time. Bytes past the
+    recorded offset (left by an interrupted request) are discarded first;
+    the part file is never extended. A chunk whose checksum does not match
+    is discarded as well; the offset only advances once the data is synced
+    to disk. The request whose chunk completes the upload switches the
+    session to FINALIZING while it still holds the lock, and only that
+    request finalizes it (see finalize_upload()); a retried final chunk is
+    rejected with 409.
+
+    Args:
+        session_id (UUID): Upload session id.
+        offset (int): Upload-Offset sent by the client.
+        stream: File-like request body.
+        checksum (tuple[str, bytes] | None): Result of parse_checksum().
+
+    Returns:
+        UploadSession: The session with its new offset.
+
+    Raises:
+        UploadSession.DoesNotExist: If the session is unknown.
+        UploadError: 409 on an offset mismatch or if the upload is no longer
+            open, 423 if another request is writing, 413 if the chunk is
+            too long, 460 on a checksum mismatch.
+    """
+    session = UploadSession.objects.get(pk=session_id)
+    if session.status != UploadSession.UPLOADING:
+        raise UploadError(409, f"Upload is {session.status}.")
+    path = part_path(session)
+
+    try:
+        fh = open(path, "r+b")
+    except FileNotFoundError:
+        raise UploadError(409, "Upload is no longer open.")
+
+    with fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError(423, "Another request is writing to this upload.")
+
+        session.refresh_from_db()
+        if session.status != UploadSession.UPLOADING:
+            raise UploadError(409, f"Upload is {session.status}.")
+        if offset != session.offset:
+            raise UploadError(409, f"Upload-Offset must be {session.offset}.")
+        if offset >= session.length:
+            raise UploadError(409, "Upload is already complete.")
+        if os.fstat(fh.fileno()).st_size < offset:
+            raise UploadError(409, "Upload data is missing; the upload must be restarted.")
+
+        fh.truncate(offset)
+        fh.seek(offset)
+        hasher = hashlib.new(checksum[0]) if checksum else None
+        try:
+            written = _copy_chunk(stream, fh, session.length - offset, hasher)
+            if hasher is not None and hasher.digest() != checksum[1]:
+                raise UploadError(460, "Checksum mismatch.")
+        except BaseException:
+            fh.truncate(offset)
+            raise
+
+        fh.flush()
+        os.fsync(fh.fileno())
+        new_offset = offset + written
+        complete = new_offset == session.length
+        updated = UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.UPLOADING, offset=offset,
+        ).update(
+            offset=new_offset,
+            status=UploadSession.FINALIZING if complete else UploadSession.UPLOADING,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            fh.truncate(offset)
+            raise UploadError(409, "Upload changed while the chunk was written.")
+        session.refresh_from_db()
+
+    if complete:
+        finalize_upload(session)
+    return session
+
+
+def finalize_upload(session: UploadSession) -> Video:
+    """
+    Move a complete upload into the video storage and create its Video.
+
+    Only called by the request that switched the session to FINALIZING.
+    Creating the Video queues hashing, probing and the transcode jobs
+    (video_post_save). If moving the file or creating the Video fails, the
+    session is marked FAILED and the (partially) moved file removed, so no
+    file is left without a Video.
+
+    Args:
+        session (UploadSession): FINALIZING session whose offset reached
+            its length.
+
+    Returns:
+        Video: The created video.
+    """
+    storage = Video._meta.get_field("video_file").storage
+    name = storage.get_available_name(f"videos/{session.filename}")
+    target = Path(storage.path(name))
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(part_path(session), target)
+        video = Video.objects.create(
+            title=session.metadata["title"],
+            description=session.metadata.get("description", ""),
+            category=session.metadata["category"],
+            video_file=name,
+        )
+    except Exception:
+        logger.exception("Could not finalize upload %s", session.id)
+        target.unlink(missing_ok=True)
+        session.status = UploadSession.FAILED
+        session.save(update_fields=["status", "updated_at"])
+        raise
+
+    session.status = UploadSession.COMPLETE
+    session.video = video
+    session.save(update_fields=["status", "video", "updated_at"])
+    logger.info("Upload %s complete, created video %s", session.id, video.id)
+    return video
+
+
+def discard_session(session: UploadSession) -> None:
+    """
+    Delete an upload session and its temporary file.
+    """
+    part_path(session).unlink(missing_ok=True)
+    session.delete()
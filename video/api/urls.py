@@ -4,18 +4,68 @@ and HLS streaming resources.
 """
 
 from django.urls import path
-from .views import VideoListView, HLSManifestView, HLSSegmentView
+from .streaming import ASYNC_DELIVERY
+from .views import (
+    VideoListView,
+    AsyncHLSManifestView,
+    AsyncHLSMasterPlaylistView,
+    AsyncHLSSegmentView,
+    AsyncHLSSignedSegmentView,
+    AsyncHLSStoryboardView,
+    HLSMasterPlaylistView,
+    HLSManifestView,
+    HLSSegmentView,
+    HLSSignedSegmentView,
+    HLSStoryboardView,
+    TranscodeProgressView,
+    EncoderGovernorView,
+    UploadCreateView,
+    UploadDetailView,
+)
+
+
+def _hls_view(sync_view, async_view):
+    """
+    Return the view of an HLS route: the async one with VIDEO_ASYNC_DELIVERY
+    (ASGI deployments), the DRF one otherwise.
+    """
+    return (async_view if ASYNC_DELIVERY else sync_view).as_view()
+
 
 urlpatterns = [
     path("video/", VideoListView.as_view(), name="video_list"),
+    path("video/governor/", EncoderGovernorView.as_view(), name="encoder_governor"),
+    path("video/uploads/", UploadCreateView.as_view(), name="video_upload_create"),
+    path("video/uploads/<uuid:upload_id>/", UploadDetailView.as_view(), name="video_upload"),
+    path("video/progress/", TranscodeProgressView.as_view(), name="transcode_progress_list"),
+    path(
+        "video/<int:movie_id>/progress/",
+        TranscodeProgressView.as_view(),
+        name="transcode_progress",
+    ),
+    path(
+        "video/<int:movie_id>/master.m3u8",
+        _hls_view(HLSMasterPlaylistView, AsyncHLSMasterPlaylistView),
+        name="hls_master",
+    ),
+    path(
+        "video/<int:movie_id>/storyboard/<str:filename>",
+        _hls_view(HLSStoryboardView, AsyncHLSStoryboardView),
+        name="hls_storyboard",
+    ),
     path(
         "video/<int:movie_id>/<str:resolution>/index.m3u8",
-        HLSManifestView.as_view(),
+        _hls_view(HLSManifestView, AsyncHLSManifestView),
         name="hls_manifest",
     ),
+    path(
+        "video/<int:movie_id>/<str:resolution>/signed/<str:segment>",
+        _hls_view(HLSSignedSegmentView, AsyncHLSSignedSegmentView),
+        name="hls_signed_segment",
+    ),
     path(
         "video/<int:movie_id>/<str:resolution>/<str:segment>/",
-        HLSSegmentView.as_view(),
+        _hls_view(HLSSegmentView, AsyncHLSSegmentView),
         name="hls_segment",
     ),
 ]
@@ -0,0 +1,91 @@
+"""
+Incremental disk-usage accounting per video.
+
+Whenever the pipeline writes an asset (source upload, thumbnail, a
+finished HLS rendition, the storyboard) only that asset is measured and
+merged into the video's MediaUsage row, so the totals stay current
+without walking the whole media tree.
+"""
+
+import logging
+from pathlib import Path
+
+from django.db import transaction
+
+from ..models import MediaUsage, Video
+
+logger = logging.getLogger(__name__)
+
+
+def directory_bytes(path: Path) -> int:
+    """
+    Return the size of the files directly inside a directory.
+
+    Args:
+        path (Path): Directory to measure (not recursive).
+
+    Returns:
+        int: Size in bytes, 0 if the directory does not exist.
+    """
+    if not path.is_dir():
+        return 0
+    return sum(child.stat().st_size for child in path.iterdir() if child.is_file())
+
+
+def tree_bytes(path: Path) -> int:
+    """
+    Return the size of all files below a path (the path itself if it is a file).
+    """
+    if path.is_file():
+        return path.stat().st_size
+    if not path.is_dir():
+        return 0
+    return sum(child.stat().st_size for child in path.rglob("*") if child.is_file())
+
+
+def record_usage(video_id: int, sizes: dict) -> None:
+    """
+    Merge measured asset sizes into a video's usage totals.
+
+    A size of 0 removes the component. Videos that no longer exist are
+    ignored.
+
+    Args:
+        video_id (int): Identifier of the video.
+        sizes (dict[str, int]): Component name -> size in bytes.
+    """
+    with transaction.atomic():
+        if not Video.objects.filter(pk=video_id).exists():
+            return
+        usage, _ = MediaUsage.objects.select_for_update().get_or_create(video_id=video_id)
+        for name, size in sizes.items():
+            if size:
+                usage.components[name] = int(size)
+            else:
+                usage.components.pop(name, None)
+        usage.total_bytes = sum(usage.components.values())
+        usage.save(update_fields=["components", "total_bytes", "updated_at"])
+
+
+def record_directory_usage(movie_id: int, directories: dict) -> None:
+    """
+    Measure finished output directories and record them as components.
+
+    Failures are only logged; accounting never fails a transcode.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        directories (dict[str, Path]): Component name ("hls:<resolution>",
+            "storyboard") -> directory.
+    """
+    try:
+        record_usage(movie_id, {name: directory_bytes(d) for name, d in directories.items()})
+    except Exception as exc:
+        logger.warning("Could not record disk usage of movie %s: %s", movie_id, exc)
+
+
+def rendition_components(output_dirs: dict) -> dict:
+    """
+    Name rendition output directories as usage components ("hls:<resolution>").
+    """
+    return {f"hls:{res}": output_dir for res, output_dir in output_dirs.items()}
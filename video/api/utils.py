@@ -3,9 +3,36 @@ Utility functions for resolving, validating, and serving HLS video files.
 Ensures secure path handling and provides helpers for HLS manifest and segment delivery.
 """
 
+import hashlib
+import re
 from pathlib import Path
+from stat import S_ISREG
+from urllib.parse import quote
 from django.conf import settings
-from django.http import FileResponse, Http404, HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from .signing import sign_playlist
+
+
+SEGMENT_CONTENT_TYPES = {
+    ".ts": "video/MP2T",
+    ".mp4": "video/mp4",
+    ".m4s": "video/iso.segment",
+}
+
+STORYBOARD_CONTENT_TYPES = {
+    ".vtt": "text/vtt",
+    ".jpg": "image/jpeg",
+    ".webp": "image/webp",
+}
+
+PLAYLIST_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+
+DELIVERY_MODES = ("direct", "x-accel", "x-sendfile")
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_STORYBOARD_FILE_RE = re.compile(r"^(storyboard\.vtt|sprite_\d{3,}\.(jpg|webp))$")
 
 
 def allowed_resolutions():
@@ -42,6 +69,38 @@ def hls_root():
     return Path(root) if root else Path(settings.MEDIA_ROOT) / "hls"
 
 
+def delivery_mode() -> str:
+    """
+    Return how HLS files are sent: "direct", "x-accel" or "x-sendfile".
+
+    Unknown values of VIDEO_DELIVERY_MODE fall back to "direct".
+    """
+    mode = str(getattr(settings, "VIDEO_DELIVERY_MODE", "direct")).strip().lower()
+    return mode if mode in DELIVERY_MODES else "direct"
+
+
+def _safe_path(*parts):
+    """
+    Join path parts below the HLS root and reject anything that escapes it.
+
+    Args:
+        *parts: Path components relative to the HLS root.
+
+    Returns:
+        Path: The resolved absolute path.
+
+    Raises:
+        Http404: If the resolved path escapes the HLS root.
+    """
+    base = hls_root().resolve()
+    path = base.joinpath(*(str(part) for part in parts)).resolve()
+
+    if base not in path.parents and base != path:
+        raise Http404("Not found")
+
+    return path
+
+
 def safe_hls_path(movie_id: int, resolution: str, filename: str):
     """
     Construct an absolute, sanitized filesystem path to an HLS file.
@@ -60,25 +119,45 @@ def safe_hls_path(movie_id: int, resolution: str, filename: str):
     Raises:
         Http404: If the resolved path escapes the HLS root.
     """
-    base = hls_root().resolve()
-    path = (base / str(movie_id) / resolution / filename).resolve()
+    return _safe_path(movie_id, resolution, filename)
 
-    if base not in path.parents and base != path:
-        raise Http404("Not found")
 
-    return path
+def serve_master_m3u8(movie_id: int, range_header=None, if_range=None, **conditions):
+    """
+    Serve the adaptive-bitrate master playlist (master.m3u8) of a movie.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        range_header (str | None): Value of the request's Range header.
+        if_range (str | None): Value of the request's If-Range header.
+        **conditions: if_none_match / if_modified_since, see file_response().
+
+    Returns:
+        HttpResponse: The master playlist response, see file_response().
+
+    Raises:
+        Http404: If the path is unsafe or the playlist does not exist yet.
+    """
+    path = _safe_path(movie_id, "master.m3u8")
+    return file_response(
+        path, PLAYLIST_CONTENT_TYPE, range_header, if_range,
+        cache_control=playlist_cache_control(), **conditions,
+    )
 
 
-def serve_m3u8(movie_id: int, resolution: str):
+def serve_m3u8(movie_id: int, resolution: str, range_header=None, if_range=None, **conditions):
     """
     Serve the HLS playlist (index.m3u8) for a given movie and resolution.
 
     Args:
         movie_id (int): Identifier of the video.
         resolution (str): Resolution directory.
-    
+        range_header (str | None): Value of the request's Range header.
+        if_range (str | None): Value of the request's If-Range header.
+        **conditions: if_none_match / if_modified_since, see file_response().
+
     Returns:
-        FileResponse: The playlist response.
+        HttpResponse: The playlist response, see file_response().
 
     Raises:
         Http404: If the resolution is invalid or the file does not exist.
@@ -87,28 +166,353 @@ def serve_m3u8(movie_id: int, resolution: str):
         raise Http404("Not found")
 
     path = safe_hls_path(movie_id, resolution, "index.m3u8")
-    if not path.exists():
+    return file_response(
+        path, PLAYLIST_CONTENT_TYPE, range_header, if_range,
+        cache_control=playlist_cache_control(), **conditions,
+    )
+
+
+def serve_signed_m3u8(movie_id: int, resolution: str, user_id, if_none_match=None):
+    """
+    Serve a rendition's playlist with signed, expiring segment URLs.
+
+    The ETag is a hash of the rewritten playlist; it only changes when the
+    playlist is replaced or the URLs' expiry bucket rolls over.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        resolution (str): Resolution directory.
+        user_id (int): Id of the authenticated viewer the URLs are bound to.
+        if_none_match (str | None): Raw If-None-Match header value.
+
+    Returns:
+        HttpResponse: The rewritten playlist (see signing.sign_playlist()),
+            or 304 if the client's copy is current.
+
+    Raises:
+        Http404: If the resolution is invalid or the file does not exist.
+    """
+    if resolution not in allowed_resolutions():
         raise Http404("Not found")
 
-    resp = FileResponse(
-        open(path, "rb"),
-        content_type="application/vnd.apple.mpegurl",
-    )
-    resp["Content-Disposition"] = 'inline; filename="index.m3u8"'
+    path = safe_hls_path(movie_id, resolution, "index.m3u8")
+    if not path.is_file():
+        raise Http404("Not found")
+
+    body = sign_playlist(path.read_text(), user_id, movie_id, resolution).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    if is_not_modified(etag, 0, if_none_match):
+        resp = HttpResponseNotModified()
+    else:
+        resp = HttpResponse(body, content_type=PLAYLIST_CONTENT_TYPE)
+        resp["Content-Disposition"] = 'inline; filename="index.m3u8"'
+    resp["ETag"] = etag
+    resp["Cache-Control"] = playlist_cache_control()
     return resp
 
 
-def serve_segment(movie_id: int, resolution: str, segment: str):
+def parse_range(header, size: int):
+    """
+    Parse a single-range "Range: bytes=..." header.
+
+    Args:
+        header (str | None): Raw Range header value.
+        size (int): Size of the file in bytes.
+
+    Returns:
+        tuple[int, int] | None: Inclusive (start, end) byte positions, or
+            None if the header is absent, invalid (e.g. last < first) or not
+            a single byte range (the whole file is served then, RFC 9110
+            section 14.2).
+
+    Raises:
+        ValueError: If the range starts at or beyond the end of the file.
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+
+    if start >= size:
+        raise ValueError(f"Range {header!r} not satisfiable for {size} bytes")
+    return start, end
+
+
+def file_validators(stat) -> tuple:
+    """
+    Return the ETag and Last-Modified values of a file.
+
+    The ETag changes whenever the file's size or modification time does,
+    which is the case for every rewrite of a playlist or segment.
+
+    Args:
+        stat (os.stat_result): Result of Path.stat() for the file.
+
+    Returns:
+        tuple[str, str]: (quoted strong ETag, HTTP date).
+    """
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', http_date(stat.st_mtime)
+
+
+def if_range_matches(if_range, etag: str, last_modified: str) -> bool:
+    """
+    Check an If-Range precondition against the file's current validators.
+
+    Only a strong ETag or an exact Last-Modified date matches; otherwise
+    the Range header must be ignored and the whole file sent.
+
+    Args:
+        if_range (str | None): Raw If-Range header value.
+        etag (str): Current ETag, see file_validators().
+        last_modified (str): Current Last-Modified date.
+
+    Returns:
+        bool: True if the Range header applies.
+    """
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and date == parse_http_date_safe(last_modified)
+
+
+def is_not_modified(etag: str, mtime: float, if_none_match=None, if_modified_since=None) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since for a GET or HEAD request.
+
+    If-None-Match takes precedence and uses the weak comparison; the date
+    is only looked at without it.
+
+    Args:
+        etag (str): Current ETag, see file_validators().
+        mtime (float): Modification time of the file.
+        if_none_match (str | None): Raw If-None-Match header value.
+        if_modified_since (str | None): Raw If-Modified-Since header value.
+
+    Returns:
+        bool: True if the client's copy is current (answer 304).
+    """
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        current = etag.removeprefix("W/")
+        return any(tag.removeprefix("W/") == current for tag in parse_etags(if_none_match))
+    if if_modified_since:
+        since = parse_http_date_safe(if_modified_since)
+        return since is not None and int(mtime) <= since
+    return False
+
+
+def playlist_cache_control() -> str:
+    """
+    Return the Cache-Control value of playlists and storyboard files.
+
+    They can be replaced (e.g. by the high-quality pass), so they are only
+    cached for VIDEO_PLAYLIST_MAX_AGE seconds (0 = revalidate every time).
+    """
+    max_age = int(getattr(settings, "VIDEO_PLAYLIST_MAX_AGE", 5))
+    return f"private, max-age={max_age}" if max_age > 0 else "private, no-cache"
+
+
+def segment_cache_control() -> str:
+    """
+    Return the Cache-Control value of media segments.
+
+    A published segment never changes (replacements use new file names),
+    so it may be cached for VIDEO_SEGMENT_MAX_AGE seconds without
+    revalidation.
+    """
+    max_age = int(getattr(settings, "VIDEO_SEGMENT_MAX_AGE", 365 * 24 * 3600))
+    return f"private, max-age={max_age}, immutable"
+
+
+class RangeFileWrapper:
+    """
+    File-like view of a byte window of an open file.
+
+    read() never returns data past the window, so FileResponse streams
+    exactly the requested range in block-sized reads. The wrapper does not
+    expose fileno(), which keeps servers from sendfile()-ing the whole file.
+    """
+
+    def __init__(self, fh, start: int, length: int):
+        fh.seek(start)
+        self._fh = fh
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read at most `size` bytes (all that is left of the window if negative).
+        """
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        """
+        Close the underlying file.
+        """
+        self._fh.close()
+
+
+def offload_response(path: Path, content_type: str, mode: str, cache_control: str = None):
+    """
+    Hand the transfer of a checked file over to the web server.
+
+    With "x-accel" nginx serves VIDEO_ACCEL_REDIRECT_PREFIX + the path
+    below HLS_ROOT from an internal location; with "x-sendfile" the server
+    (Apache mod_xsendfile, lighttpd) sends the absolute path. The web
+    server then handles Range, If-Range and conditional requests itself.
+
+    Args:
+        path (Path): Resolved file below the HLS root.
+        content_type (str): Value of the Content-Type header.
+        mode (str): "x-accel" or "x-sendfile".
+        cache_control (str | None): Value of the Cache-Control header.
+
+    Returns:
+        HttpResponse: An empty response carrying the redirect header.
+    """
+    resp = HttpResponse(content_type=content_type)
+    if cache_control:
+        resp["Cache-Control"] = cache_control
+    if mode == "x-accel":
+        prefix = str(getattr(settings, "VIDEO_ACCEL_REDIRECT_PREFIX", "/protected-hls/"))
+        relative = path.relative_to(hls_root().resolve()).as_posix()
+        resp["X-Accel-Redirect"] = quote(f"{prefix.rstrip('/')}/{relative}")
+    else:
+        resp["X-Sendfile"] = str(path)
+    resp["Content-Disposition"] = f'inline; filename="{path.name}"'
+    return resp
+
+
+def file_response(
+    path: Path,
+    content_type: str,
+    range_header=None,
+    if_range=None,
+    *,
+    if_none_match=None,
+    if_modified_since=None,
+    cache_control: str = None,
+):
+    """
+    Stream a file, honouring conditional requests and a single byte range.
+
+    Validators (ETag, Last-Modified) come from one stat() of the path; if
+    If-None-Match or If-Modified-Since shows the client's copy is current,
+    304 is returned without opening the file. Otherwise a valid single
+    range (including suffix ranges such as "bytes=-500") is answered with
+    206 Partial Content and only that window is read from disk, and a
+    range beyond the end of the file with 416. If-Range that no longer
+    matches the file, multiple ranges and malformed headers get the whole
+    file (200).
+
+    If VIDEO_DELIVERY_MODE selects a web-server offload, only the internal
+    redirect is returned, see offload_response().
+
+    Args:
+        path (Path): File to send (already checked to be below HLS_ROOT).
+        content_type (str): Value of the Content-Type header.
+        range_header (str | None): Value of the request's Range header.
+        if_range (str | None): Value of the request's If-Range header.
+        if_none_match (str | None): Value of the If-None-Match header.
+        if_modified_since (str | None): Value of the If-Modified-Since header.
+        cache_control (str | None): Value of the Cache-Control header.
+
+    Returns:
+        HttpResponse: FileResponse (200 or 206), 304 or a 416 HttpResponse.
+
+    Raises:
+        Http404: If the path is not a regular file.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        raise Http404("Not found")
+    if not S_ISREG(stat.st_mode):
+        raise Http404("Not found")
+
+    mode = delivery_mode()
+    if mode != "direct":
+        return offload_response(path, content_type, mode, cache_control)
+
+    etag, last_modified = file_validators(stat)
+    if is_not_modified(etag, stat.st_mtime, if_none_match, if_modified_since):
+        resp = HttpResponseNotModified()
+        resp["ETag"] = etag
+        resp["Last-Modified"] = last_modified
+        if cache_control:
+            resp["Cache-Control"] = cache_control
+        return resp
+
+    size = stat.st_size
+    try:
+        byte_range = (
+            parse_range(range_header, size)
+            if if_range_matches(if_range, etag, last_modified) else None
+        )
+    except ValueError:
+        resp = HttpResponse(status=416)
+        resp["Content-Range"] = f"bytes */{size}"
+        resp["Accept-Ranges"] = "bytes"
+        return resp
+
+    fh = open(path, "rb")
+    if byte_range is None:
+        resp = FileResponse(fh, content_type=content_type)
+    else:
+        start, end = byte_range
+        resp = FileResponse(
+            RangeFileWrapper(fh, start, end - start + 1), status=206, content_type=content_type,
+        )
+        resp["Content-Length"] = str(end - start + 1)
+        resp["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    resp["Accept-Ranges"] = "bytes"
+    resp["ETag"] = etag
+    resp["Last-Modified"] = last_modified
+    if cache_control:
+        resp["Cache-Control"] = cache_control
+    resp["Content-Disposition"] = f'inline; filename="{path.name}"'
+    return resp
+
+
+def serve_segment(movie_id: int, resolution: str, segment: str, range_header=None, if_range=None, **conditions):
     """
     Serve an HLS segment file for a given movie and resolution.
 
+    MPEG-TS segments and fragmented MP4 (CMAF) media files are supported;
+    the content type follows the file extension. A single byte range is
+    answered with 206 Partial Content, which players use to fetch the
+    EXT-X-BYTERANGE slices of a single-file fMP4 rendition and to resume
+    an interrupted segment download.
+
     Args:
         movie_id (int): Identifier of the video.
         resolution (str): Resolution directory.
         segment (str): The filename of the segment.
+        range_header (str | None): Value of the request's Range header.
+        if_range (str | None): Value of the request's If-Range header.
+        **conditions: if_none_match / if_modified_since, see file_response().
 
     Returns:
-        FileResponse: The video segment.
+        HttpResponse: The full segment (200), the requested range (206),
+            304 if the client's copy is current or 416 if the range cannot
+            be satisfied.
 
     Raises:
         Http404: If the resolution is invalid, filename is unsafe, or file is missing.
@@ -116,16 +520,43 @@ def serve_segment(movie_id: int, resolution: str, segment: str):
     if resolution not in allowed_resolutions():
         raise Http404("Not found")
 
-    if "/" in segment or "\\" in segment:
+    if "/" in segment or "\\" in segment or segment.startswith("."):
+        raise Http404("Not found")
+
+    content_type = SEGMENT_CONTENT_TYPES.get(Path(segment).suffix.lower())
+    if content_type is None:
         raise Http404("Not found")
 
     path = safe_hls_path(movie_id, resolution, segment)
-    if not path.exists():
+    return file_response(
+        path, content_type, range_header, if_range,
+        cache_control=segment_cache_control(), **conditions,
+    )
+
+
+def serve_storyboard(movie_id: int, filename: str, range_header=None, if_range=None, **conditions):
+    """
+    Serve the trickplay storyboard (storyboard.vtt) or one of its sprite sheets.
+
+    Args:
+        movie_id (int): Identifier of the video.
+        filename (str): "storyboard.vtt" or a sprite sheet such as
+            "sprite_000.jpg".
+        range_header (str | None): Value of the request's Range header.
+        if_range (str | None): Value of the request's If-Range header.
+        **conditions: if_none_match / if_modified_since, see file_response().
+
+    Returns:
+        HttpResponse: The requested file, see file_response().
+
+    Raises:
+        Http404: If the filename is not a storyboard file or does not exist.
+    """
+    if not _STORYBOARD_FILE_RE.match(filename):
         raise Http404("Not found")
 
-    resp = FileResponse(
-        open(path, "rb"),
-        content_type="video/MP2T",
+    path = _safe_path(movie_id, "storyboard", filename)
+    return file_response(
+        path, STORYBOARD_CONTENT_TYPES[path.suffix], range_header, if_range,
+        cache_control=playlist_cache_control(), **conditions,
     )
-    resp["Content-Disposition"] = f'inline; filename="{segment}"'
-    return resp
@@ -2,16 +2,67 @@
 API views for listing videos and serving protected HLS video streams.
 """
 
+from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.urls import reverse
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
 
+from core.api.checkpoint import checkpoint_state
+from core.api.governor import governor_metrics
+from core.api.progress import get_active_progress, get_progress
+
 from .serializers import VideoListSerializer
-from ..models import Video
+from ..models import UploadSession, Video
 from .permissions import CookieJWTAuthentication
-from .utils import serve_m3u8, serve_segment
+from .uploads import (
+    CHECKSUM_ALGORITHMS,
+    MAX_UPLOAD_SIZE,
+    TUS_EXTENSIONS,
+    TUS_VERSION,
+    UploadError,
+    append_chunk,
+    create_session,
+    discard_session,
+    parse_checksum,
+    parse_upload_metadata,
+)
+from .asset_index import ASSET_INDEX, serve_indexed_segment
+from .signing import SIGNED_SEGMENTS, verify_segment_request
+from .streaming import authenticate_request, serve_async
+from .utils import (
+    hls_root,
+    serve_m3u8,
+    serve_master_m3u8,
+    serve_segment,
+    serve_signed_m3u8,
+    serve_storyboard,
+)
+
+
+def _file_headers(request) -> dict:
+    """
+    Return the request's Range and conditional headers as keyword arguments
+    for the serve_* helpers.
+    """
+    return {
+        "range_header": request.headers.get("Range"),
+        "if_range": request.headers.get("If-Range"),
+        "if_none_match": request.headers.get("If-None-Match"),
+        "if_modified_since": request.headers.get("If-Modified-Since"),
+    }
+
+
+def _serve_segment(movie_id: int, resolution: str, segment: str, **headers):
+    """
+    Serve a segment through the asset index, or by probing the file system
+    if VIDEO_ASSET_INDEX is off.
+    """
+    serve = serve_indexed_segment if ASSET_INDEX else serve_segment
+    return serve(movie_id, resolution, segment, **headers)
 
 
 class VideoListView(APIView):
@@ -41,6 +92,27 @@ class VideoListView(APIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
+class HLSMasterPlaylistView(APIView):
+    """
+    Serve the adaptive-bitrate master playlist (master.m3u8) for a movie.
+    """
+
+    authentication_classes = [CookieJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, movie_id: int):
+        """
+        Return the master playlist listing every finished rendition.
+
+        Args:
+            movie_id (int): Identifier of the video.
+
+        Returns:
+            FileResponse: The master playlist, or 404 if not found.
+        """
+        return serve_master_m3u8(movie_id, **_file_headers(request))
+
+
 class HLSManifestView(APIView):
     """
     Serve the HLS manifest (index.m3u8) for a given movie and resolution.
@@ -57,10 +129,17 @@ class HLSManifestView(APIView):
             movie_id (int): Identifier of the video.
             resolution (str): Requested resolution (e.g. "480p").
 
+        With VIDEO_SIGNED_SEGMENTS the segment URIs are rewritten into
+        signed URLs for HLSSignedSegmentView, bound to the current user.
+
         Returns:
-            FileResponse: The HLS playlist, or 404 if not found.
+            HttpResponse: The HLS playlist, or 404 if not found.
         """
-        return serve_m3u8(movie_id, resolution)
+        if SIGNED_SEGMENTS:
+            return serve_signed_m3u8(
+                movie_id, resolution, request.user.pk, request.headers.get("If-None-Match"),
+            )
+        return serve_m3u8(movie_id, resolution, **_file_headers(request))
 
 
 class HLSSegmentView(APIView):
@@ -78,9 +157,428 @@ class HLSSegmentView(APIView):
         Args:
             movie_id (int): Identifier of the video.
             resolution (str): Requested resolution (e.g. "480p").
-            segment (str): Segment filename (e.g. "segment_001.ts").
+            segment (str): Segment filename (e.g. "segment_001.ts" or
+                "segment.mp4" for fMP4 renditions).
+
+        Returns:
+            HttpResponse: The HLS segment or the requested byte range, or
+                404 if not found.
+        """
+        return _serve_segment(movie_id, resolution, segment, **_file_headers(request))
+
+
+class HLSSignedSegmentView(View):
+    """
+    Serve an HLS segment authorized by the signed URL from the manifest.
+
+    A plain Django view: the request is neither authenticated through a
+    JWT nor does it touch the database, only the HMAC in the query string
+    is verified (in constant time).
+    """
+
+    def get(self, request, movie_id: int, resolution: str, segment: str):
+        """
+        Return the segment if the URL's signature is valid and not expired.
+
+        Args:
+            movie_id (int): Identifier of the video.
+            resolution (str): Requested resolution (e.g. "480p").
+            segment (str): Segment filename.
+
+        Returns:
+            HttpResponse: The segment (see serve_segment()), or 403 if the
+                signature is missing, wrong or expired.
+        """
+        if not verify_segment_request(movie_id, resolution, request.GET):
+            return HttpResponseForbidden("Invalid or expired segment URL.")
+        return _serve_segment(movie_id, resolution, segment, **_file_headers(request))
+
+
+class HLSStoryboardView(APIView):
+    """
+    Serve the trickplay storyboard (WebVTT and sprite sheets) of a movie.
+    """
+
+    authentication_classes = [CookieJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, movie_id: int, filename: str):
+        """
+        Return storyboard.vtt or one sprite sheet referenced by it.
+
+        Args:
+            movie_id (int): Identifier of the video.
+            filename (str): "storyboard.vtt" or e.g. "sprite_000.jpg".
+
+        Returns:
+            FileResponse: The storyboard file, or 404 if not found.
+        """
+        return serve_storyboard(movie_id, filename, **_file_headers(request))
+
+
+class AsyncHLSView(View):
+    """
+    Base of the async HLS views routed instead of the DRF ones when
+    VIDEO_ASYNC_DELIVERY is set (ASGI deployments, see video.api.streaming).
+
+    Keeps the DRF views' contract: the viewer must be authenticated through
+    the access token cookie or the session (403 otherwise), and errors are
+    answered with a JSON "detail". The authenticated user is available as
+    request.user in the handlers.
+    """
+
+    authenticated = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Authenticate the viewer (unless `authenticated` is False) and run
+        the handler.
+
+        Returns:
+            HttpResponse: The handler's response, 403 with a JSON detail if
+                authentication fails, or 404 if the file does not exist.
+        """
+        try:
+            if self.authenticated:
+                request.user = await authenticate_request(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=status.HTTP_403_FORBIDDEN)
+        except Http404:
+            return JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncHLSMasterPlaylistView(AsyncHLSView):
+    """
+    Async counterpart of HLSMasterPlaylistView.
+    """
+
+    async def get(self, request, movie_id: int):
+        """
+        Return the master playlist listing every finished rendition.
+
+        Args:
+            movie_id (int): Identifier of the video.
+
+        Returns:
+            HttpResponse: The master playlist, streamed from disk.
+        """
+        return await serve_async(serve_master_m3u8, movie_id, **_file_headers(request))
+
+
+class AsyncHLSManifestView(AsyncHLSView):
+    """
+    Async counterpart of HLSManifestView.
+    """
+
+    async def get(self, request, movie_id: int, resolution: str):
+        """
+        Return the HLS manifest of a rendition, with signed segment URLs
+        if VIDEO_SIGNED_SEGMENTS is set.
+
+        Args:
+            movie_id (int): Identifier of the video.
+            resolution (str): Requested resolution (e.g. "480p").
+
+        Returns:
+            HttpResponse: The HLS playlist.
+        """
+        if SIGNED_SEGMENTS:
+            return await serve_async(
+                serve_signed_m3u8, movie_id, resolution, request.user.pk,
+                request.headers.get("If-None-Match"),
+            )
+        return await serve_async(serve_m3u8, movie_id, resolution, **_file_headers(request))
+
+
+class AsyncHLSSegmentView(AsyncHLSView):
+    """
+    Async counterpart of HLSSegmentView.
+    """
+
+    async def get(self, request, movie_id: int, resolution: str, segment: str):
+        """
+        Return a single HLS segment, or the requested byte range of it.
+
+        Args:
+            movie_id (int): Identifier of the video.
+            resolution (str): Requested resolution (e.g. "480p").
+            segment (str): Segment filename.
+
+        Returns:
+            HttpResponse: The segment, streamed in bounded chunks.
+        """
+        return await serve_async(_serve_segment, movie_id, resolution, segment, **_file_headers(request))
+
+
+class AsyncHLSSignedSegmentView(AsyncHLSView):
+    """
+    Async counterpart of HLSSignedSegmentView; only the URL's HMAC is checked.
+    """
+
+    authenticated = False
+
+    async def get(self, request, movie_id: int, resolution: str, segment: str):
+        """
+        Return the segment if the URL's signature is valid and not expired.
+
+        Args:
+            movie_id (int): Identifier of the video.
+            resolution (str): Requested resolution (e.g. "480p").
+            segment (str): Segment filename.
+
+        Returns:
+            HttpResponse: The segment, or 403 if the signature is missing,
+                wrong or expired.
+        """
+        if not verify_segment_request(movie_id, resolution, request.GET):
+            return HttpResponseForbidden("Invalid or expired segment URL.")
+        return await serve_async(_serve_segment, movie_id, resolution, segment, **_file_headers(request))
+
+
+class AsyncHLSStoryboardView(AsyncHLSView):
+    """
+    Async counterpart of HLSStoryboardView.
+    """
+
+    async def get(self, request, movie_id: int, filename: str):
+        """
+        Return storyboard.vtt or one sprite sheet referenced by it.
+
+        Args:
+            movie_id (int): Identifier of the video.
+            filename (str): "storyboard.vtt" or e.g. "sprite_000.jpg".
+
+        Returns:
+            HttpResponse: The storyboard file.
+        """
+        return await serve_async(serve_storyboard, movie_id, filename, **_file_headers(request))
+
+
+class TranscodeProgressView(APIView):
+    """
+    Report live transcode progress for one video or for all active jobs.
+
+    The single-video response also lists the checkpoint state on disk,
+    i.e. how many segments per rendition are verified and would be reused
+    if the transcode job is retried.
+    """
+
+    authentication_classes = [CookieJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, movie_id: int = None):
+        """
+        Return percent done, encode speed and ETA per rendition.
+
+        Args:
+            movie_id (int | None): Identifier of the video. If omitted, all
+                videos with a running transcode job are returned.
+
+        Returns:
+            Response: 200 with the progress entries, or 404 if the video
+                has neither recorded progress nor HLS output.
+        """
+        if movie_id is None:
+            data = [
+                {"movie_id": active_id, "renditions": renditions}
+                for active_id, renditions in get_active_progress().items()
+            ]
+            return Response(data, status=status.HTTP_200_OK)
+
+        renditions = get_progress(movie_id)
+        checkpoints = checkpoint_state(hls_root() / str(movie_id))
+        if not renditions and not checkpoints:
+            return Response({"detail": "No progress recorded."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {"movie_id": movie_id, "renditions": renditions, "checkpoints": checkpoints},
+            status=status.HTTP_200_OK,
+        )
+
+
+class EncoderGovernorView(APIView):
+    """
+    Report saturation of the shared encoder thread budget (staff only).
+    """
+
+    authentication_classes = [CookieJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Return the thread budget, threads in use, active leases and the
+        lease/wait counters used to tune worker counts.
+
+        Returns:
+            Response: 200 with the metrics.
+        """
+        return Response(governor_metrics(), status=status.HTTP_200_OK)
+
+
+def _tus_response(data=None, status_code=status.HTTP_204_NO_CONTENT, session=None):
+    """
+    Build a response carrying the tus protocol headers.
+
+    Args:
+        data (dict | None): Response body.
+        status_code (int): HTTP status.
+        session (UploadSession | None): Adds Upload-Offset/Upload-Length.
+
+    Returns:
+        Response: The response.
+    """
+    response = Response(data, status=status_code)
+    response["Tus-Resumable"] = TUS_VERSION
+    response["Cache-Control"] = "no-store"
+    if session is not None:
+        response["Upload-Offset"] = str(session.offset)
+        response["Upload-Length"] = str(session.length)
+    if status_code == 460:
+        response.reason_phrase = "Checksum Mismatch"
+    return response
+
+
+class UploadCreateView(APIView):
+    """
+    Create a resumable upload session (staff only, tus "creation").
+    """
+
+    authentication_classes = [CookieJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def options(self, request, *args, **kwargs):
+        """
+        Advertise the supported tus version, extensions and limits.
+        """
+        response = _tus_response()
+        response["Tus-Version"] = TUS_VERSION
+        response["Tus-Extension"] = TUS_EXTENSIONS
+        response["Tus-Max-Size"] = str(MAX_UPLOAD_SIZE)
+        response["Tus-Checksum-Algorithm"] = ",".join(CHECKSUM_ALGORITHMS)
+        return response
+
+    def post(self, request):
+        """
+        Open an upload for a file of Upload-Length bytes.
+
+        Upload-Metadata carries the base64-encoded filename, title,
+        category and optional description of the video to create.
+
+        Returns:
+            Response: 201 with the session URL in Location, or 400/413.
+        """
+        try:
+            length = int(request.headers.get("Upload-Length", ""))
+        except ValueError:
+            return _tus_response({"detail": "Upload-Length is required."}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            metadata = parse_upload_metadata(request.headers.get("Upload-Metadata", ""))
+            session = create_session(request.user, length, metadata)
+        except UploadError as exc:
+            return _tus_response({"detail": str(exc)}, exc.status)
+
+        response = _tus_response(
+            {"id": str(session.id)}, status.HTTP_201_CREATED, session=session,
+        )
+        response["Location"] = request.build_absolute_uri(
+            reverse("video:video_upload", args=[session.id])
+        )
+        return response
+
+
+class UploadDetailView(APIView):
+    """
+    Query, append to or cancel a resumable upload (staff only).
+    """
+
+    authentication_classes = [CookieJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def _session(self, upload_id):
+        """
+        Return the upload session or None.
+        """
+        return UploadSession.objects.filter(pk=upload_id).first()
+
+    def head(self, request, upload_id):
+        """
+        Return the current offset so an interrupted client can resume.
+
+        Returns:
+            Response: 200 with Upload-Offset and Upload-Length, or 404.
+        """
+        session = self._session(upload_id)
+        if session is None:
+            return _tus_response(status_code=status.HTTP_404_NOT_FOUND)
+        return _tus_response(status_code=status.HTTP_200_OK, session=session)
+
+    def get(self, request, upload_id):
+        """
+        Return the upload state and, once complete, the created video's id.
+
+        Returns:
+            Response: 200 with the session, or 404.
+        """
+        session = self._session(upload_id)
+        if session is None:
+            return _tus_response({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+        data = {
+            "id": str(session.id),
+            "filename": session.filename,
+            "offset": session.offset,
+            "length": session.length,
+            "status": session.status,
+            "video_id": session.video_id,
+        }
+        return _tus_response(data, status.HTTP_200_OK, session=session)
+
+    def patch(self, request, upload_id):
+        """
+        Append the request body at Upload-Offset.
+
+        The body must be sent as application/offset+octet-stream; an
+        optional Upload-Checksum ("sha1 <base64>") is verified before the
+        chunk counts. The chunk that completes the file creates the Video.
+
+        Returns:
+            Response: 204 with the new Upload-Offset, 404 for an unknown
+                upload, 409 on an offset mismatch, 415 for a wrong content
+                type, 423 while another chunk is written, 460 on a
+                checksum mismatch.
+        """
+        if request.content_type != "application/offset+octet-stream":
+            return _tus_response(
+                {"detail": "Content-Type must be application/offset+octet-stream."},
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return _tus_response({"detail": "Upload-Offset is required."}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            checksum = parse_checksum(request.headers.get("Upload-Checksum"))
+            session = append_chunk(upload_id, offset, request.stream, checksum)
+        except UploadSession.DoesNotExist:
+            return _tus_response({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+        except UploadError as exc:
+            return _tus_response({"detail": str(exc)}, exc.status, session=self._session(upload_id))
+
+        response = _tus_response(session=session)
+        if session.video_id:
+            response["Video-Id"] = str(session.video_id)
+        return response
+
+    def delete(self, request, upload_id):
+        """
+        Cancel an upload and delete its temporary file (tus "termination").
 
         Returns:
-            FileResponse: The HLS segment, or 404 if not found.
+            Response: 204, or 404 for an unknown upload.
         """
-        return serve_segment(movie_id, resolution, segment)
+        session = self._session(upload_id)
+        if session is None:
+            return _tus_response({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+        discard_session(session)
+        return _tus_response()
@@ -0,0 +1,365 @@
+"""
+Management command that measures how many concurrent HLS viewers one
+application server process sustains on the WSGI and on the ASGI path.
+"""
+
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.api.playlists import MEDIA_PLAYLIST, Segment, write_media_playlist
+from video.api.asset_index import forget_asset_index
+from video.api.signing import signed_query
+from video.api.utils import allowed_resolutions
+
+from .benchmark_suite import _git_revision, _split
+
+# Movie id 0 never belongs to a Video, so the benchmark cannot shadow the
+# asset index of a real title.
+BENCH_MOVIE_ID = 0
+SEGMENT_NAME = "segment_000.ts"
+READ_SIZE = 64 * 1024
+
+SERVERS = {
+    "wsgi": ["core.wsgi:application"],
+    "asgi": ["core.asgi:application", "-k", "uvicorn_worker.UvicornWorker"],
+}
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    Return the q-th percentile (0-100) of a list of numbers, or 0.0 if empty.
+    """
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[min(max(int(q), 1), 99) - 1]
+
+
+def viewers_per_process(levels: list, ttfb_budget: float) -> int:
+    """
+    Return the largest tested viewer count the server handled acceptably.
+
+    A level passes if no request failed and the 95th percentile of the time
+    to first byte stayed within the budget; levels above the first failing
+    one do not count.
+
+    Args:
+        levels (list[dict]): Level summaries in ascending viewer order.
+        ttfb_budget (float): Allowed p95 time to first byte in seconds.
+
+    Returns:
+        int: Viewer count of the last passing level, 0 if none passed.
+    """
+    sustained = 0
+    for level in levels:
+        if level["errors"] or level["ttfb_p95"] > ttfb_budget:
+            break
+        sustained = level["viewers"]
+    return sustained
+
+
+def _free_port() -> int:
+    """
+    Return a TCP port on 127.0.0.1 that is currently unused.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, proc, timeout: float = 30.0) -> None:
+    """
+    Wait until a server accepts connections on a port.
+
+    Raises:
+        CommandError: If the server exits or does not come up in time.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise CommandError(f"Server exited with code {proc.returncode}.")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server did not listen on port {port} within {timeout:.0f}s.")
+
+
+def start_server(mode: str, port: int, hls_dir: Path, threads: int, log):
+    """
+    Start one gunicorn process serving the project through WSGI or ASGI.
+
+    Both modes run a single worker against the benchmark's HLS root with
+    direct delivery; only ASGI turns on the async HLS views.
+
+    Args:
+        mode (str): "wsgi" or "asgi".
+        port (int): Port to bind on 127.0.0.1.
+        hls_dir (Path): HLS_ROOT of the server.
+        threads (int): Threads of the WSGI worker (1 = sync worker, as deployed).
+        log: Open file receiving the server's output.
+
+    Returns:
+        subprocess.Popen: The running server.
+    """
+    env = {
+        **os.environ,
+        "HLS_ROOT": str(hls_dir),
+        "VIDEO_ASYNC_DELIVERY": str(mode == "asgi"),
+        "VIDEO_DELIVERY_MODE": "direct",
+        "SECURE_SSL_REDIRECT": "False",
+        "ALLOWED_HOSTS": "127.0.0.1",
+    }
+    command = [
+        sys.executable, "-m", "gunicorn", *SERVERS[mode],
+        "--bind", f"127.0.0.1:{port}", "--workers", "1", "--timeout", "300",
+    ]
+    if mode == "wsgi" and threads > 1:
+        command += ["--threads", str(threads)]
+    proc = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=log)
+    try:
+        _wait_for_port(port, proc)
+    except CommandError:
+        proc.terminate()
+        raise
+    return proc
+
+
+async def fetch(port: int, path: str, rate: int) -> dict:
+    """
+    Download one URL like a player with limited bandwidth would.
+
+    The client socket gets a small receive buffer and the body is read at
+    `rate` bytes per second, so the server has to keep writing for the
+    whole download instead of handing the file to kernel buffers at once.
+
+    Args:
+        port (int): Server port on 127.0.0.1.
+        path (str): Path and query of the request.
+        rate (int): Bytes per second to read, 0 for as fast as possible.
+
+    Returns:
+        dict: {"status", "ttfb", "seconds", "bytes"}
+    """
+    started = time.perf_counter()
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, READ_SIZE)
+    sock.setblocking(False)
+    try:
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    except BaseException:
+        sock.close()
+        raise
+    reader, writer = await asyncio.open_connection(sock=sock, limit=READ_SIZE)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        ttfb = time.perf_counter() - started
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+
+        body_started = time.perf_counter()
+        received = 0
+        while chunk := await reader.read(READ_SIZE):
+            received += len(chunk)
+            if rate:
+                ahead = received / rate - (time.perf_counter() - body_started)
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+    finally:
+        writer.close()
+
+    parts = status_line.split()
+    return {
+        "status": int(parts[1]) if len(parts) > 1 else 0,
+        "ttfb": ttfb,
+        "seconds": time.perf_counter() - started,
+        "bytes": received,
+    }
+
+
+async def run_level(port: int, path: str, viewers: int, duration: float, rate: int,
+                    expected_bytes: int, timeout: float) -> dict:
+    """
+    Let `viewers` simulated players fetch the segment in a loop for `duration` seconds.
+
+    Args:
+        port (int): Server port on 127.0.0.1.
+        path (str): Segment URL.
+        viewers (int): Concurrent players.
+        duration (float): Seconds during which new requests are started.
+        rate (int): Download rate of each player in bytes per second.
+        expected_bytes (int): Size of a complete response body.
+        timeout (float): Seconds after which a request counts as failed.
+
+    Returns:
+        dict: {"viewers", "requests", "errors", "ttfb_p50", "ttfb_p95",
+            "download_p95", "throughput_mb_s"}
+    """
+    results, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def player():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            try:
+                result = await asyncio.wait_for(fetch(port, path, rate), timeout)
+            except (OSError, ValueError, asyncio.TimeoutError):
+                errors += 1
+                continue
+            if result["status"] != 200 or result["bytes"] < expected_bytes:
+                errors += 1
+            else:
+                results.append(result)
+
+    started = time.monotonic()
+    await asyncio.gather(*(player() for _ in range(viewers)))
+    elapsed = time.monotonic() - started
+
+    ttfbs = [r["ttfb"] for r in results]
+    return {
+        "viewers": viewers,
+        "requests": len(results),
+        "errors": errors,
+        "ttfb_p50": round(percentile(ttfbs, 50), 3),
+        "ttfb_p95": round(percentile(ttfbs, 95), 3),
+        "download_p95": round(percentile([r["seconds"] for r in results], 95), 3),
+        "throughput_mb_s": round(sum(r["bytes"] for r in results) / elapsed / 1e6, 2),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Start one single-worker gunicorn process per mode (sync WSGI worker, or
+    uvicorn worker with VIDEO_ASYNC_DELIVERY), let increasing numbers of
+    simulated players download a signed HLS segment with limited bandwidth,
+    and report per level the time to first byte, download time, throughput
+    and errors, plus the largest viewer count that stayed within the TTFB
+    budget ("viewers_per_process") as JSON.
+
+    Run it inside the web container, which has Redis and the database of
+    the deployment; the segment is written to a temporary HLS root.
+    """
+
+    help = "Compare concurrent HLS viewers per process on the WSGI and ASGI paths (JSON output)."
+
+    def add_arguments(self, parser):
+        """
+        Register command line options.
+        """
+        parser.add_argument("--modes", default="wsgi,asgi",
+                            help="Comma-separated server modes to measure.")
+        parser.add_argument("--viewers", default="1,5,10,25,50,100,200",
+                            help="Comma-separated concurrent viewer counts, ascending.")
+        parser.add_argument("--duration", type=float, default=10.0,
+                            help="Seconds per viewer level.")
+        parser.add_argument("--segment-mb", type=float, default=4.0,
+                            help="Size of the served segment in MB.")
+        parser.add_argument("--client-rate", type=int, default=2000,
+                            help="Download rate of each viewer in KiB/s (0 = unlimited).")
+        parser.add_argument("--ttfb-budget", type=float, default=1.0,
+                            help="Allowed p95 time to first byte in seconds.")
+        parser.add_argument("--timeout", type=float, default=60.0,
+                            help="Seconds after which a request counts as failed.")
+        parser.add_argument("--wsgi-threads", type=int, default=1,
+                            help="Threads of the WSGI worker (1 = sync worker).")
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        """
+        Measure every mode and print (or write) the JSON report.
+        """
+        modes = _split(options["modes"])
+        if not modes or set(modes) - set(SERVERS):
+            raise CommandError(f"Modes must be a subset of {tuple(SERVERS)}.")
+        try:
+            levels = sorted(int(v) for v in _split(options["viewers"]))
+        except ValueError:
+            raise CommandError("Viewer counts must be whole numbers.")
+        if not levels or levels[0] < 1 or options["duration"] <= 0:
+            raise CommandError("Need at least one positive viewer count and duration.")
+
+        resolution = allowed_resolutions()[0]
+        size = int(options["segment_mb"] * 1e6)
+        rate = options["client_rate"] * 1024
+        path = (
+            reverse("video:hls_signed_segment", args=[BENCH_MOVIE_ID, resolution, SEGMENT_NAME])
+            + "?" + signed_query("benchmark", BENCH_MOVIE_ID, resolution)
+        )
+
+        results = {}
+        with tempfile.TemporaryDirectory(prefix="videoflix-delivery-") as tmp:
+            hls_dir = Path(tmp) / "hls"
+            rendition = hls_dir / str(BENCH_MOVIE_ID) / resolution
+            rendition.mkdir(parents=True)
+            (rendition / SEGMENT_NAME).write_bytes(os.urandom(size))
+            write_media_playlist(rendition / MEDIA_PLAYLIST, [Segment(SEGMENT_NAME, 6.0)])
+
+            for mode in modes:
+                forget_asset_index(BENCH_MOVIE_ID)
+                results[mode] = self._run_mode(mode, hls_dir, Path(tmp) / f"{mode}.log",
+                                               path, levels, size, rate, options)
+        forget_asset_index(BENCH_MOVIE_ID)
+
+        report = {
+            "meta": {
+                "revision": _git_revision(),
+                "host": platform.node(),
+                "cpu_count": os.cpu_count(),
+                "python": platform.python_version(),
+                "segment_bytes": size,
+                "client_rate_kib_s": options["client_rate"],
+                "duration": options["duration"],
+                "ttfb_budget": options["ttfb_budget"],
+                "wsgi_threads": options["wsgi_threads"],
+                "chunk_size": getattr(settings, "VIDEO_STREAM_CHUNK_SIZE", 256 * 1024),
+            },
+            "results": results,
+        }
+        text = json.dumps(report, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(text + "\n")
+        self.stdout.write(text)
+
+    def _run_mode(self, mode, hls_dir, log_path, path, levels, size, rate, options):
+        """
+        Start a server in one mode and run every viewer level against it.
+        """
+        port = _free_port()
+        with open(log_path, "w") as log:
+            proc = start_server(mode, port, hls_dir, options["wsgi_threads"], log)
+            try:
+                # Warm up imports and the asset index outside the measurement.
+                asyncio.run(fetch(port, path, 0))
+                summaries = []
+                for viewers in levels:
+                    self.stderr.write(f"{mode}: {viewers} viewers")
+                    summaries.append(asyncio.run(run_level(
+                        port, path, viewers, options["duration"], rate, size, options["timeout"],
+                    )))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+        return {
+            "levels": summaries,
+            "viewers_per_process": viewers_per_process(summaries, options["ttfb_budget"]),
+        }
@@ -0,0 +1,114 @@
+"""
+Management command that compares fixed encoder settings with the per-title
+encoding ladder on synthetic sources of different complexity.
+"""
+
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from core.api.ladder import analyze_title
+from core.api.tasks import (
+    ALLOWED_RESOLUTIONS,
+    RESOLUTION_HEIGHTS,
+    convert_to_hls_renditions,
+    ordered_resolutions,
+)
+
+from .benchmark_transcode import make_synthetic_source, measure
+
+SOURCES = {
+    "static": ("smptebars", ""),
+    "moderate": ("testsrc2", ""),
+    "complex": ("testsrc2", "noise=alls=30:allf=t+u"),
+}
+
+
+def output_bytes(directory: Path) -> int:
+    """
+    Return the total size of all files below a directory.
+
+    Args:
+        directory (Path): HLS output directory of one movie.
+
+    Returns:
+        int: Size in bytes.
+    """
+    return sum(f.stat().st_size for f in directory.rglob("*") if f.is_file())
+
+
+class Command(BaseCommand):
+    """
+    Encode each synthetic source once with the fixed settings and once with
+    its per-title ladder, then report output size, chosen CRF and SSIM.
+    """
+
+    help = "Benchmark per-title encoding against the fixed encoder settings."
+
+    def add_arguments(self, parser):
+        """
+        Register command line options.
+        """
+        parser.add_argument("--duration", type=int, default=20,
+                            help="Length of each synthetic source in seconds.")
+        parser.add_argument("--size", default="1280x720",
+                            help="Frame size of the synthetic sources.")
+        parser.add_argument("--resolutions", default="",
+                            help="Comma-separated renditions (default: all allowed).")
+        parser.add_argument("--sources", default=",".join(SOURCES),
+                            help="Comma-separated synthetic sources to run.")
+
+    def handle(self, *args, **options):
+        """
+        Run both encodes per source and print a comparison table.
+        """
+        requested = [r for r in options["resolutions"].split(",") if r.strip()]
+        ladder = ordered_resolutions(requested or ALLOWED_RESOLUTIONS)
+        if not ladder or set(ladder) - ALLOWED_RESOLUTIONS:
+            raise CommandError(
+                f"Resolutions must be a subset of {sorted(ALLOWED_RESOLUTIONS)}."
+            )
+
+        names = [s.strip() for s in options["sources"].split(",") if s.strip()]
+        if not names or set(names) - set(SOURCES):
+            raise CommandError(f"Sources must be a subset of {tuple(SOURCES)}.")
+
+        self.stdout.write(f"Renditions: {', '.join(ladder)}")
+        self.stdout.write(
+            f"{'source':<10}{'fixed MB':>10}{'per-title MB':>14}{'saved':>8}"
+            f"{'analysis s':>12}  ladder (crf/ssim)"
+        )
+
+        with tempfile.TemporaryDirectory(prefix="videoflix-ladder-bench-") as tmp:
+            tmp = Path(tmp)
+            hls = tmp / "hls"
+            with override_settings(HLS_ROOT=str(hls)):
+                for movie_id, name in enumerate(names, start=1):
+                    pattern, filters = SOURCES[name]
+                    source = str(make_synthetic_source(
+                        tmp / f"{name}.mp4", options["duration"], options["size"],
+                        pattern=pattern, filters=filters,
+                    ))
+
+                    fixed_id, tuned_id = movie_id * 10, movie_id * 10 + 1
+                    convert_to_hls_renditions(fixed_id, source, ladder, per_title=False)
+                    chosen = {}
+                    analysis = measure(lambda: chosen.update(analyze_title(
+                        source, {res: RESOLUTION_HEIGHTS[res] for res in ladder},
+                        options["duration"],
+                    )))
+                    convert_to_hls_renditions(tuned_id, source, ladder, per_title=chosen)
+
+                    fixed = output_bytes(hls / str(fixed_id))
+                    tuned = output_bytes(hls / str(tuned_id))
+                    summary = ", ".join(
+                        f"{res} {entry['crf']}/{entry['ssim']:.3f}"
+                        for res, entry in chosen.items()
+                    )
+                    self.stdout.write(
+                        f"{name:<10}{fixed / 1e6:>10.2f}{tuned / 1e6:>14.2f}"
+                        f"{(1 - tuned / fixed) * 100:>7.1f}%"
+                        f"{analysis['wall_seconds']:>12.1f}  {summary}"
+                    )
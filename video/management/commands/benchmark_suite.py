@@ -0,0 +1,297 @@
+"""
+Management command that runs the transcoding pipelines on a matrix of
+synthetic sources and reports their cost as JSON.
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+
+from core.api.playlists import MEDIA_PLAYLIST, parse_media_playlist
+from core.api.tasks import (
+    ALLOWED_RESOLUTIONS,
+    convert_to_hls,
+    convert_to_hls_chunked,
+    convert_to_hls_renditions,
+    convert_to_mp4,
+    rendition_ladder,
+)
+
+from .benchmark_ladder import output_bytes
+from .benchmark_transcode import make_synthetic_source, measure
+
+VARIANTS = ("mp4", "hls", "hls_ladder", "hls_chunked")
+METRICS = ("wall_seconds", "cpu_seconds", "peak_rss_mb")
+
+
+def count_segments(directory: Path) -> int:
+    """
+    Return the number of media segments listed in all playlists below a directory.
+
+    Args:
+        directory (Path): HLS output directory of one movie.
+
+    Returns:
+        int: Segment count over every rendition.
+    """
+    return sum(
+        len(parse_media_playlist(path).segments)
+        for path in directory.rglob(MEDIA_PLAYLIST)
+    )
+
+
+def _run_child(conn, func, args) -> None:
+    """
+    Measure one run inside a forked process and send the result back.
+    """
+    try:
+        result = measure(func, *args)
+        # ru_maxrss is in KiB on Linux and covers every waited-for child
+        # of this process, i.e. only the ffmpeg runs of this variant.
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        result["peak_rss_mb"] = round(usage.ru_maxrss / 1024, 1)
+        conn.send(result)
+    except Exception as exc:
+        conn.send({"error": f"{type(exc).__name__}: {exc}"})
+    finally:
+        conn.close()
+
+
+def run_isolated(func, *args) -> dict:
+    """
+    Run a pipeline in a fresh process so its peak RSS is measured on its own.
+
+    RUSAGE_CHILDREN keeps the maximum over a process's whole lifetime,
+    therefore every run gets its own forked measuring process.
+
+    Args:
+        func (Callable): Pipeline to run.
+        *args: Arguments for func.
+
+    Returns:
+        dict: {"wall_seconds", "cpu_seconds", "peak_rss_mb"} or {"error"}.
+    """
+    connections.close_all()
+    ctx = multiprocessing.get_context("fork")
+    receiver, sender = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_child, args=(sender, func, args))
+    proc.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": "benchmark process died"}
+    proc.join()
+    return result
+
+
+def compare_results(current: list, baseline: list) -> list:
+    """
+    Match results of two suite runs and compute the relative changes.
+
+    Args:
+        current (list[dict]): "results" of the new run.
+        baseline (list[dict]): "results" of an earlier run.
+
+    Returns:
+        list[dict]: One entry per (source, variant) present in both runs with
+            the percentage change of every metric (negative is faster/smaller).
+    """
+    earlier = {(r["source"], r["variant"]): r for r in baseline if "error" not in r}
+    changes = []
+    for result in current:
+        before = earlier.get((result["source"], result["variant"]))
+        if before is None or "error" in result:
+            continue
+        entry = {"source": result["source"], "variant": result["variant"]}
+        for metric in (*METRICS, "output_bytes"):
+            if before.get(metric):
+                entry[metric] = round((result[metric] / before[metric] - 1) * 100, 1)
+        changes.append(entry)
+    return changes
+
+
+def _git_revision() -> str:
+    """
+    Return the current commit of the checkout, or "" outside a git tree.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _ffmpeg_version() -> str:
+    """
+    Return the first line of `ffmpeg -version`.
+    """
+    try:
+        output = subprocess.run(
+            ["ffmpeg", "-version"], capture_output=True, text=True, check=True,
+        ).stdout
+        return output.splitlines()[0] if output else ""
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _split(value: str) -> list:
+    """
+    Split a comma-separated option into its non-empty items.
+    """
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class Command(BaseCommand):
+    """
+    Generate deterministic lavfi sources at several lengths and frame sizes,
+    run every pipeline variant on each of them and write the wall time, CPU
+    time, peak RSS, realtime factor, output size and segment count as JSON.
+
+    Variants:
+        mp4          convert_to_mp4 at --resolution
+        hls          convert_to_hls at --resolution
+        hls_ladder   convert_to_hls_renditions over the source's ladder
+        hls_chunked  convert_to_hls_chunked over the source's ladder
+    """
+
+    help = "Benchmark the transcoding pipelines on synthetic sources (JSON output)."
+
+    def add_arguments(self, parser):
+        """
+        Register command line options.
+        """
+        parser.add_argument("--durations", default="10,30",
+                            help="Comma-separated source lengths in seconds.")
+        parser.add_argument("--sizes", default="640x360,1280x720,1920x1080",
+                            help="Comma-separated source frame sizes.")
+        parser.add_argument("--variants", default=",".join(VARIANTS),
+                            help="Comma-separated pipeline variants to run.")
+        parser.add_argument("--resolution", default="360p",
+                            help="Target of the single-rendition variants.")
+        parser.add_argument("--repeat", type=int, default=1,
+                            help="Runs per variant; the median is reported.")
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--compare",
+                            help="Earlier JSON report to compute relative changes against.")
+
+    def handle(self, *args, **options):
+        """
+        Run the benchmark matrix and print (or write) the JSON report.
+        """
+        variants = _split(options["variants"])
+        if not variants or set(variants) - set(VARIANTS):
+            raise CommandError(f"Variants must be a subset of {VARIANTS}.")
+        if options["resolution"].lower() not in ALLOWED_RESOLUTIONS:
+            raise CommandError(
+                f"Resolution must be one of {sorted(ALLOWED_RESOLUTIONS)}."
+            )
+        try:
+            durations = [int(d) for d in _split(options["durations"])]
+        except ValueError:
+            raise CommandError("Durations must be whole seconds.")
+        sizes = _split(options["sizes"])
+        if not durations or not sizes or options["repeat"] < 1:
+            raise CommandError("Need at least one duration, one size and one run.")
+
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+
+        resolution = options["resolution"].lower()
+        results = []
+        with tempfile.TemporaryDirectory(prefix="videoflix-suite-") as tmp:
+            tmp = Path(tmp)
+            for duration in durations:
+                for size in sizes:
+                    name = f"{size}@{duration}s"
+                    source = make_synthetic_source(tmp / f"{size}_{duration}.mp4", duration, size)
+                    height = int(size.split("x")[1])
+                    for variant in variants:
+                        self.stderr.write(f"{name} {variant}")
+                        results.append(self._run_variant(
+                            tmp, name, str(source), duration, height, variant,
+                            resolution, options["repeat"],
+                        ))
+
+        report = {
+            "meta": {
+                "revision": _git_revision(),
+                "host": platform.node(),
+                "cpu_count": os.cpu_count(),
+                "python": platform.python_version(),
+                "ffmpeg": _ffmpeg_version(),
+                "segment_format": getattr(settings, "VIDEO_HLS_SEGMENT_FORMAT", "mpegts"),
+                "repeat": options["repeat"],
+            },
+            "results": results,
+        }
+        if baseline is not None:
+            report["changes"] = compare_results(results, baseline.get("results", []))
+
+        text = json.dumps(report, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(text + "\n")
+        self.stdout.write(text)
+
+    def _run_variant(self, tmp, name, source, duration, height, variant, resolution, repeat):
+        """
+        Run one variant `repeat` times on a source and summarize the runs.
+
+        Every run writes to an empty HLS root, so no run resumes from the
+        output of an earlier one.
+        """
+        ladder = rendition_ladder(height)
+        pipelines = {
+            "mp4": lambda: convert_to_mp4(source, resolution),
+            "hls": lambda: convert_to_hls(1, source, resolution, per_title=False),
+            "hls_ladder": lambda: convert_to_hls_renditions(1, source, ladder, per_title=False),
+            "hls_chunked": lambda: convert_to_hls_chunked(1, source, ladder, per_title=False),
+        }
+
+        runs = []
+        for index in range(repeat):
+            hls_dir = tmp / f"hls-{name}-{variant}-{index}"
+            with override_settings(HLS_ROOT=str(hls_dir)):
+                run = run_isolated(pipelines[variant])
+            if "error" in run:
+                return {"source": name, "variant": variant, "error": run["error"]}
+
+            if variant == "mp4":
+                output = Path(f"{os.path.splitext(source)[0]}_{resolution}.mp4")
+                run["output_bytes"] = output.stat().st_size
+                run["segments"] = 0
+                output.unlink()
+            else:
+                run["output_bytes"] = output_bytes(hls_dir)
+                run["segments"] = count_segments(hls_dir)
+            runs.append(run)
+
+        result = {
+            "source": name,
+            "variant": variant,
+            "duration": duration,
+            "height": height,
+            "renditions": [resolution] if variant in ("mp4", "hls") else ladder,
+            "runs": repeat,
+        }
+        for metric in METRICS:
+            result[metric] = round(statistics.median(r[metric] for r in runs), 3)
+        result["realtime_factor"] = round(duration / result["wall_seconds"], 2)
+        result["output_bytes"] = runs[-1]["output_bytes"]
+        result["segments"] = runs[-1]["segments"]
+        return result
@@ -0,0 +1,159 @@
+"""
+Management command that benchmarks the HLS transcoding strategies against
+each other on the same source file.
+"""
+
+import resource
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from core.api.tasks import (
+    ALLOWED_RESOLUTIONS,
+    convert_to_hls,
+    convert_to_hls_chunked,
+    convert_to_hls_renditions,
+    ordered_resolutions,
+)
+
+
+def make_synthetic_source(
+    path: Path,
+    duration: int,
+    size: str,
+    rate: int = 25,
+    pattern: str = "testsrc2",
+    filters: str = "",
+) -> Path:
+    """
+    Render a deterministic test clip with ffmpeg's lavfi sources.
+
+    Args:
+        path (Path): Output file path (MP4).
+        duration (int): Clip length in seconds.
+        size (str): Frame size such as "1920x1080".
+        rate (int): Frame rate of the generated video.
+        pattern (str): lavfi video source, e.g. "testsrc2" or "smptebars".
+        filters (str): Optional video filter chain applied to the source.
+
+    Returns:
+        Path: The path of the generated file.
+    """
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-f", "lavfi", "-i", f"{pattern}=size={size}:rate={rate}",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000",
+        "-t", str(duration),
+        *(["-vf", filters] if filters else []),
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        str(path),
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def measure(func, *args, **kwargs) -> dict:
+    """
+    Run a callable and measure wall time and CPU seconds of its child processes.
+
+    Args:
+        func (Callable): Function spawning the ffmpeg process(es).
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        dict: {"wall_seconds": float, "cpu_seconds": float}
+    """
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {"wall_seconds": wall, "cpu_seconds": cpu}
+
+
+STRATEGIES = ("per_resolution", "single_pass", "chunked")
+
+
+class Command(BaseCommand):
+    """
+    Compare the HLS transcoding strategies (one job per resolution, the
+    single-decode job and the chunk-parallel job) on the same source.
+    """
+
+    help = "Benchmark the HLS transcoding strategies against each other."
+
+    def add_arguments(self, parser):
+        """
+        Register command line options.
+        """
+        parser.add_argument("--input", help="Existing source file to encode.")
+        parser.add_argument("--duration", type=int, default=30,
+                            help="Length of the synthetic source in seconds.")
+        parser.add_argument("--size", default="1920x1080",
+                            help="Frame size of the synthetic source.")
+        parser.add_argument("--resolutions", default="",
+                            help="Comma-separated renditions (default: all allowed).")
+        parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                            help="Comma-separated strategies to run.")
+        parser.add_argument("--baseline", default="per_resolution", choices=STRATEGIES,
+                            help="Strategy the speed-up is computed against.")
+        parser.add_argument("--chunk-seconds", type=float, default=None,
+                            help="Chunk length for the chunked strategy.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Parallel ffmpeg processes for the chunked strategy.")
+
+    def handle(self, *args, **options):
+        """
+        Encode the source with every strategy and print a comparison table.
+        """
+        requested = [r for r in options["resolutions"].split(",") if r.strip()]
+        ladder = ordered_resolutions(requested or ALLOWED_RESOLUTIONS)
+        unknown = set(ladder) - ALLOWED_RESOLUTIONS
+        if not ladder or unknown:
+            raise CommandError(
+                f"Resolutions must be a subset of {sorted(ALLOWED_RESOLUTIONS)}."
+            )
+
+        strategies = [s.strip() for s in options["strategies"].split(",") if s.strip()]
+        if set(strategies) - set(STRATEGIES) or options["baseline"] not in strategies:
+            raise CommandError(
+                f"Strategies must be a subset of {STRATEGIES} and include the baseline."
+            )
+
+        runners = {
+            "per_resolution": lambda src: [convert_to_hls(1, src, res) for res in ladder],
+            "single_pass": lambda src: convert_to_hls_renditions(2, src, ladder),
+            "chunked": lambda src: convert_to_hls_chunked(
+                3, src, ladder, options["chunk_seconds"], options["workers"],
+            ),
+        }
+
+        with tempfile.TemporaryDirectory(prefix="videoflix-bench-") as tmp:
+            tmp = Path(tmp)
+            source = options["input"]
+            if not source:
+                source = str(make_synthetic_source(
+                    tmp / "source.mp4", options["duration"], options["size"],
+                ))
+
+            with override_settings(HLS_ROOT=str(tmp / "hls")):
+                results = {name: measure(runners[name], source) for name in strategies}
+
+        baseline = results[options["baseline"]]
+        self.stdout.write(f"Renditions: {', '.join(ladder)}")
+        self.stdout.write(f"{'strategy':<16}{'wall s':>10}{'cpu s':>10}{'speed-up':>10}")
+        for name, result in results.items():
+            speedup = baseline["wall_seconds"] / result["wall_seconds"]
+            self.stdout.write(
+                f"{name:<16}{result['wall_seconds']:>10.2f}"
+                f"{result['cpu_seconds']:>10.2f}{speedup:>9.2f}x"
+            )
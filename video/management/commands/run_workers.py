@@ -0,0 +1,109 @@
+"""
+Management command that starts and supervises the RQ worker pools defined
+in RQ_WORKER_POOLS.
+"""
+
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from video.api.cleanup import enqueue_sweep_if_due
+
+RESTART_DELAY = 5
+
+
+def worker_commands(pools: dict, hostname: str) -> dict:
+    """
+    Build one rqworker command line per configured worker process.
+
+    Args:
+        pools (dict): RQ_WORKER_POOLS-style mapping of pool name to
+            {"queues": [...], "workers": int, "scheduler": bool}.
+        hostname (str): Host name used to make worker names unique.
+
+    Returns:
+        dict[str, list[str]]: Worker name -> command line.
+
+    Raises:
+        CommandError: If a pool references a queue missing from RQ_QUEUES.
+    """
+    commands = {}
+    for pool, config in pools.items():
+        queues = list(config["queues"])
+        unknown = set(queues) - set(settings.RQ_QUEUES)
+        if unknown:
+            raise CommandError(f"Pool '{pool}' uses unknown queues: {sorted(unknown)}")
+
+        for index in range(int(config.get("workers", 1))):
+            name = f"{hostname}.{pool}.{index}"
+            commands[name] = [
+                sys.executable, "manage.py", "rqworker", *queues, "--name", name,
+            ]
+            if config.get("scheduler"):
+                commands[name].append("--with-scheduler")
+    return commands
+
+
+class Command(BaseCommand):
+    """
+    Start every worker of the configured pools and restart workers that die.
+
+    Each worker listens on its pool's queues in priority order; the worker
+    names (<host>.<pool>.<n>) show up in the django-rq dashboard. The
+    supervisor also queues the orphaned-media sweep once per
+    VIDEO_GC_INTERVAL.
+    """
+
+    help = "Start and supervise the RQ worker pools from RQ_WORKER_POOLS."
+
+    def add_arguments(self, parser):
+        """
+        Register command line options.
+        """
+        parser.add_argument("--pools", default="",
+                            help="Comma-separated pools to start (default: all).")
+
+    def handle(self, *args, **options):
+        """
+        Spawn the workers and supervise them until SIGTERM/SIGINT.
+        """
+        pools = settings.RQ_WORKER_POOLS
+        selected = [p.strip() for p in options["pools"].split(",") if p.strip()]
+        if set(selected) - set(pools):
+            raise CommandError(f"Pools must be a subset of {sorted(pools)}.")
+        if selected:
+            pools = {name: pools[name] for name in selected}
+
+        commands = worker_commands(pools, socket.gethostname())
+        processes = {}
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        while not stopping:
+            for name, cmd in commands.items():
+                proc = processes.get(name)
+                if proc is None or proc.poll() is not None:
+                    if proc is not None:
+                        self.stderr.write(f"Worker {name} exited with {proc.returncode}, restarting")
+                    processes[name] = subprocess.Popen(cmd)
+            try:
+                enqueue_sweep_if_due()
+            except Exception as exc:
+                self.stderr.write(f"Could not queue the media sweep: {exc}")
+            time.sleep(RESTART_DELAY)
+
+        for proc in processes.values():
+            proc.send_signal(signal.SIGTERM)
+        for proc in processes.values():
+            proc.wait()
@@ -0,0 +1,36 @@
+"""
+Management command that removes media no video or upload references.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from video.api.cleanup import sweep_orphaned_media
+
+
+class Command(BaseCommand):
+    """
+    Delete orphaned HLS output, unused shared output and stale upload files
+    right away. The worker supervisor queues the same sweep every
+    VIDEO_GC_INTERVAL seconds.
+    """
+
+    help = "Remove orphaned HLS output and stale uploads (JSON report)."
+
+    def add_arguments(self, parser):
+        """
+        Register command line options.
+        """
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only list what would be removed.")
+        parser.add_argument("--min-age", type=float, default=None,
+                            help="Skip paths modified within this many seconds "
+                                 "(default: VIDEO_GC_MIN_AGE).")
+
+    def handle(self, *args, **options):
+        """
+        Run the sweep and print its report.
+        """
+        report = sweep_orphaned_media(min_age=options["min_age"], dry_run=options["dry_run"])
+        self.stdout.write(json.dumps(report, indent=2))
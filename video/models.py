@@ -3,6 +3,9 @@ Model definition for video content, including metadata, media files,
 and category classification.
 """
 
+import uuid
+
+from django.conf import settings
 from django.db import models
 
 
@@ -10,6 +13,9 @@ class Video(models.Model):
     """
     Represents a video entry with title, description, thumbnail, category,
     creation timestamp, and an associated uploaded video file.
+
+    content_digest is the SHA-256 of the source file; videos with the same
+    digest share one set of HLS output.
     """
 
     DRAMA = "Drama"
@@ -30,6 +36,7 @@ class Video(models.Model):
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
     video_file = models.FileField(upload_to="videos")
+    content_digest = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
@@ -39,3 +46,100 @@ class Video(models.Model):
         Return a readable string representation of the video instance.
         """
         return f"{self.id} – {self.title}"
+
+
+class VideoMetadata(models.Model):
+    """
+    Technical properties of a video's source file as reported by ffprobe.
+    Filled in before transcoding and used to build the rendition ladder.
+
+    encoding_ladder holds the per-title encoder settings chosen for each
+    rendition (resolution -> crf, maxrate, bufsize, ssim) when per-title
+    encoding is enabled.
+    """
+
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name="metadata")
+    duration = models.FloatField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    frame_rate = models.FloatField(null=True, blank=True)
+    bit_rate = models.BigIntegerField(null=True, blank=True)
+    video_bit_rate = models.BigIntegerField(null=True, blank=True)
+    audio_bit_rate = models.BigIntegerField(null=True, blank=True)
+    video_codec = models.CharField(max_length=50, blank=True)
+    audio_codec = models.CharField(max_length=50, blank=True)
+    encoding_ladder = models.JSONField(default=dict, blank=True)
+    probed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Return a short summary such as "1920x1080 h264, 93.0s".
+        """
+        return f"{self.width}x{self.height} {self.video_codec}, {self.duration}s"
+
+
+class MediaUsage(models.Model):
+    """
+    Disk space used by one video, kept up to date as assets are written.
+
+    components maps an asset to its size in bytes ("source", "thumbnail",
+    "storyboard", "hls:<resolution>"); total_bytes is their sum. HLS output
+    shared between identical uploads is counted for the video that
+    produced it.
+    """
+
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name="usage")
+    components = models.JSONField(default=dict, blank=True)
+    total_bytes = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Return a short summary such as "video 3: 1048576 bytes".
+        """
+        return f"video {self.video_id}: {self.total_bytes} bytes"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload of a source file (tus-style).
+
+    Chunks are appended to a temporary file; offset is the number of bytes
+    stored so far. Once offset reaches length, the session is FINALIZING
+    while the file is moved to the video storage and the Video is created
+    from the stored metadata.
+    """
+
+    UPLOADING = "uploading"
+    FINALIZING = "finalizing"
+    COMPLETE = "complete"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (UPLOADING, "Uploading"),
+        (FINALIZING, "Finalizing"),
+        (COMPLETE, "Complete"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+",
+    )
+    filename = models.CharField(max_length=255)
+    length = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    metadata = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=UPLOADING)
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        """
+        Return a short summary such as "movie.mp4 (1048576/4194304)".
+        """
+        return f"{self.filename} ({self.offset}/{self.length})"
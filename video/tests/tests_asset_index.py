@@ -0,0 +1,79 @@
+from unittest import mock
+
+import pytest
+from django.http import Http404
+
+from video.api import asset_index
+
+
+def _playlist(*segments):
+    return "#EXTM3U\n" + "".join(f"#EXTINF:6.0,\n{name}\n" for name in segments) + "#EXT-X-ENDLIST\n"
+
+
+@pytest.fixture
+def published(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    settings.VIDEO_ALLOWED_RESOLUTIONS = ["360p"]
+    asset_index._local.clear()
+    asset_index.cache.clear()
+    path = tmp_path / "5" / "360p"
+    path.mkdir(parents=True)
+    (path / "index.m3u8").write_text(_playlist("segment_000.ts"))
+    (path / "segment_000.ts").write_bytes(b"a" * 100)
+    (path / ".segment_001.ts.tmp").write_bytes(b"partial")
+    (path / "part01_segment_000.ts").write_bytes(b"in progress")
+    (tmp_path / "5" / "1080p").mkdir()
+    yield path
+    asset_index._local.clear()
+    asset_index.cache.clear()
+
+
+@pytest.mark.django_db
+def test_index_lists_published_segments_only(published):
+    index = asset_index.publish_asset_index(5)
+
+    assert index["root"] == str(published.parent.resolve())
+    assert index["renditions"] == {"360p": {"segment_000.ts": 100}}
+
+
+@pytest.mark.django_db
+def test_superseded_segments_stay_indexed_until_removed(published):
+    asset_index.publish_asset_index(5)
+    (published / "hq_segment_000.ts").write_bytes(b"h" * 50)
+    (published / "index.m3u8").write_text(_playlist("hq_segment_000.ts"))
+
+    index = asset_index.publish_asset_index(5)
+    assert index["renditions"]["360p"] == {"segment_000.ts": 100, "hq_segment_000.ts": 50}
+
+    (published / "segment_000.ts").unlink()
+    index = asset_index.publish_asset_index(5)
+    assert index["renditions"]["360p"] == {"hq_segment_000.ts": 50}
+
+
+@pytest.mark.django_db
+def test_segments_are_served_without_probing_the_file_system(published):
+    asset_index.publish_asset_index(5)
+    asset_index.get_asset_index(5)
+
+    with mock.patch.object(asset_index.os, "scandir", side_effect=AssertionError):
+        resp = asset_index.serve_indexed_segment(5, "360p", "segment_000.ts")
+        assert resp.status_code == 200
+        assert b"".join(resp.streaming_content) == b"a" * 100
+
+        for resolution, segment in [("360p", "segment_999.ts"), ("360p", "../../5/360p/segment_000.ts"),
+                                    ("1080p", "segment_000.ts"), ("360p", ".segment_001.ts.tmp"),
+                                    ("360p", "part01_segment_000.ts")]:
+            with pytest.raises(Http404):
+                asset_index.serve_indexed_segment(5, resolution, segment)
+
+
+@pytest.mark.django_db
+def test_segments_published_elsewhere_are_found_after_a_local_miss(published):
+    asset_index.publish_asset_index(5)
+    asset_index.get_asset_index(5)
+    (published / "segment_001.ts").write_bytes(b"b" * 10)
+    (published / "index.m3u8").write_text(_playlist("segment_000.ts", "segment_001.ts"))
+    # Published by a worker: only the shared cache sees the new index.
+    asset_index.cache.set(asset_index._index_key(5), asset_index.build_asset_index(5), None)
+
+    assert asset_index.lookup_segment(5, "360p", "segment_001.ts") == published.resolve() / "segment_001.ts"
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from unittest import mock
+
+import fakeredis
+import pytest
+from django.utils import timezone
+
+from video.api import processing
+from video.api.cleanup import sweep_orphaned_media
+from video.api.usage import record_directory_usage, rendition_components
+from video.models import MediaUsage, UploadSession, Video
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.HLS_ROOT = str(tmp_path / "hls")
+    (tmp_path / "videos").mkdir()
+    (tmp_path / "thumbnails").mkdir()
+    return tmp_path
+
+
+def _create(media, name, content):
+    (media / "videos" / name).write_bytes(content)
+    (media / "thumbnails" / f"{name}.jpg").write_bytes(b"jpg")
+    queue = mock.Mock()
+    queue.enqueue.return_value.id = "job-id"
+    redis = fakeredis.FakeStrictRedis()
+    with mock.patch.object(processing, "probe_source", side_effect=OSError), \
+            mock.patch.object(processing.django_rq, "get_queue", return_value=queue), \
+            mock.patch.object(processing, "get_redis_connection", return_value=redis), \
+            mock.patch.object(processing.django_rq, "get_connection", return_value=redis):
+        video = Video.objects.create(
+            title=name, category=Video.DRAMA,
+            video_file=f"videos/{name}", thumbnail=f"thumbnails/{name}.jpg",
+        )
+        processing.prepare_video(video.id)
+    video.refresh_from_db()
+    return video
+
+
+@pytest.mark.django_db
+def test_usage_is_tracked_and_delete_removes_every_asset(media):
+    video = _create(media, "a.mp4", b"x" * 100)
+    (media / "videos" / "a_720p.mp4").write_bytes(b"y" * 10)
+    rendition = media / "hls" / "_shared" / video.content_digest / "360p"
+    rendition.mkdir(parents=True)
+    (rendition / "segment_000.ts").write_bytes(b"z" * 50)
+
+    record_directory_usage(video.id, rendition_components({"360p": rendition}))
+    usage = MediaUsage.objects.get(video=video)
+    assert usage.components == {"source": 100, "thumbnail": 3, "hls:360p": 50}
+    assert usage.total_bytes == 153
+
+    movie_dir = media / "hls" / str(video.id)
+    video.delete()
+    assert not any((media / "videos").iterdir())
+    assert not any((media / "thumbnails").iterdir())
+    assert not movie_dir.is_symlink() and not rendition.parent.exists()
+
+
+@pytest.mark.django_db
+def test_sweep_removes_only_unreferenced_media(media):
+    video = _create(media, "kept.mp4", b"kept")
+    hls = media / "hls"
+    (hls / "999" / "360p").mkdir(parents=True)
+    (hls / "999" / "360p" / "segment_000.ts").write_bytes(b"o" * 20)
+    (hls / "_shared" / ("0" * 64)).mkdir(parents=True)
+    uploads = media / "uploads"
+    uploads.mkdir()
+    (uploads / "00000000-0000-0000-0000-000000000000.part").write_bytes(b"p" * 5)
+    session = UploadSession.objects.create(filename="live.mp4", length=10)
+    (uploads / f"{session.id}.part").write_bytes(b"l")
+
+    report = sweep_orphaned_media(min_age=0, dry_run=True)
+    assert report["bytes"] == 25 and (hls / "999").exists()
+
+    report = sweep_orphaned_media(min_age=0)
+    assert sorted(p.rsplit("/", 1)[-1] for p in report["paths"]) == sorted(
+        ["999", "0" * 64, "00000000-0000-0000-0000-000000000000.part"]
+    )
+    assert not (hls / "999").exists()
+    assert (hls / str(video.id)).is_symlink()
+    assert (hls / "_shared" / video.content_digest).is_dir()
+    assert (uploads / f"{session.id}.part").exists()
+    assert sweep_orphaned_media(min_age=3600)["paths"] == []
+
+
+@pytest.mark.django_db
+def test_sweep_expires_stuck_finalizing_sessions(media):
+    stuck = UploadSession.objects.create(
+        filename="stuck.mp4", length=10, offset=10, status=UploadSession.FINALIZING,
+    )
+    running = UploadSession.objects.create(
+        filename="running.mp4", length=10, offset=10, status=UploadSession.FINALIZING,
+    )
+    UploadSession.objects.filter(pk=stuck.pk).update(updated_at=timezone.now() - timedelta(days=1))
+    (media / "uploads").mkdir()
+    (media / "uploads" / f"{running.id}.part").write_bytes(b"r" * 10)
+
+    assert sweep_orphaned_media(min_age=0)["paths"] == []
+    stuck.refresh_from_db()
+    running.refresh_from_db()
+    assert stuck.status == UploadSession.FAILED
+    assert running.status == UploadSession.FINALIZING
@@ -0,0 +1,50 @@
+import pytest
+from django.core.management.base import CommandError
+
+from video.management.commands.benchmark_delivery import viewers_per_process
+from video.management.commands.benchmark_suite import compare_results
+from video.management.commands.run_workers import worker_commands
+
+
+def test_worker_commands_follow_pool_priorities():
+    pools = {"transcode": {"queues": ["transcode", "preview"], "workers": 2}}
+    commands = worker_commands(pools, "host")
+
+    assert list(commands) == ["host.transcode.0", "host.transcode.1"]
+    assert commands["host.transcode.1"][2:] == [
+        "rqworker", "transcode", "preview", "--name", "host.transcode.1",
+    ]
+
+    with pytest.raises(CommandError):
+        worker_commands({"x": {"queues": ["missing"]}}, "host")
+
+
+def test_benchmark_comparison_reports_relative_changes():
+    before = [
+        {"source": "a", "variant": "hls", "wall_seconds": 2.0, "cpu_seconds": 4.0,
+         "peak_rss_mb": 100.0, "output_bytes": 1000},
+        {"source": "a", "variant": "mp4", "error": "boom"},
+    ]
+    after = [
+        {"source": "a", "variant": "hls", "wall_seconds": 1.5, "cpu_seconds": 4.0,
+         "peak_rss_mb": 110.0, "output_bytes": 1000},
+        {"source": "a", "variant": "mp4", "wall_seconds": 1.0, "cpu_seconds": 1.0,
+         "peak_rss_mb": 50.0, "output_bytes": 10},
+    ]
+
+    assert compare_results(after, before) == [{
+        "source": "a", "variant": "hls", "wall_seconds": -25.0, "cpu_seconds": 0.0,
+        "peak_rss_mb": 10.0, "output_bytes": 0.0,
+    }]
+
+
+def test_delivery_benchmark_stops_at_the_first_failing_level():
+    levels = [
+        {"viewers": 10, "errors": 0, "ttfb_p95": 0.2},
+        {"viewers": 50, "errors": 0, "ttfb_p95": 0.9},
+        {"viewers": 100, "errors": 0, "ttfb_p95": 3.0},
+        {"viewers": 200, "errors": 0, "ttfb_p95": 0.5},
+    ]
+
+    assert viewers_per_process(levels, 1.0) == 50
+    assert viewers_per_process([{**levels[0], "errors": 1}], 1.0) == 0
@@ -0,0 +1,145 @@
+import json
+from unittest import mock
+
+import fakeredis
+import pytest
+
+from video.api import processing
+from video.models import Video
+
+
+@pytest.fixture(autouse=True)
+def redis():
+    conn = fakeredis.FakeStrictRedis()
+    with mock.patch.object(processing, "get_redis_connection", return_value=conn), \
+            mock.patch.object(processing.django_rq, "get_connection", return_value=conn):
+        yield conn
+
+
+def _queue():
+    queue = mock.Mock()
+    queue.enqueue.return_value.id = "job-id"
+    return queue
+
+
+def _probe(height):
+    return {
+        "duration": 60.0, "width": height * 16 // 9, "height": height, "frame_rate": 25.0,
+        "bit_rate": 1_000_000, "video_bit_rate": 900_000, "audio_bit_rate": 96_000,
+        "video_codec": "h264", "audio_codec": "aac",
+    }
+
+
+@pytest.mark.django_db
+def test_upload_is_probed_and_not_upscaled(django_capture_on_commit_callbacks):
+    queue = _queue()
+    with mock.patch.object(processing, "probe_source", return_value=_probe(480)), \
+            mock.patch.object(processing.django_rq, "get_queue", return_value=queue):
+        with django_capture_on_commit_callbacks(execute=True):
+            video = Video.objects.create(title="t", category=Video.DRAMA, video_file="videos/t.mp4")
+            queue.enqueue.assert_not_called()
+        assert queue.enqueue.call_args.args == (processing.prepare_video, video.id)
+        assert not hasattr(video, "metadata")
+        processing.prepare_video(video.id)
+
+    video.refresh_from_db()
+    assert video.metadata.height == 480
+    ladder = queue.enqueue.call_args.args[3]
+    assert ladder and all(int(res[:-1]) <= 480 for res in ladder)
+
+
+@pytest.mark.django_db
+def test_missing_video_is_logged(caplog):
+    processing.prepare_video(12345)
+    assert "Video 12345 no longer exists" in caplog.text
+
+
+@pytest.fixture
+def duplicates(settings, tmp_path, django_capture_on_commit_callbacks):
+    settings.MEDIA_ROOT = tmp_path
+    settings.HLS_ROOT = str(tmp_path / "hls")
+    (tmp_path / "videos").mkdir()
+    for name in ("a.mp4", "b.mp4"):
+        (tmp_path / "videos" / name).write_bytes(b"same content")
+
+    queue = _queue()
+    with mock.patch.object(processing, "probe_source", return_value=_probe(720)), \
+            mock.patch.object(processing.django_rq, "get_queue", return_value=queue):
+        with django_capture_on_commit_callbacks(execute=True):
+            first = Video.objects.create(title="a", category=Video.DRAMA, video_file="videos/a.mp4")
+            second = Video.objects.create(title="b", category=Video.DRAMA, video_file="videos/b.mp4")
+        assert queue.enqueue.call_count == 2
+        yield first, second, queue
+
+
+@pytest.mark.django_db
+def test_duplicate_upload_shares_output_until_last_reference(duplicates, tmp_path):
+    first, second, queue = duplicates
+    processing.prepare_video(first.id)
+    processing.prepare_video(second.id)
+
+    # Two processing jobs, then preview and transcode of the first upload
+    # only; the second checks again once the first one's jobs are done.
+    assert queue.enqueue.call_count == 4
+    assert queue.enqueue_in.call_args.args[1:] == (processing.prepare_video, second.id)
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.content_digest == second.content_digest
+    shared = tmp_path / "hls" / "_shared" / first.content_digest
+    assert (tmp_path / "hls" / str(second.id)).resolve() == shared.resolve()
+
+    first.delete()
+    assert shared.is_dir()
+    second.delete()
+    assert not shared.exists()
+
+
+@pytest.mark.django_db
+def test_fast_preview_is_followed_by_a_high_quality_pass():
+    queues = {}
+    get_queue = lambda name, **kwargs: queues.setdefault(name, _queue())
+    with mock.patch.object(processing, "probe_source", return_value=_probe(1080)), \
+            mock.patch.object(processing.django_rq, "get_queue", side_effect=get_queue):
+        video = Video.objects.create(title="t", category=Video.DRAMA, video_file="videos/t.mp4")
+        processing.prepare_video(video.id)
+
+    preview = queues["preview"].enqueue.call_args
+    assert preview.args[0] is processing.convert_to_hls
+    assert preview.args[3] == "120p"
+    assert preview.kwargs["preset"] == processing.PREVIEW_PRESET
+    assert preview.kwargs["per_title"] is False
+
+    final = queues["transcode"].enqueue.call_args
+    assert final.args[3][0] == "120p"
+    assert final.kwargs["replace"] and final.kwargs["preset"] == processing.HQ_PRESET
+    assert final.kwargs["depends_on"].dependencies == ["job-id"]
+
+
+@pytest.mark.django_db
+def test_duplicate_of_a_failed_encode_takes_over(duplicates, redis):
+    first, second, queue = duplicates
+    processing.prepare_video(first.id)
+    key = processing.OWNER_KEY.format(digest=Video.objects.get(pk=first.id).content_digest)
+    claim = json.loads(redis.get(key))
+    redis.set(key, json.dumps({**claim, "claimed": claim["claimed"] - processing.CLAIM_GRACE}))
+
+    processing.prepare_video(second.id)
+
+    assert queue.enqueue.call_count == 6
+    assert queue.enqueue.call_args.args[1] == second.id
+    assert json.loads(redis.get(key))["video"] == second.id
+    queue.enqueue_in.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_duplicate_of_published_output_is_not_encoded(duplicates, tmp_path):
+    first, second, queue = duplicates
+    processing.prepare_video(first.id)
+    for res in queue.enqueue.call_args.args[3]:
+        (tmp_path / "hls" / str(first.id) / res).mkdir(parents=True)
+        (tmp_path / "hls" / str(first.id) / res / "index.m3u8").write_text("#EXTM3U\n")
+
+    processing.prepare_video(second.id)
+
+    assert queue.enqueue.call_count == 4
+    queue.enqueue_in.assert_not_called()
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from rest_framework.test import APIClient
+
+from video.api import asset_index
+from video.api.signing import segment_signature, sign_playlist, url_expiry, verify_segment_request
+
+
+@pytest.fixture
+def rendition(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    settings.VIDEO_ALLOWED_RESOLUTIONS = ["360p"]
+    asset_index.forget_asset_index(3)
+    path = tmp_path / "3" / "360p"
+    path.mkdir(parents=True)
+    (path / "init.mp4").write_bytes(b"init")
+    (path / "segment_000.ts").write_bytes(b"a" * 100)
+    (path / "index.m3u8").write_text(
+        "#EXTM3U\n#EXT-X-MAP:URI=\"init.mp4\"\n#EXTINF:6.0,\nsegment_000.ts\n#EXT-X-ENDLIST\n"
+    )
+    return path
+
+
+def test_signature_is_bound_to_user_rendition_and_expiry():
+    expires = int(time.time()) + 60
+    params = {"u": "7", "e": str(expires), "s": segment_signature(7, 3, "360p", expires)}
+
+    assert verify_segment_request(3, "360p", params)
+    assert not verify_segment_request(3, "720p", params)
+    assert not verify_segment_request(4, "360p", params)
+    assert not verify_segment_request(3, "360p", {**params, "u": "8"})
+    assert not verify_segment_request(3, "360p", {**params, "e": str(expires + 1)})
+
+    expired = int(time.time()) - 1
+    assert not verify_segment_request(
+        3, "360p", {"u": "7", "e": str(expired), "s": segment_signature(7, 3, "360p", expired)},
+    )
+
+
+def test_expiry_is_rounded_to_stable_buckets():
+    now = 1_000_000
+    assert url_expiry(400, now) == 1_000_400
+    assert url_expiry(400, now + 1) == 1_000_500
+    assert url_expiry(400, now + 99) == 1_000_500
+    assert all(url_expiry(400, t) - t >= 400 for t in range(now, now + 200, 7))
+
+
+def test_playlist_uris_are_signed(rendition):
+    text = sign_playlist((rendition / "index.m3u8").read_text(), 7, 3, "360p")
+    lines = text.splitlines()
+
+    assert lines[1].startswith('#EXT-X-MAP:URI="/api/video/3/360p/signed/init.mp4?u=7&e=')
+    assert lines[3].startswith("/api/video/3/360p/signed/segment_000.ts?u=7&e=")
+    assert lines[-1] == "#EXT-X-ENDLIST"
+
+
+@pytest.mark.django_db
+def test_signed_segments_are_served_without_database_access(rendition, django_user_model,
+                                                              django_assert_num_queries):
+    user = django_user_model.objects.create_user(email="viewer@example.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    manifest = client.get("/api/video/3/360p/index.m3u8")
+    assert manifest.status_code == 200
+    segment_url = manifest.content.decode().splitlines()[3]
+
+    anonymous = APIClient()
+    with django_assert_num_queries(0):
+        resp = anonymous.get(segment_url)
+    assert resp.status_code == 200
+    assert b"".join(resp.streaming_content) == b"a" * 100
+
+    assert anonymous.get(segment_url.replace("s=", "s=0")).status_code == 403
+    assert anonymous.get("/api/video/3/360p/signed/segment_000.ts").status_code == 403
+
+
+@pytest.mark.django_db
+def test_signed_playlist_is_stable_and_revalidates(rendition, django_user_model):
+    user = django_user_model.objects.create_user(email="viewer@example.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    first = client.get("/api/video/3/360p/index.m3u8")
+    second = client.get("/api/video/3/360p/index.m3u8")
+
+    assert first.content == second.content
+    assert first["ETag"] == second["ETag"]
+    assert "no-store" not in first["Cache-Control"]
+    revalidated = client.get("/api/video/3/360p/index.m3u8", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert revalidated.status_code == 304
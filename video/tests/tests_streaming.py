@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+
+from authentication.api import token_epochs, user_cache
+from video.api import asset_index
+from video.api.signing import signed_query
+from video.api.views import AsyncHLSSegmentView, AsyncHLSSignedSegmentView
+
+
+@pytest.fixture
+def segment(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    settings.VIDEO_ALLOWED_RESOLUTIONS = ["360p"]
+    asset_index.forget_asset_index(4)
+    user_cache.cache.clear()
+    user_cache._local.clear()
+    token_epochs._local.clear()
+    path = tmp_path / "4" / "360p" / "segment_000.ts"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(bytes(range(256)) * 4096)
+    (path.parent / "index.m3u8").write_text("#EXTM3U\n#EXTINF:6.0,\nsegment_000.ts\n#EXT-X-ENDLIST\n")
+    return path
+
+
+def _call(view, request, **kwargs):
+    resp = async_to_sync(view.as_view())(request, movie_id=4, resolution="360p",
+                                         segment="segment_000.ts", **kwargs)
+
+    async def collect():
+        return b"".join([chunk async for chunk in resp.streaming_content])
+
+    return resp, async_to_sync(collect)() if resp.streaming else resp.content
+
+
+@pytest.mark.django_db
+def test_async_segments_stream_in_bounded_chunks(segment, monkeypatch):
+    monkeypatch.setattr("video.api.streaming.CHUNK_SIZE", 1000)
+    request = AsyncRequestFactory().get(
+        f"/api/video/4/360p/signed/segment_000.ts?{signed_query(7, 4, '360p')}",
+        headers={"Range": "bytes=100-5099"},
+    )
+    resp, body = _call(AsyncHLSSignedSegmentView, request)
+
+    assert resp.status_code == 206
+    assert resp.is_async
+    assert resp["Content-Range"] == f"bytes 100-5099/{segment.stat().st_size}"
+    assert resp["Content-Length"] == "5000"
+    assert body == segment.read_bytes()[100:5100]
+
+    forged = AsyncRequestFactory().get("/api/video/4/360p/signed/segment_000.ts?u=7&e=1&s=x")
+    assert _call(AsyncHLSSignedSegmentView, forged)[0].status_code == 403
+
+
+@pytest.mark.django_db
+def test_async_segment_view_authenticates_the_access_token(segment, django_user_model):
+    user = django_user_model.objects.create_user(email="viewer@example.com", password="pw")
+    user.is_active = True
+    user.save()
+
+    anonymous = AsyncRequestFactory().get("/api/video/4/360p/segment_000.ts/")
+    resp, body = _call(AsyncHLSSegmentView, anonymous)
+    assert resp.status_code == 403
+    assert "detail" in json.loads(body)
+
+    request = AsyncRequestFactory().get("/api/video/4/360p/segment_000.ts/")
+    request.COOKIES["access_token"] = str(token_epochs.issue_tokens(user).access_token)
+    resp, body = _call(AsyncHLSSegmentView, request)
+    assert resp.status_code == 200
+    assert body == segment.read_bytes()
+
+    request.COOKIES["access_token"] = "garbage"
+    assert _call(AsyncHLSSegmentView, request)[0].status_code == 403
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+from unittest import mock
+
+import pytest
+from rest_framework.test import APIClient
+
+from video.api import processing
+from video.models import UploadSession, Video
+
+
+def _b64(value):
+    return base64.b64encode(value.encode()).decode()
+
+
+@pytest.fixture
+def staff_client(django_user_model):
+    user = django_user_model.objects.create_user(
+        email="staff@example.com", password="pw", is_staff=True,
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def _patch(client, url, offset, data, checksum=None):
+    headers = {"HTTP_UPLOAD_OFFSET": str(offset)}
+    if checksum:
+        headers["HTTP_UPLOAD_CHECKSUM"] = checksum
+    return client.generic(
+        "PATCH", url, data, content_type="application/offset+octet-stream", **headers,
+    )
+
+
+@pytest.mark.django_db
+def test_chunked_upload_resumes_and_creates_video(settings, tmp_path, staff_client,
+                                                  django_capture_on_commit_callbacks):
+    settings.MEDIA_ROOT = tmp_path
+    settings.HLS_ROOT = str(tmp_path / "hls")
+    payload = b"0123456789" * 100
+    metadata = f"filename {_b64('movie.mp4')},title {_b64('Movie')},category {_b64('Drama')}"
+
+    created = staff_client.post(
+        "/api/video/uploads/", HTTP_UPLOAD_LENGTH=str(len(payload)), HTTP_UPLOAD_METADATA=metadata,
+    )
+    assert created.status_code == 201
+    url = created["Location"]
+
+    sha1 = base64.b64encode(hashlib.sha1(payload[:600]).digest()).decode()
+    assert _patch(staff_client, url, 0, payload[:600], f"sha1 {sha1}").status_code == 204
+    assert _patch(staff_client, url, 0, payload[:600]).status_code == 409
+    assert _patch(staff_client, url, 600, payload[600:], f"sha1 {sha1}").status_code == 460
+    assert staff_client.head(url)["Upload-Offset"] == "600"
+
+    queue = mock.Mock()
+    queue.enqueue.return_value.id = "job-id"
+    with mock.patch.object(processing, "file_digest") as file_digest, \
+            mock.patch.object(processing.django_rq, "get_queue", return_value=queue), \
+            django_capture_on_commit_callbacks(execute=True):
+        done = _patch(staff_client, url, 600, payload[600:])
+    file_digest.assert_not_called()
+
+    assert done.status_code == 204 and done["Upload-Offset"] == str(len(payload))
+    video = Video.objects.get(pk=done["Video-Id"])
+    assert video.title == "Movie" and video.category == Video.DRAMA
+    assert (tmp_path / video.video_file.name).read_bytes() == payload
+    assert UploadSession.objects.get().status == UploadSession.COMPLETE
+    assert not list((tmp_path / "uploads").iterdir())
+    assert queue.enqueue.call_args.args == (processing.prepare_video, video.id)
+
+    retried = _patch(staff_client, url, len(payload), b"")
+    assert retried.status_code == 409
+    assert _patch(staff_client, url, 600, payload[600:]).status_code == 409
+    assert Video.objects.count() == 1
+    assert not list((tmp_path / "uploads").iterdir())
+
+
+@pytest.mark.django_db
+def test_failed_finalization_marks_session_failed(settings, tmp_path, staff_client):
+    settings.MEDIA_ROOT = tmp_path
+    metadata = f"filename {_b64('movie.mp4')},title {_b64('Movie')},category {_b64('Drama')}"
+    url = staff_client.post(
+        "/api/video/uploads/", HTTP_UPLOAD_LENGTH="10", HTTP_UPLOAD_METADATA=metadata,
+    )["Location"]
+
+    def partial_move(source, target):
+        open(target, "wb").write(b"01234")
+        raise OSError(28, "No space left on device")
+
+    with mock.patch("video.api.uploads.shutil.move", side_effect=partial_move):
+        with pytest.raises(OSError):
+            _patch(staff_client, url, 0, b"0123456789")
+
+    assert UploadSession.objects.get().status == UploadSession.FAILED
+    assert not Video.objects.exists()
+    assert not list((tmp_path / "videos").iterdir())
+    assert _patch(staff_client, url, 10, b"").status_code == 409
@@ -0,0 +1,103 @@
+from unittest import mock
+
+import pytest
+
+from video.api.utils import RangeFileWrapper, parse_range, serve_m3u8, serve_segment
+
+
+def test_parse_range_variants():
+    assert parse_range(None, 1000) is None
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("bytes=5-3", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+
+
+def test_serve_segment_answers_byte_ranges(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    settings.VIDEO_ALLOWED_RESOLUTIONS = ["360p"]
+    rendition = tmp_path / "3" / "360p"
+    rendition.mkdir(parents=True)
+    (rendition / "segment.mp4").write_bytes(bytes(range(256)))
+
+    resp = serve_segment(3, "360p", "segment.mp4", "bytes=16-31")
+    assert resp.status_code == 206
+    assert resp["Content-Type"] == "video/mp4"
+    assert resp["Content-Range"] == "bytes 16-31/256"
+    assert resp["Content-Length"] == "16"
+    assert b"".join(resp.streaming_content) == bytes(range(16, 32))
+
+    assert serve_segment(3, "360p", "segment.mp4", "bytes=300-").status_code == 416
+
+
+def test_if_range_falls_back_to_the_whole_file(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    settings.VIDEO_ALLOWED_RESOLUTIONS = ["360p"]
+    rendition = tmp_path / "3" / "360p"
+    rendition.mkdir(parents=True)
+    (rendition / "segment_000.ts").write_bytes(b"a" * 100)
+    (rendition / "index.m3u8").write_text("#EXTM3U\n")
+
+    full = serve_segment(3, "360p", "segment_000.ts")
+    etag, modified = full["ETag"], full["Last-Modified"]
+    assert full.status_code == 200 and full["Accept-Ranges"] == "bytes"
+
+    resumed = serve_segment(3, "360p", "segment_000.ts", "bytes=-10", etag)
+    assert resumed.status_code == 206 and resumed["Content-Range"] == "bytes 90-99/100"
+    assert serve_segment(3, "360p", "segment_000.ts", "bytes=0-9", modified).status_code == 206
+    assert serve_segment(3, "360p", "segment_000.ts", "bytes=0-9", '"stale"').status_code == 200
+    assert serve_m3u8(3, "360p", "bytes=0-6").status_code == 206
+
+
+def test_range_wrapper_reads_only_its_window(tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(bytes(range(100)))
+    wrapper = RangeFileWrapper(open(path, "rb"), 10, 25)
+
+    chunks = iter(lambda: wrapper.read(10), b"")
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    wrapper.close()
+
+
+def test_offload_modes_return_only_the_internal_redirect(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    settings.VIDEO_ALLOWED_RESOLUTIONS = ["360p"]
+    rendition = tmp_path / "3" / "360p"
+    rendition.mkdir(parents=True)
+    (rendition / "segment_000.ts").write_bytes(b"a" * 100)
+
+    settings.VIDEO_DELIVERY_MODE = "x-accel"
+    resp = serve_segment(3, "360p", "segment_000.ts", "bytes=0-9")
+    assert resp.status_code == 200 and resp.content == b""
+    assert resp["X-Accel-Redirect"] == "/protected-hls/3/360p/segment_000.ts"
+    assert resp["Content-Type"] == "video/MP2T"
+
+    settings.VIDEO_DELIVERY_MODE = "x-sendfile"
+    resp = serve_segment(3, "360p", "segment_000.ts")
+    assert resp["X-Sendfile"] == str((rendition / "segment_000.ts").resolve())
+
+
+def test_conditional_requests_answer_304_with_cache_headers(settings, tmp_path):
+    settings.HLS_ROOT = str(tmp_path)
+    settings.VIDEO_ALLOWED_RESOLUTIONS = ["360p"]
+    rendition = tmp_path / "3" / "360p"
+    rendition.mkdir(parents=True)
+    (rendition / "segment_000.ts").write_bytes(b"a" * 100)
+    (rendition / "index.m3u8").write_text("#EXTM3U\n")
+
+    full = serve_segment(3, "360p", "segment_000.ts")
+    assert full["Cache-Control"].endswith("immutable")
+    assert serve_m3u8(3, "360p")["Cache-Control"] == "private, max-age=5"
+
+    with mock.patch("builtins.open", side_effect=AssertionError("file opened")):
+        by_etag = serve_segment(3, "360p", "segment_000.ts", if_none_match=f'W/{full["ETag"]}')
+        by_date = serve_segment(
+            3, "360p", "segment_000.ts", if_modified_since=full["Last-Modified"],
+        )
+    assert by_etag.status_code == by_date.status_code == 304
+    assert by_etag["ETag"] == full["ETag"]
+    assert serve_segment(3, "360p", "segment_000.ts", if_none_match='"other"').status_code == 200